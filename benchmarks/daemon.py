@@ -0,0 +1,310 @@
+"""Measures pi-topd's latency and throughput against a simulated device.
+
+Run from the repository root, with pitopd's dependencies installed and
+no other pi-topd running:
+
+    python benchmarks/daemon.py [--device pi_top_4] [--output results.json]
+
+Measures the time from starting pi-topd to it notifying systemd that it
+is ready, the CPU used while idle, the latency from a button being
+pressed on the hub to the button's message being published, the rate
+and latency of battery state requests from several clients at once,
+and the cost of scanning the I2C bus for peripherals. The results are
+written as JSON so that they can be compared between versions.
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from threading import Thread
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import zmq  # noqa: E402
+from pitop.common.ptdm import Message  # noqa: E402
+
+from pitopd.app import App  # noqa: E402
+from pitopd.i2c_prober import I2CProber  # noqa: E402
+from pitopd.simulator.simulation import DEVICES, Simulation  # noqa: E402
+
+PUBLISH_ENDPOINT = "tcp://127.0.0.1:3781"
+REQUEST_ENDPOINT = "tcp://127.0.0.1:3782"
+
+BUTTON_MESSAGES = {
+    "up": (Message.PUB_V3_BUTTON_UP_PRESSED, Message.PUB_V3_BUTTON_UP_RELEASED),
+    "down": (Message.PUB_V3_BUTTON_DOWN_PRESSED, Message.PUB_V3_BUTTON_DOWN_RELEASED),
+    "select": (
+        Message.PUB_V3_BUTTON_SELECT_PRESSED,
+        Message.PUB_V3_BUTTON_SELECT_RELEASED,
+    ),
+    "cancel": (
+        Message.PUB_V3_BUTTON_CANCEL_PRESSED,
+        Message.PUB_V3_BUTTON_CANCEL_RELEASED,
+    ),
+}
+
+
+def percentile(samples, percent):
+    ordered = sorted(samples)
+    index = max(math.ceil(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+def summarise_latencies(samples):
+    """Summarise latencies given in seconds, in milliseconds."""
+    if len(samples) == 0:
+        return None
+    return {
+        "samples": len(samples),
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p90_ms": percentile(samples, 90) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples) * 1000,
+    }
+
+
+def measure_startup(device, runs):
+    """Start pi-topd in a new process and time how long it takes to send
+    READY=1 to systemd."""
+    directory = tempfile.mkdtemp(prefix="pitopd-benchmark-")
+    notify_path = os.path.join(directory, "notify")
+    notify_socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    notify_socket.bind(notify_path)
+    notify_socket.settimeout(60)
+
+    env = dict(os.environ, NOTIFY_SOCKET=notify_path)
+    env["PYTHONPATH"] = os.pathsep.join(
+        path for path in (REPO_ROOT, env.get("PYTHONPATH")) if path
+    )
+    command = [
+        sys.executable,
+        "-c",
+        "from pitopd.__main__ import main; main()",
+        "--simulate",
+        device,
+    ]
+
+    durations = list()
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            while b"READY=1" not in notify_socket.recv(4096).split(b"\n"):
+                pass
+            durations.append(time.perf_counter() - start)
+        finally:
+            # Steps still running after READY=1 are cancelled on stop
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+    notify_socket.close()
+    os.unlink(notify_path)
+    os.rmdir(directory)
+    return {
+        "runs": runs,
+        "min_s": min(durations),
+        "median_s": percentile(durations, 50),
+        "max_s": max(durations),
+    }
+
+
+def receive_message_id(subscriber, timeout_s):
+    if subscriber.poll(timeout_s * 1000) == 0:
+        raise TimeoutError(f"No message published within {timeout_s}s")
+    return int(subscriber.recv_string().split("|")[0])
+
+
+def wait_for_message(subscriber, message_id, timeout_s=5):
+    deadline = time.monotonic() + timeout_s
+    while receive_message_id(subscriber, deadline - time.monotonic()) != message_id:
+        pass
+
+
+def measure_idle_cpu(duration_s):
+    """Percentage of one CPU used by this process while pi-topd is idle."""
+    start = time.perf_counter()
+    start_cpu = time.process_time()
+    time.sleep(duration_s)
+    return (time.process_time() - start_cpu) / (time.perf_counter() - start) * 100
+
+
+def measure_button_latency(hub, subscriber, presses, interval_s):
+    """Time from a button changing state on the hub to its message being
+    published, for both presses and releases."""
+    latencies = list()
+    for _ in range(presses):
+        button = random.choice(sorted(BUTTON_MESSAGES))
+        pressed_message, released_message = BUTTON_MESSAGES[button]
+
+        start = time.perf_counter()
+        hub.press_button(button)
+        wait_for_message(subscriber, pressed_message)
+        latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        hub.release_button(button)
+        wait_for_message(subscriber, released_message)
+        latencies.append(time.perf_counter() - start)
+
+        # Jitter the gap between presses so that they do not line up
+        # with the hub's poll cycle
+        time.sleep(random.uniform(0.5, 1.5) * interval_s)
+    return summarise_latencies(latencies)
+
+
+def run_battery_state_client(start_event, duration_s, results):
+    context = zmq.Context()
+    client = context.socket(zmq.REQ)
+    client.connect(REQUEST_ENDPOINT)
+    request = str(Message.REQ_GET_BATTERY_STATE)
+
+    start_event.wait()
+    latencies = list()
+    end = time.perf_counter() + duration_s
+    while True:
+        start = time.perf_counter()
+        if start >= end:
+            break
+        client.send_string(request)
+        client.recv_string()
+        latencies.append(time.perf_counter() - start)
+
+    client.close()
+    context.term()
+    results.put(latencies)
+
+
+def measure_battery_requests(clients, duration_s):
+    """Battery state requests answered per second with a number of clients each
+    sending requests as fast as they are answered.
+
+    Clients run in their own processes so that they do not compete with
+    pi-topd for the interpreter lock.
+    """
+    spawn = multiprocessing.get_context("spawn")
+    start_event = spawn.Event()
+    results = spawn.Queue()
+    processes = [
+        spawn.Process(
+            target=run_battery_state_client, args=(start_event, duration_s, results)
+        )
+        for _ in range(clients)
+    ]
+    for process in processes:
+        process.start()
+
+    # Give the clients time to start up and connect
+    time.sleep(1)
+    start_event.set()
+
+    latencies = list()
+    for _ in processes:
+        latencies.extend(results.get(timeout=duration_s + 30))
+    for process in processes:
+        process.join()
+
+    summary = summarise_latencies(latencies)
+    summary["requests_per_second"] = len(latencies) / duration_s
+    return summary
+
+
+def measure_peripheral_scan(scans):
+    """Time taken to probe the I2C bus for peripherals, including the time the
+    simulated bus takes to transfer each probe."""
+    prober = I2CProber()
+    durations = list()
+    for _ in range(scans):
+        start = time.perf_counter()
+        prober.probe()
+        durations.append(time.perf_counter() - start)
+    prober.close()
+    return summarise_latencies(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--device", choices=sorted(DEVICES), default="pi_top_4")
+    parser.add_argument("--startup-runs", type=int, default=3)
+    parser.add_argument("--idle-seconds", type=float, default=10)
+    parser.add_argument("--presses", type=int, default=50)
+    parser.add_argument("--press-interval", type=float, default=0.5)
+    parser.add_argument(
+        "--clients",
+        type=lambda value: [int(clients) for clients in value.split(",")],
+        default=[1, 4, 16],
+        help="Comma-separated numbers of concurrent clients to measure with",
+    )
+    parser.add_argument("--request-seconds", type=float, default=5)
+    parser.add_argument("--scans", type=int, default=100)
+    parser.add_argument("--output", help="File to write the results to")
+    args = parser.parse_args()
+
+    results = {
+        "device": args.device,
+        "python": sys.version.split()[0],
+        "startup": measure_startup(args.device, args.startup_runs),
+    }
+
+    simulation = Simulation(args.device)
+    simulation.install()
+    app = App(simulation=simulation)
+
+    context = zmq.Context()
+    subscriber = context.socket(zmq.SUB)
+    subscriber.setsockopt(zmq.SUBSCRIBE, b"")
+    subscriber.connect(PUBLISH_ENDPOINT)
+
+    app_thread = Thread(target=app.start, daemon=True)
+    app_thread.start()
+    try:
+        wait_for_message(subscriber, Message.PUB_PITOPD_READY, timeout_s=60)
+        # Let the request server start and the first polls settle
+        time.sleep(2)
+
+        results["idle_cpu_percent"] = measure_idle_cpu(args.idle_seconds)
+
+        try:
+            results["button_latency"] = measure_button_latency(
+                simulation.hub, subscriber, args.presses, args.press_interval
+            )
+        except NotImplementedError:
+            # Only the pi-top [4] has UI buttons
+            results["button_latency"] = None
+
+        results["battery_state_requests"] = {
+            str(clients): measure_battery_requests(clients, args.request_seconds)
+            for clients in args.clients
+        }
+
+        results["peripheral_scan"] = measure_peripheral_scan(args.scans)
+    finally:
+        subscriber.close()
+        context.term()
+        app.stop()
+        app_thread.join()
+
+    output = json.dumps(results, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Measures how long pt-poweroff and pt-reboot take to load.
+
+Run from the repository root, with pitopd's dependencies installed:
+
+    python benchmarks/poweroff.py [--runs N]
+
+These run in the shutdown and reboot path, so time spent importing them
+is added to every shutdown. Each run starts a new interpreter, and the
+time to start one that imports nothing is reported for comparison.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(code, runs):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        path for path in (REPO_ROOT, env.get("PYTHONPATH")) if path
+    )
+    durations = list()
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], env=env, check=True)
+        durations.append(time.perf_counter() - start)
+    return sorted(durations)[len(durations) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    baseline = measure("pass", args.runs)
+    print(f"Interpreter start: {baseline * 1000:.1f}ms")
+    duration = measure("import pitopd.poweroff", args.runs)
+    print(
+        f"pitopd.poweroff import: {duration * 1000:.1f}ms"
+        f" ({(duration - baseline) * 1000:.1f}ms more than an empty interpreter)"
+    )
+
+
+if __name__ == "__main__":
+    main()
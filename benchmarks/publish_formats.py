@@ -0,0 +1,123 @@
+"""Compares the text and binary formats for published messages.
+
+Run from the repository root, with pitopd's dependencies installed:
+
+    python benchmarks/publish_formats.py [--messages N]
+
+Battery state messages are encoded, sent over an inproc PUB socket and
+decoded by a subscriber, reporting messages/s and the CPU time used per
+message for each format. The cost of encoding and decoding alone is
+also reported, as ZeroMQ's own overhead dominates for small messages.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import zmq  # noqa: E402
+from pitop.common.ptdm import Message  # noqa: E402
+
+from pitopd.server import binary_protocol  # noqa: E402
+
+PARAMETERS = [1, 75, 120, 15]
+
+
+def send_text(socket):
+    socket.send_string(
+        Message.from_parts(Message.PUB_BATTERY_STATE_CHANGED, PARAMETERS).to_string()
+    )
+
+
+def receive_text(socket):
+    message = Message.from_string(socket.recv_string())
+    return message.message_id(), [int(p) for p in message.parameters]
+
+
+def send_binary(socket):
+    socket.send_multipart(
+        binary_protocol.encode(Message.PUB_BATTERY_STATE_CHANGED, PARAMETERS),
+        copy=False,
+    )
+
+
+def receive_binary(socket):
+    return binary_protocol.decode(socket.recv_multipart())
+
+
+def measure_codec(encode, decode, message_count):
+    start_cpu = time.process_time()
+    for _ in range(message_count):
+        decode(encode())
+    return (time.process_time() - start_cpu) / message_count * 1e6
+
+
+def measure_round_trip(context, endpoint, send, receive, message_count):
+    publisher = context.socket(zmq.PUB)
+    publisher.setsockopt(zmq.SNDHWM, 0)
+    publisher.bind(endpoint)
+    subscriber = context.socket(zmq.SUB)
+    subscriber.setsockopt(zmq.RCVHWM, 0)
+    subscriber.setsockopt(zmq.SUBSCRIBE, b"")
+    subscriber.connect(endpoint)
+
+    # Wait for the subscription to reach the publisher
+    time.sleep(0.2)
+
+    start = time.perf_counter()
+    start_cpu = time.process_time()
+    for _ in range(message_count):
+        send(publisher)
+        assert receive(subscriber) == (Message.PUB_BATTERY_STATE_CHANGED, PARAMETERS)
+    elapsed = time.perf_counter() - start
+    elapsed_cpu = time.process_time() - start_cpu
+
+    publisher.close()
+    subscriber.close()
+    return message_count / elapsed, elapsed_cpu / message_count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100000)
+    args = parser.parse_args()
+
+    codecs = (
+        (
+            "text",
+            lambda: Message.from_parts(
+                Message.PUB_BATTERY_STATE_CHANGED, PARAMETERS
+            ).to_string(),
+            Message.from_string,
+        ),
+        (
+            "binary",
+            lambda: binary_protocol.encode(
+                Message.PUB_BATTERY_STATE_CHANGED, PARAMETERS
+            ),
+            binary_protocol.decode,
+        ),
+    )
+    for name, encode, decode in codecs:
+        cpu_us = measure_codec(encode, decode, args.messages)
+        print(f"{name} encode + decode: {cpu_us:.2f}us CPU per message")
+
+    context = zmq.Context()
+    for name, send, receive in (
+        ("text", send_text, receive_text),
+        ("binary", send_binary, receive_binary),
+    ):
+        rate, cpu_us = measure_round_trip(
+            context, f"inproc://publish-{name}", send, receive, args.messages
+        )
+        print(
+            f"{name} round trip: {rate:.0f} messages/s,"
+            f" {cpu_us:.1f}us CPU per message"
+        )
+    context.term()
+
+
+if __name__ == "__main__":
+    main()
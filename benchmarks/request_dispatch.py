@@ -0,0 +1,138 @@
+"""Measures how many requests per second the request server can answer.
+
+Run from the repository root, with pitopd's dependencies installed:
+
+    python benchmarks/request_dispatch.py [--requests N]
+
+The in-process figure is the cost of parsing and dispatching a request;
+the end-to-end figure also includes the ZeroMQ round trip from a client.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import zmq  # noqa: E402
+from pitop.common.ptdm import Message  # noqa: E402
+
+from pitopd.server.request_server import RequestServer  # noqa: E402
+
+REQUESTS = [
+    str(Message.REQ_PING),
+    str(Message.REQ_GET_DEVICE_ID),
+    str(Message.REQ_GET_BRIGHTNESS),
+    str(Message.REQ_GET_BATTERY_STATE),
+    f"{Message.REQ_GET_PERIPHERAL_ENABLED}|4",
+    str(Message.REQ_GET_SCREEN_BLANKING_TIMEOUT),
+    str(Message.REQ_GET_LID_OPEN_STATE),
+    str(Message.REQ_GET_SCREEN_BACKLIGHT_STATE),
+    str(Message.REQ_GET_OLED_CONTROL),
+    str(Message.REQ_GET_OLED_SPI_BUS),
+    f"{Message.REQ_SET_BRIGHTNESS}|5",
+    f"{Message.REQ_SET_SCREEN_BLANKING_TIMEOUT}|60",
+]
+
+
+class FakeCallbackClient:
+    def on_request_get_device_id(self):
+        return 1
+
+    def on_request_get_brightness(self):
+        return 10
+
+    def on_request_set_brightness(self, brightness):
+        pass
+
+    def on_request_increment_brightness(self):
+        pass
+
+    def on_request_decrement_brightness(self):
+        pass
+
+    def on_request_blank_screen(self):
+        pass
+
+    def on_request_unblank_screen(self):
+        pass
+
+    def on_request_battery_state(self):
+        return 1, 75, 120, 15
+
+    def on_request_get_peripheral_enabled(self, peripheral_id):
+        return True
+
+    def on_request_get_screen_blanking_timeout(self):
+        return 60
+
+    def on_request_set_screen_blanking_timeout(self, timeout):
+        pass
+
+    def on_request_get_lid_open_state(self):
+        return 1
+
+    def on_request_get_screen_backlight_state(self):
+        return 1
+
+    def on_request_set_screen_backlight_state(self, backlight_on):
+        pass
+
+    def on_request_get_oled_control(self):
+        return 0
+
+    def on_request_set_oled_pi_control(self, is_pi_controlled):
+        pass
+
+    def on_request_get_oled_spi_bus(self):
+        return 1
+
+    def on_request_set_oled_spi_bus(self, spi_bus):
+        pass
+
+
+def measure_in_process(server, request_count):
+    start = time.perf_counter()
+    for i in range(request_count):
+        server._process_request(REQUESTS[i % len(REQUESTS)])
+    return request_count / (time.perf_counter() - start)
+
+
+def measure_end_to_end(request_count):
+    context = zmq.Context()
+    socket = context.socket(zmq.REQ)
+    socket.connect("tcp://127.0.0.1:3782")
+
+    start = time.perf_counter()
+    for i in range(request_count):
+        socket.send_string(REQUESTS[i % len(REQUESTS)])
+        socket.recv_string()
+    rate = request_count / (time.perf_counter() - start)
+
+    socket.close()
+    context.term()
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50000)
+    args = parser.parse_args()
+
+    server = RequestServer()
+    server.initialise(FakeCallbackClient())
+
+    print(f"in-process: {measure_in_process(server, args.requests):.0f} requests/s")
+
+    if not server.start_listening():
+        sys.exit("Unable to start the request server")
+    try:
+        rate = measure_end_to_end(args.requests // 10)
+        print(f"end-to-end: {rate:.0f} requests/s")
+    finally:
+        server.stop_listening()
+
+
+if __name__ == "__main__":
+    main()
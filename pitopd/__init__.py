@@ -1 +1,12 @@
-from .version import __version__
+# Imported first, so that startup is timed from when pitopd is loaded
+from . import boot_profile  # noqa: F401
+
+
+def __getattr__(name):
+    # Looking up the installed version is slow, and is not needed by
+    # pt-poweroff and pt-reboot, which run while the system shuts down
+    if name == "__version__":
+        from .version import __version__
+
+        return __version__
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,7 +5,9 @@ import click
 import click_logging
 from systemd.daemon import notify
 
+from . import boot_profile
 from .app import App
+from .simulator.simulation import DEVICES, Simulation
 
 logger = logging.getLogger()
 click_logging.basic_config(logger)
@@ -13,19 +15,44 @@ click_logging.basic_config(logger)
 
 @click.command()
 @click_logging.simple_verbosity_option(logger)
+@click.option(
+    "--simulate",
+    type=click.Choice(sorted(DEVICES)),
+    help="Run against a simulated device instead of the hardware.",
+)
+@click.option(
+    "--scenario",
+    type=click.Path(exists=True, dir_okay=False),
+    help="File of timed hub events to play when simulating.",
+)
 @click.version_option()
-def main() -> None:
-    app = App()
+def main(simulate, scenario) -> None:
+    boot_profile.record("imports")
+
+    simulation = None
+    if simulate is not None:
+        simulation = Simulation(simulate, scenario_path=scenario)
+        simulation.install()
+    elif scenario is not None:
+        raise click.UsageError("--scenario can only be used with --simulate")
+
+    app = App(simulation=simulation)
 
     for sig in [SIGINT, SIGTERM]:
         signal(sig, lambda x, _: app.stop())
 
+    if simulation is not None:
+        simulation.start()
+
     # Blocking
     successful_start = app.start()
 
     # After main loop
     notify("STOPPING=1")
 
+    if simulation is not None:
+        simulation.stop()
+
     if not successful_start:
         logger.error("Unable to start pi-topd")
         app.stop()
@@ -1,10 +1,10 @@
 import logging
-from time import sleep
+from threading import Event, Thread
 
 from pitop.common.common_ids import DeviceID
 from systemd.daemon import notify
 
-from . import state
+from . import boot_profile, state
 from .hub_manager import HubManager
 from .idle_monitor import IdleMonitor
 from .interface_manager import InterfaceManager
@@ -13,22 +13,33 @@ from .peripheral_manager import PeripheralManager
 from .pipe_manager import PipeManager
 from .power_manager import PowerManager
 from .server import PublishServer, RequestServer
+from .server.boot_profile_request import BootProfileRequestHandler
+from .server.state_request import StateRequestHandler
+from .startup import StartupGraph
 
 logger = logging.getLogger(__name__)
 
 
 class App:
-    def __init__(self):
+    def __init__(self, simulation=None):
         self._run = True
 
-        self._pipe_manager = PipeManager()
+        if simulation is None:
+            self._pipe_manager = PipeManager()
+            self._power_manager = PowerManager()
+            self._interface_manager = InterfaceManager()
+            self._peripheral_manager = PeripheralManager()
+            self._idle_monitor = IdleMonitor()
+        else:
+            # Leave the host as it is when running against a simulated device
+            self._pipe_manager = PipeManager(simulation.directory)
+            self._power_manager = simulation.power_manager
+            self._interface_manager = simulation.interface_manager
+            self._peripheral_manager = simulation.peripheral_manager
+            self._idle_monitor = IdleMonitor(idle_time=simulation.idle_time)
         self._publish_server = PublishServer()
-        self._power_manager = PowerManager()
         self._hub_manager = HubManager()
-        self._idle_monitor = IdleMonitor()
-        self._interface_manager = InterfaceManager()
         self._notification_manager = NotificationManager()
-        self._peripheral_manager = PeripheralManager()
         self._request_server = RequestServer()
 
         self._power_manager.initialise(self)
@@ -36,9 +47,21 @@ class App:
         self._idle_monitor.initialise(self)
         self._peripheral_manager.initialise(self)
         self._request_server.initialise(self)
+        self._request_server.register_handler(BootProfileRequestHandler())
+        self._request_server.register_handler(
+            StateRequestHandler(self._publish_server.last_value_cache)
+        )
 
         self.device_id = None
 
+        self._stopped = Event()
+        self._startup = StartupGraph("startup", boot_profile.get_profile())
+        self._deferred_startup = StartupGraph(
+            "deferred startup", boot_profile.get_profile()
+        )
+        self._deferred_startup_thread = Thread(target=self._run_deferred_startup)
+        self._add_startup_steps()
+
     def _set_host_device_id(self, device_id):
         self.device_id = device_id
 
@@ -56,29 +79,93 @@ class App:
     def start(self):
         logger.debug("Starting device manager...")
 
-        last_identified_device_id_str = state.get(
-            "device", "type", fallback=str(DeviceID.unknown.name)
+        try:
+            return self._start()
+        finally:
+            self._shutdown()
+
+    def _start(self):
+        started = False
+        try:
+            started = self._startup.run()
+        finally:
+            if not started:
+                # Otherwise the profile is logged once deferred startup has
+                # finished
+                boot_profile.log_profile()
+
+        if not started:
+            # Steps are skipped if pi-topd is stopped while starting up
+            return self._run is False
+
+        logger.info("Configured for dependencies - unblocking systemd")
+        notify("READY=1")
+        boot_profile.mark("ready")
+        self._publish_server.emit_messages = True
+        self._publish_server.publish_pitopd_ready()
+
+        self._deferred_startup_thread.start()
+
+        self._stopped.wait()
+
+        return True
+
+    def _add_startup_steps(self):
+        # Only what is needed before systemd is unblocked is done before
+        # READY=1, as the miniscreen and desktop session wait for it
+        self._startup.add_step("publish_server", self._start_publish_server)
+        self._startup.add_step("hub", self._connect_to_hub)
+        self._startup.add_step("device", self._identify_device, requires=["hub"])
+        self._startup.add_step(
+            "miniscreen", self._configure_miniscreen, requires=["device"]
         )
-        last_identified_device_id = DeviceID[last_identified_device_id_str]
+        self._startup.add_step(
+            "request_server", self._start_request_server, requires=["device"]
+        )
+
+        # Audio and peripheral setup can take seconds, and nothing waits for it.
+        # Peripherals are still managed if the HiFiBerry cannot be configured.
+        self._deferred_startup.add_step(
+            "hifiberry", self._peripheral_manager.configure_hifiberry
+        )
+        self._deferred_startup.add_step(
+            "peripherals", self._start_peripheral_manager, after=["hifiberry"]
+        )
+        self._deferred_startup.add_step("idle_monitor", self._idle_monitor.start)
+
+    def _run_deferred_startup(self):
+        try:
+            if self._deferred_startup.run():
+                logger.info("Fully configured - running")
+        finally:
+            boot_profile.log_profile()
 
+    def _start_publish_server(self):
         if self._publish_server.start_listening() is False:
             logger.error("Unable to start listening on publish server")
             return False
 
-        if self._hub_manager.connect_to_hub():
-            self._pipe_manager.set_hub_serial_number(self._hub_manager.get_serial_id())
-            self._pipe_manager.set_battery_serial_number(
-                self._hub_manager.get_battery_serial_number()
-            )
-            self._pipe_manager.set_display_serial_number(
-                self._hub_manager.get_display_serial_id()
-            )
-            self._hub_manager.start()
-        else:
+    def _connect_to_hub(self):
+        if not self._hub_manager.connect_to_hub():
             logger.error("No pi-top hub detected")
             self._set_host_device_id(DeviceID.unknown)
             return False
 
+        self._pipe_manager.set_hub_serial_number(self._hub_manager.get_serial_id())
+        self._pipe_manager.set_battery_serial_number(
+            self._hub_manager.get_battery_serial_number()
+        )
+        self._pipe_manager.set_display_serial_number(
+            self._hub_manager.get_display_serial_id()
+        )
+        self._hub_manager.start()
+
+    def _identify_device(self):
+        last_identified_device_id_str = state.get(
+            "device", "type", fallback=str(DeviceID.unknown.name)
+        )
+        last_identified_device_id = DeviceID[last_identified_device_id_str]
+
         # Wait until we have established what device we're running on.
         # This is due to the hub being detected, but the device it itself is yet to be determined.
         # This is only relevant for pi-topCEED.
@@ -93,53 +180,51 @@ class App:
             )
             return False
 
-        if self.device_id == DeviceID.pi_top_4:
-            logger.info("Running on a pi-top [4]. Configuring SPI bus for OLED...")
-
-            spi_bus_to_use = self._hub_manager.get_oled_spi_bus()
-            logger.info(f"Hub says to use SPI bus {spi_bus_to_use}")
-
-            if spi_bus_to_use is not None:
-                self.on_request_set_oled_spi_bus(spi_bus_to_use, notify=False)
-
-            logger.info("Taking control of miniscreen")
-            self.on_request_set_oled_pi_control(True)
-
-        # Check if any peripherals need to be set up
-        self._peripheral_manager.auto_initialise_peripherals()
-
-        logger.info("Configured for dependencies - unblocking systemd")
-        notify("READY=1")
-        self._publish_server.emit_messages = True
-        self._publish_server.publish_pitopd_ready()
-
         if self.device_id != last_identified_device_id:
             logger.info(
                 f"Host device has changed! Previous pi-top host: {str(last_identified_device_id)}"
             )
 
-        if self._peripheral_manager.start() is False:
-            logger.error("Unable to start peripheral manager")
-            return False
+    def _configure_miniscreen(self):
+        if self.device_id != DeviceID.pi_top_4:
+            return
 
-        self._idle_monitor.start()
+        logger.info("Running on a pi-top [4]. Configuring SPI bus for OLED...")
 
-        if self._request_server.start_listening() is False:
-            logger.error("Unable to start listening on request server")
-            return False
+        spi_bus_to_use = self._hub_manager.get_oled_spi_bus()
+        logger.info(f"Hub says to use SPI bus {spi_bus_to_use}")
 
-        sleep(0.5)
+        if spi_bus_to_use is not None:
+            self.on_request_set_oled_spi_bus(spi_bus_to_use, notify=False)
 
-        logger.info("Fully configured - running")
+        logger.info("Taking control of miniscreen")
+        self.on_request_set_oled_pi_control(True)
 
-        while self._run is True:
-            sleep(0.5)
+    def _start_request_server(self):
+        if self._request_server.start_listening() is False:
+            logger.error("Unable to start listening on request server")
+            return False
 
-        return True
+    def _start_peripheral_manager(self):
+        if self._peripheral_manager.start() is False:
+            logger.error("Unable to start peripheral manager")
+            return False
 
     def stop(self):
+        # This is called from signal handlers, while start() may be waiting
+        # for startup steps, so it only asks start() to stop
         logger.debug("Stopping device manager...")
         self._run = False
+        self._startup.cancel()
+        self._deferred_startup.cancel()
+        self._stopped.set()
+
+    def _shutdown(self):
+        # Startup steps that are running are waited for, so that anything
+        # they have started is stopped below
+        if self._deferred_startup_thread.is_alive():
+            self._deferred_startup.cancel()
+            self._deferred_startup_thread.join()
 
         # Stop the other classes
 
@@ -147,8 +232,11 @@ class App:
         self._idle_monitor.stop()
         self._peripheral_manager.stop()
         self._hub_manager.stop()
+        self._interface_manager.stop()
         self._publish_server.stop_listening()
 
+        state.flush()
+
     ###########################################
     # Request server callback methods
     ###########################################
@@ -0,0 +1,93 @@
+import logging
+from contextlib import contextmanager
+from threading import Lock
+from time import monotonic
+
+logger = logging.getLogger(__name__)
+
+# Records how long each phase of pi-topd's startup takes, so that a slow boot
+# can be traced to the step responsible (see pitopd.server.boot_profile_request
+# to fetch it from a running pi-topd).
+#
+# Times are taken from the monotonic clock, and phases start from when this
+# module is first imported, which is when the pitopd package is imported.
+
+
+class BootProfile:
+    """Start and end times of named startup phases.
+
+    Only the first occurrence of each phase is recorded.
+    """
+
+    def __init__(self, clock=monotonic):
+        self._clock = clock
+        self.started = clock()
+        self._phases = dict()
+        self._lock = Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = self._clock()
+        try:
+            yield
+        finally:
+            self.record(name, start)
+
+    def mark(self, name):
+        """Record a point in time, such as systemd being notified, as a phase
+        that takes no time."""
+        now = self._clock()
+        self.record(name, now, now)
+
+    def record(self, name, start=None, end=None):
+        """Record a phase, by default from when the profile started until
+        now."""
+        start = self.started if start is None else start
+        end = self._clock() if end is None else end
+        with self._lock:
+            self._phases.setdefault(name, (start, end))
+
+    def phases(self):
+        """(name, start, duration) of each phase in the order they started,
+        with the start in seconds from when the profile started."""
+        with self._lock:
+            phases = sorted(self._phases.items(), key=lambda item: item[1])
+        return [
+            (name, start - self.started, end - start) for name, (start, end) in phases
+        ]
+
+    def to_dict(self):
+        return {
+            "started": round(self.started, 3),
+            "phases": [
+                {"name": name, "start": round(start, 3), "duration": round(duration, 3)}
+                for name, start, duration in self.phases()
+            ],
+        }
+
+
+_profile = BootProfile()
+
+
+def get_profile():
+    return _profile
+
+
+def phase(name):
+    return _profile.phase(name)
+
+
+def mark(name):
+    _profile.mark(name)
+
+
+def record(name, start=None, end=None):
+    _profile.record(name, start, end)
+
+
+def log_profile():
+    """Log the whole profile as a single JSON record."""
+    # Imported here as this module is loaded by pt-poweroff and pt-reboot too
+    import json
+
+    logger.info(f"Boot profile: {json.dumps(_profile.to_dict())}")
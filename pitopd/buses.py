@@ -0,0 +1,59 @@
+import os
+
+# Hub connections and the peripheral prober open their I2C and SPI devices
+# through this module rather than directly, so that a different backend,
+# such as a simulated hub (see pitopd.simulator), can be put in place of the
+# hardware.
+
+
+class HardwareBackend:
+    def open_i2c_device(self, device_path, device_address):
+        from pitop.common.i2c_device import I2CDevice
+
+        return I2CDevice(device_path, device_address)
+
+    def open_smbus(self, bus_number):
+        from smbus2 import SMBus
+
+        return SMBus(bus_number)
+
+    def open_spi(self, bus, device):
+        from spidev import SpiDev
+
+        spi = SpiDev()
+        spi.open(bus, device)
+        return spi
+
+    def device_exists(self, device_path):
+        return os.path.exists(device_path)
+
+
+_backend = HardwareBackend()
+
+
+def set_backend(backend):
+    """Use a different backend for devices opened after this call."""
+    global _backend
+    _backend = backend
+
+
+def get_backend():
+    return _backend
+
+
+def open_i2c_device(device_path, device_address):
+    """Return an unconnected I2CDevice-compatible object for an address."""
+    return _backend.open_i2c_device(device_path, device_address)
+
+
+def open_smbus(bus_number):
+    return _backend.open_smbus(bus_number)
+
+
+def open_spi(bus, device):
+    """Return an opened SpiDev-compatible object."""
+    return _backend.open_spi(bus, device)
+
+
+def device_exists(device_path):
+    return _backend.device_exists(device_path)
@@ -0,0 +1,106 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+
+logger = logging.getLogger(__name__)
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT_HEADER_FORMAT = "iIII"
+_EVENT_HEADER_SIZE = struct.calcsize(_EVENT_HEADER_FORMAT)
+
+_libc = None
+
+
+def _get_libc():
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    return _libc
+
+
+class FileWatcher:
+    """Reports whether a file has been written, replaced or removed since
+    changed() was last called.
+
+    The file's directory is watched with inotify, so that files replaced
+    by renaming (as sed -i does) are also seen. If inotify is not
+    available, the file's stat result is compared instead.
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._directory, self._name = os.path.split(os.path.abspath(path))
+        self._inotify_fd = None
+        self._stat_signature = None
+
+        try:
+            self._inotify_fd = self._add_inotify_watch()
+        except (OSError, AttributeError) as e:
+            logger.debug(f"Unable to watch {path} with inotify - using stat: {e}")
+            self._stat_signature = self._get_stat_signature()
+
+    def changed(self):
+        if self._inotify_fd is None:
+            stat_signature = self._get_stat_signature()
+            changed = stat_signature != self._stat_signature
+            self._stat_signature = stat_signature
+            return changed
+
+        changed = False
+        while True:
+            try:
+                data = os.read(self._inotify_fd, 4096)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+
+            offset = 0
+            while offset < len(data):
+                _, mask, _, name_length = struct.unpack_from(
+                    _EVENT_HEADER_FORMAT, data, offset
+                )
+                offset += _EVENT_HEADER_SIZE
+                name = data[offset : offset + name_length].rstrip(b"\0")
+                offset += name_length
+
+                if mask & IN_Q_OVERFLOW or name == os.fsencode(self._name):
+                    changed = True
+
+        return changed
+
+    def close(self):
+        if self._inotify_fd is None:
+            return
+        os.close(self._inotify_fd)
+        self._inotify_fd = None
+
+    def _add_inotify_watch(self):
+        libc = _get_libc()
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+        if libc.inotify_add_watch(fd, os.fsencode(self._directory), _WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(errno, os.strerror(errno))
+
+        return fd
+
+    def _get_stat_signature(self):
+        try:
+            stat = os.stat(self._path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
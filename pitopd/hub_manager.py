@@ -1,8 +1,9 @@
 import logging
-from time import sleep
+from time import monotonic, sleep
 
 from pitop.common.common_ids import DeviceID
 
+from . import boot_profile
 from .pthub import pthub
 from .pthub2 import pthub2
 from .pthub3 import pthub3
@@ -23,39 +24,39 @@ class HubManager:
 
     def connect_to_hub(self):
         # Enable I2C for hub checking
-        self._callback_client.on_i2c_state_required(True)
+        with boot_profile.phase("i2c_enable"):
+            self._callback_client.on_i2c_state_required(True)
 
         # Attempt to connect to a v3 hub first, then v2, and finally v1.
         # This is because we can positively identify v2 and v3 on i2c.
         # We can also positively identify a v1 pi-top, however we cannot
         # do this for a pi-topCEED. Hence this is the fall-through case.
 
-        logger.info("Attempting to find pi-topHUB v3...")
-        if pthub3.initialise() is True:
-            self._active_hub_module = pthub3
-            logger.info("Connected to pi-topHUB v3")
-            self._register_client()
-            return True
-        else:
-            logger.warning("Could not initialise v3 hub")
+        for hub_name, hub_module in (("v3", pthub3), ("v2", pthub2)):
+            logger.info(f"Attempting to find pi-topHUB {hub_name}...")
+            with boot_profile.phase(f"hub_probe_{hub_name}"):
+                i2c_hub_found = hub_module.initialise() is True
 
-        logger.info("Attempting to find pi-topHUB v2...")
-        if pthub2.initialise() is True:
-            self._active_hub_module = pthub2
-            logger.info("Connected to pi-topHUB v2")
-            self._register_client()
-            return True
-        else:
-            logger.warning("Could not initialise v2 hub")
+            if i2c_hub_found:
+                self._active_hub_module = hub_module
+                logger.info(f"Connected to pi-topHUB {hub_name}")
+                self._register_client()
+                return True
+            else:
+                logger.warning(f"Could not initialise {hub_name} hub")
 
         logger.info("Attempting to find pi-topHUB v1...")
 
         spi_was_enabled = self._callback_client.on_spi0_state_requested()
         # Enable SPI for hub checking
         if not spi_was_enabled:
-            self._callback_client.on_spi0_state_required(True)
+            with boot_profile.phase("spi_enable"):
+                self._callback_client.on_spi0_state_required(True)
+
+        with boot_profile.phase("hub_probe_v1"):
+            v1_hub_found = pthub.initialise() is True
 
-        if pthub.initialise() is True:
+        if v1_hub_found:
             self._active_hub_module = pthub
             logger.info("Connected to pi-topHUB v1")
             self._register_client()
@@ -89,28 +90,28 @@ class HubManager:
             logger.info("Stopping hub module...")
             self._active_hub_module.stop()
 
-    def wait_for_device_identification(self):
+    def wait_for_device_identification(self, timeout=5, poll_interval=0.02):
         logger.debug("Waiting for device id to be established...")
 
-        time_waited = 0
-        while time_waited < 5:
+        with boot_profile.phase("device_identification"):
+            self._wait_for_device_id(timeout, poll_interval)
 
+    def _wait_for_device_id(self, timeout, poll_interval):
+        started = monotonic()
+        while True:
             device_id = self.get_device_id()
-            if device_id == DeviceID.unknown:
-
-                sleep(0.25)
-                time_waited += 0.25
+            time_waited = monotonic() - started
 
-            else:
+            if device_id != DeviceID.unknown:
                 logger.debug(
-                    "Got device id ("
-                    + str(device_id)
-                    + "). Waited "
-                    + str(time_waited)
-                    + " seconds"
+                    f"Got device id ({device_id}). Waited {time_waited:.2f} seconds"
                 )
                 return
 
+            if time_waited >= timeout:
+                break
+            sleep(poll_interval)
+
         logger.warning("Timed out waiting for device identification.")
 
     def get_device_id(self):
@@ -0,0 +1,105 @@
+import logging
+from threading import Lock
+
+from pitop.common.common_ids import Peripheral, PeripheralID
+
+from . import buses
+from .sys_config import I2C
+
+logger = logging.getLogger(__name__)
+
+PERIPHERAL_ADDRESSES = tuple(
+    sorted(
+        Peripheral(id=peripheral_id).addr
+        for peripheral_id in PeripheralID
+        if peripheral_id != PeripheralID.unknown
+    )
+)
+
+
+def addresses_in_bitset(bitset):
+    addresses = list()
+    address = 0
+    while bitset >> address:
+        if bitset & (1 << address):
+            addresses.append(address)
+        address += 1
+    return addresses
+
+
+class I2CProber:
+    """Checks which of a known set of I2C addresses respond, returning the
+    result as a bitset with bit N set if address N acknowledged.
+
+    Addresses are probed the same way as i2cdetect's default mode: a
+    read byte for ranges where a quick write could corrupt an EEPROM,
+    and a quick write everywhere else.
+    """
+
+    READ_PROBE_RANGES = (range(0x30, 0x38), range(0x50, 0x60))
+
+    def __init__(self, bus_number=1, addresses=PERIPHERAL_ADDRESSES):
+        self._bus_number = bus_number
+        self._device_path = f"/dev/i2c-{bus_number}"
+        self._addresses = addresses
+        self._bus = None
+        self._bus_available = False
+        # A prober can be shared by threads
+        self._lock = Lock()
+
+    def probe(self):
+        with self._lock:
+            if not self._ensure_bus_available():
+                return 0
+
+            try:
+                if self._bus is None:
+                    self._bus = buses.open_smbus(self._bus_number)
+
+                detected = 0
+                for address in self._addresses:
+                    if self._probe_address(address):
+                        detected |= 1 << address
+                return detected
+
+            except OSError as e:
+                logger.error(f"Unable to probe I2C bus {self._bus_number}: {e}")
+                self._close_bus()
+                return 0
+
+    def close(self):
+        with self._lock:
+            self._close_bus()
+
+    def _close_bus(self):
+        if self._bus is None:
+            return
+        self._bus.close()
+        self._bus = None
+
+    def _ensure_bus_available(self):
+        # Once the device node has been seen, I2C is known to be enabled and
+        # there is no need to run raspi-config to check again
+        if self._bus_available:
+            return True
+
+        if not buses.device_exists(self._device_path):
+            logger.warning("I2C is not initialised - attempting to initialise")
+            I2C.set_state(True)
+
+        self._bus_available = buses.device_exists(self._device_path)
+        if not self._bus_available:
+            logger.error(
+                "Unable to initialise I2C - unable to get connected device addresses"
+            )
+        return self._bus_available
+
+    def _probe_address(self, address):
+        try:
+            if any(address in probe_range for probe_range in self.READ_PROBE_RANGES):
+                self._bus.read_byte(address)
+            else:
+                self._bus.write_quick(address)
+        except OSError:
+            return False
+        return True
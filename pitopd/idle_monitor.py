@@ -1,10 +1,11 @@
 import logging
-from os import devnull
-from subprocess import CalledProcessError, check_output
+from os import getenv
 from threading import Thread
-from time import sleep
+from time import monotonic, sleep
 
 from . import state
+from .idle_time import IdleTime, IdleTimeError
+from .input_activity import InputActivityMonitor
 
 logger = logging.getLogger(__name__)
 
@@ -12,13 +13,17 @@ logger = logging.getLogger(__name__)
 class IdleMonitor:
     DEFAULT_CYCLE_SLEEP_TIME = 5
     SENSITIVE_CYCLE_SLEEP_TIME = 0.2
+    INPUT_DEVICE_RESCAN_TIME = 10
 
-    def __init__(self):
+    def __init__(self, idle_time=None):
         self._callback_client = None
         self.previous_idletime = 0
         self._main_thread = None
         self._run_main_thread = False
         self._cycle_sleep_time = self.DEFAULT_CYCLE_SLEEP_TIME
+        self._idle_time = IdleTime() if idle_time is None else idle_time
+        self._source = getenv("PT_IDLE_MONITOR_SOURCE", "x11")
+        self._input_activity = None
 
     def initialise(self, callback_client):
         self._callback_client = callback_client
@@ -34,8 +39,13 @@ class IdleMonitor:
     def stop(self):
         logger.debug("Stopping idle time monitor...")
         self._run_main_thread = False
+        if self._input_activity is not None:
+            self._input_activity.wakeup()
         if self._main_thread is not None:
             self._main_thread.join()
+        self._idle_time.close()
+        if self._input_activity is not None:
+            self._input_activity.close()
         logger.debug("Stopped idle time monitor.")
 
     def get_configured_timeout(self):
@@ -43,6 +53,8 @@ class IdleMonitor:
 
     def set_configured_timeout(self, timeout: int):
         state.set("display", "timeout", str(timeout))
+        if self._input_activity is not None:
+            self._input_activity.wakeup()
 
     # Internal methods
     def _emit_idletime_threshold_exceeded(self):
@@ -66,29 +78,56 @@ class IdleMonitor:
             startup_wait_counter += 1
             sleep(1)
 
-        logger.info("Starting main idletime check thread...")
+        if self._source == "input":
+            logger.info("Starting input activity idletime check thread...")
+            self._input_activity_loop()
+        else:
+            logger.info("Starting main idletime check thread...")
+            self._x11_idle_loop()
+
+    def _input_activity_loop(self):
+        try:
+            self._input_activity = InputActivityMonitor()
+        except Exception as e:
+            logger.warning(f"Unable to monitor input devices: {e}")
+            return
+
+        timeout_expired = False
         while self._run_main_thread:
-            FNULL = open(devnull, "w")
-
-            try:
-                xprintidle_resp = check_output(["xprintidle"], stderr=FNULL)
-            except FileNotFoundError:
-                logger.warning("xprintidle not found")
-                break
-
-            except CalledProcessError:
-                logger.warning(
-                    "Unable to call xprintidle - have non-network local"
-                    "connections been added to X server access control list?"
-                )
-                break
-
-            xprintidle_resp_str = xprintidle_resp.decode("utf-8")
+            if timeout_expired:
+                # Block until there is input, rescanning occasionally for
+                # newly connected devices
+                if self._input_activity.wait_for_activity(
+                    self.INPUT_DEVICE_RESCAN_TIME
+                ):
+                    self._emit_exceeded_idletime_reset()
+                    timeout_expired = False
+                else:
+                    self._input_activity.refresh_devices()
+                continue
 
+            idle_timeout_s = self.get_configured_timeout()
+            if idle_timeout_s <= 0:
+                self._input_activity.wait()
+                continue
+
+            self._input_activity.refresh_devices()
+            idletime_s = monotonic() - self._input_activity.last_activity()
+            logger.debug(f"S since idle: \t{idletime_s:.1f}")
+
+            if idletime_s >= idle_timeout_s:
+                self._emit_idletime_threshold_exceeded()
+                timeout_expired = True
+            else:
+                # Nothing needs doing until the timeout could next expire
+                self._input_activity.wait(idle_timeout_s - idletime_s)
+
+    def _x11_idle_loop(self):
+        while self._run_main_thread:
             try:
-                idletime_ms = int(xprintidle_resp_str)
-            except ValueError:
-                logger.warning("Unable to convert xprintidle response to integer")
+                idletime_ms = self._idle_time.get_idle_time_ms()
+            except IdleTimeError as e:
+                logger.warning(str(e))
                 break
 
             idle_timeout_s = self.get_configured_timeout()
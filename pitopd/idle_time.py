@@ -0,0 +1,192 @@
+import logging
+import socket
+import struct
+from os import getenv
+from subprocess import DEVNULL, CalledProcessError, check_output
+
+logger = logging.getLogger(__name__)
+
+
+class IdleTimeError(Exception):
+    pass
+
+
+class X11IdleTime:
+    """Queries the X server's idle time using the MIT-SCREEN-SAVER extension,
+    over a connection that is kept open between queries.
+
+    Only local displays are supported, and the connection is made
+    without authentication data, relying on the server accepting the
+    local root user (see pt-xhost-local-root.conf).
+    """
+
+    X11_UNIX_SOCKET_PATH = "/tmp/.X11-unix/X{}"
+    QUERY_EXTENSION_OPCODE = 98
+    SCREEN_SAVER_QUERY_INFO = 1
+    EXTENSION_NAME = b"MIT-SCREEN-SAVER"
+
+    def __init__(self, display=None):
+        self._display = getenv("DISPLAY", ":0") if display is None else display
+        self._socket = None
+        self._root_window = None
+        self._extension_opcode = None
+
+    def get_idle_time_ms(self):
+        if self._socket is None:
+            self._connect()
+
+        try:
+            self._send(
+                struct.pack(
+                    "<BBHI",
+                    self._extension_opcode,
+                    self.SCREEN_SAVER_QUERY_INFO,
+                    2,
+                    self._root_window,
+                )
+            )
+            reply = self._read_reply()
+        except (OSError, IdleTimeError):
+            self.close()
+            raise
+
+        return struct.unpack_from("<I", reply, 16)[0]
+
+    def close(self):
+        if self._socket is None:
+            return
+        self._socket.close()
+        self._socket = None
+
+    def _socket_path(self):
+        host, _, display = self._display.rpartition(":")
+        if host not in ("", "unix"):
+            raise IdleTimeError(f"Display '{self._display}' is not local")
+        try:
+            display_number = int(display.split(".")[0])
+        except ValueError:
+            raise IdleTimeError(f"Invalid display '{self._display}'")
+        return self.X11_UNIX_SOCKET_PATH.format(display_number)
+
+    def _connect(self):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._socket.connect(self._socket_path())
+            self._setup_connection()
+            self._query_extension()
+        except Exception:
+            self.close()
+            raise
+        logger.debug(f"Connected to X server on display {self._display}")
+
+    def _setup_connection(self):
+        # Little-endian, protocol 11.0, no authorisation
+        self._send(struct.pack("<BxHHHHxx", ord("l"), 11, 0, 0, 0))
+
+        status, reason_length, _, _, additional_length = struct.unpack(
+            "<BBHHH", self._recv(8)
+        )
+        setup = self._recv(additional_length * 4)
+        if status != 1:
+            reason = setup[:reason_length].decode(errors="replace")
+            raise IdleTimeError(f"X server refused connection: {reason}")
+
+        vendor_length = struct.unpack_from("<H", setup, 16)[0]
+        number_of_formats = setup[21]
+        screens_offset = 32 + _pad(vendor_length) + 8 * number_of_formats
+        self._root_window = struct.unpack_from("<I", setup, screens_offset)[0]
+
+    def _query_extension(self):
+        name = self.EXTENSION_NAME
+        self._send(
+            struct.pack(
+                "<BxHHxx",
+                self.QUERY_EXTENSION_OPCODE,
+                2 + _pad(len(name)) // 4,
+                len(name),
+            )
+            + name.ljust(_pad(len(name)), b"\0")
+        )
+        reply = self._read_reply()
+        present, major_opcode = reply[8], reply[9]
+        if not present:
+            raise IdleTimeError("X server does not support MIT-SCREEN-SAVER")
+        self._extension_opcode = major_opcode
+
+    def _read_reply(self):
+        while True:
+            packet = self._recv(32)
+            if packet[0] == 0:
+                raise IdleTimeError(f"X server returned error code {packet[1]}")
+            if packet[0] == 1:
+                extra_length = struct.unpack_from("<I", packet, 4)[0] * 4
+                if extra_length > 0:
+                    packet += self._recv(extra_length)
+                return packet
+            # Anything else is an event, which is of no interest here
+
+    def _send(self, data):
+        self._socket.sendall(data)
+
+    def _recv(self, length):
+        data = b""
+        while len(data) < length:
+            chunk = self._socket.recv(length - len(data))
+            if not chunk:
+                raise IdleTimeError("X server closed the connection")
+            data += chunk
+        return data
+
+
+class XprintidleIdleTime:
+    def get_idle_time_ms(self):
+        try:
+            response = check_output(["xprintidle"], stderr=DEVNULL)
+        except FileNotFoundError:
+            raise IdleTimeError("xprintidle not found")
+        except CalledProcessError:
+            raise IdleTimeError(
+                "Unable to call xprintidle - have non-network local "
+                "connections been added to X server access control list?"
+            )
+
+        try:
+            return int(response.decode("utf-8"))
+        except ValueError:
+            raise IdleTimeError("Unable to convert xprintidle response to integer")
+
+    def close(self):
+        pass
+
+
+class IdleTime:
+    """Idle time from the X server, falling back to running xprintidle if the
+    server cannot be queried directly."""
+
+    def __init__(self, display=None):
+        self._x11 = X11IdleTime(display)
+        self._xprintidle = XprintidleIdleTime()
+        self._using_fallback = False
+
+    def get_idle_time_ms(self):
+        try:
+            idle_time_ms = self._x11.get_idle_time_ms()
+        except (OSError, IdleTimeError) as e:
+            if not self._using_fallback:
+                logger.info(
+                    f"Unable to query X server directly ({e}) - using xprintidle"
+                )
+                self._using_fallback = True
+            return self._xprintidle.get_idle_time_ms()
+
+        if self._using_fallback:
+            logger.info("Querying X server directly for idle time")
+            self._using_fallback = False
+        return idle_time_ms
+
+    def close(self):
+        self._x11.close()
+
+
+def _pad(length):
+    return (length + 3) & ~3
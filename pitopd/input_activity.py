@@ -0,0 +1,173 @@
+import errno
+import fcntl
+import logging
+import os
+import select
+import struct
+from glob import glob
+from time import CLOCK_MONOTONIC, monotonic
+
+logger = logging.getLogger(__name__)
+
+# struct input_event: struct timeval, __u16 type, __u16 code, __s32 value
+INPUT_EVENT_FORMAT = "llHHi"
+INPUT_EVENT_SIZE = struct.calcsize(INPUT_EVENT_FORMAT)
+
+# _IOW('E', 0xa0, int)
+EVIOCSCLOCKID = 0x400445A0
+
+EV_KEY = 0x01
+EV_REL = 0x02
+EV_ABS = 0x03
+ACTIVITY_EVENT_TYPES = (EV_KEY, EV_REL, EV_ABS)
+
+
+def is_activity_device(event_device_path):
+    """Whether an evdev device reports key presses, pointer motion or touches,
+    based on its event type capabilities in sysfs."""
+    name = os.path.basename(event_device_path)
+    try:
+        with open(f"/sys/class/input/{name}/device/capabilities/ev") as f:
+            capabilities = int(f.read().strip(), 16)
+    except (OSError, ValueError):
+        return False
+    return any(capabilities & (1 << event_type) for event_type in ACTIVITY_EVENT_TYPES)
+
+
+class InputActivityMonitor:
+    """Tracks the time of the most recent user input on /dev/input event
+    devices.
+
+    Events are only read when asked for, so nothing wakes up while the
+    user is active. Event timestamps use CLOCK_MONOTONIC, so
+    last_activity() is accurate however long the events were left
+    queued.
+    """
+
+    EVENT_DEVICE_GLOB = "/dev/input/event*"
+
+    def __init__(self, device_filter=is_activity_device):
+        self._device_filter = device_filter
+        self._devices = dict()
+        self._realtime_devices = set()
+        self._last_activity = monotonic()
+
+        self._epoll = select.epoll()
+        self._wakeup_epoll = select.epoll()
+        self._wakeup_read_fd, self._wakeup_write_fd = os.pipe()
+        os.set_blocking(self._wakeup_read_fd, False)
+        self._epoll.register(self._wakeup_read_fd, select.EPOLLIN)
+        self._wakeup_epoll.register(self._wakeup_read_fd, select.EPOLLIN)
+
+        self.refresh_devices()
+
+    def refresh_devices(self):
+        paths = set(glob(self.EVENT_DEVICE_GLOB))
+
+        for fd, path in list(self._devices.items()):
+            if path not in paths:
+                self._remove_device(fd)
+
+        open_paths = set(self._devices.values())
+        for path in sorted(paths - open_paths):
+            if self._device_filter(path):
+                self._add_device(path)
+
+    def last_activity(self):
+        """Read any queued input events and return the monotonic time of the
+        latest one."""
+        for fd in list(self._devices):
+            self._read_device(fd)
+        return self._last_activity
+
+    def wait_for_activity(self, timeout=None):
+        """Block until there is user input (returning True), or the timeout
+        expires or wakeup() is called (returning False)."""
+        timeout = -1 if timeout is None else timeout
+        for fd, _ in self._epoll.poll(timeout):
+            if fd == self._wakeup_read_fd:
+                self._clear_wakeup()
+                return False
+
+        previous_activity = self._last_activity
+        return self.last_activity() != previous_activity
+
+    def wait(self, timeout=None):
+        """Block without reading input until the timeout expires or wakeup() is
+        called."""
+        timeout = -1 if timeout is None else timeout
+        if self._wakeup_epoll.poll(timeout):
+            self._clear_wakeup()
+
+    def wakeup(self):
+        os.write(self._wakeup_write_fd, b"\0")
+
+    def close(self):
+        for fd in list(self._devices):
+            self._remove_device(fd)
+        self._epoll.close()
+        self._wakeup_epoll.close()
+        os.close(self._wakeup_read_fd)
+        os.close(self._wakeup_write_fd)
+
+    def _add_device(self, path):
+        try:
+            fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+        except OSError as e:
+            logger.debug(f"Unable to open input device {path}: {e}")
+            return
+
+        try:
+            fcntl.ioctl(fd, EVIOCSCLOCKID, struct.pack("i", CLOCK_MONOTONIC))
+        except OSError as e:
+            logger.debug(f"Unable to use monotonic timestamps for {path}: {e}")
+            self._realtime_devices.add(fd)
+
+        self._epoll.register(fd, select.EPOLLIN)
+        self._devices[fd] = path
+        logger.debug(f"Monitoring input device {path} for activity")
+
+    def _remove_device(self, fd):
+        path = self._devices.pop(fd)
+        self._realtime_devices.discard(fd)
+        try:
+            self._epoll.unregister(fd)
+        except OSError:
+            pass
+        os.close(fd)
+        logger.debug(f"Stopped monitoring input device {path}")
+
+    def _read_device(self, fd):
+        while True:
+            try:
+                data = os.read(fd, INPUT_EVENT_SIZE * 64)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                if e.errno == errno.ENODEV:
+                    self._remove_device(fd)
+                    return
+                raise
+
+            if not data:
+                return
+
+            now = monotonic()
+            for offset in range(0, len(data) - INPUT_EVENT_SIZE + 1, INPUT_EVENT_SIZE):
+                sec, usec, event_type, _, _ = struct.unpack_from(
+                    INPUT_EVENT_FORMAT, data, offset
+                )
+                if event_type not in ACTIVITY_EVENT_TYPES:
+                    continue
+                if fd in self._realtime_devices:
+                    timestamp = now
+                else:
+                    timestamp = min(sec + usec / 1e6, now)
+                self._last_activity = max(self._last_activity, timestamp)
+
+    def _clear_wakeup(self):
+        try:
+            while os.read(self._wakeup_read_fd, 64):
+                pass
+        except BlockingIOError:
+            pass
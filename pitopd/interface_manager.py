@@ -1,19 +1,75 @@
 import logging
+import re
 from os import path
+from threading import Lock
 
 from pitop.common.command_runner import run_command
 
+from .file_watch import FileWatcher
+from .sys_config import BOOT_PARTITION_MOUNTPOINT
+
 logger = logging.getLogger(__name__)
 _TIMEOUT = 10
 
+# The same checks that 'raspi-config nonint get_i2c' and 'get_spi' make. They
+# grep the file one line at a time, so no part of a pattern may match a newline
+_I2C_CONFIG_PATTERN = re.compile(
+    r"^(device_tree_param|dtparam)=([^,\n]*,)*i2c(_arm)?(=(on|true|yes|1))?(,[^\n]*)?$",
+    re.MULTILINE,
+)
+_SPI_CONFIG_PATTERN = re.compile(
+    r"^(device_tree_param|dtparam)=([^,\n]*,)*spi(=(on|true|yes|1))?(,[^\n]*)?$",
+    re.MULTILINE,
+)
+
 
 class InterfaceManager:
+    BOOT_CONFIG_FILE = f"{BOOT_PARTITION_MOUNTPOINT}/config.txt"
+
+    def __init__(self):
+        self._boot_config_state = None
+        self._boot_config_watcher = None
+        self._lock = Lock()
+
+    def _get_boot_config_state(self):
+        with self._lock:
+            if self._boot_config_watcher is None:
+                self._boot_config_watcher = FileWatcher(self.BOOT_CONFIG_FILE)
+            elif self._boot_config_watcher.changed():
+                logger.debug(f"{self.BOOT_CONFIG_FILE} changed")
+                self._boot_config_state = None
+
+            if self._boot_config_state is None:
+                try:
+                    with open(self.BOOT_CONFIG_FILE) as f:
+                        config = f.read()
+                except OSError as e:
+                    logger.warning(f"Unable to read {self.BOOT_CONFIG_FILE}: {e}")
+                    config = ""
+
+                self._boot_config_state = {
+                    "i2c": _I2C_CONFIG_PATTERN.search(config) is not None,
+                    "spi0": _SPI_CONFIG_PATTERN.search(config) is not None,
+                }
+
+            return self._boot_config_state
+
+    def stop(self):
+        logger.debug("Stopping interface manager...")
+        with self._lock:
+            if self._boot_config_watcher is not None:
+                self._boot_config_watcher.close()
+                self._boot_config_watcher = None
+            self._boot_config_state = None
+
+    def _invalidate(self):
+        with self._lock:
+            self._boot_config_state = None
+
     @property
     def i2c(self):
         logger.debug("Getting I2C state...")
-        enabled = (
-            run_command("raspi-config nonint get_i2c", timeout=_TIMEOUT).strip() == "0"
-        )
+        enabled = self._get_boot_config_state()["i2c"]
         logger.debug(f"I2C state: {'enabled' if enabled else 'disabled'}")
         return enabled
 
@@ -25,19 +81,19 @@ class InterfaceManager:
             else:
                 logger.info("Enabling I2C...")
                 run_command("raspi-config nonint do_i2c 0", timeout=_TIMEOUT)
+                self._invalidate()
         else:
             if self.i2c:
                 logger.info("Disabling I2C...")
                 run_command("raspi-config nonint do_i2c 1", timeout=_TIMEOUT)
+                self._invalidate()
             else:
                 logger.warning("I2C is already disabled")
 
     @property
     def spi0(self):
         logger.debug("Getting SPI0 state...")
-        enabled = (
-            run_command("raspi-config nonint get_spi", timeout=_TIMEOUT).strip() == "0"
-        )
+        enabled = self._get_boot_config_state()["spi0"]
         logger.debug(f"SPI0 state: {'enabled' if enabled else 'disabled'}")
         return enabled
 
@@ -49,10 +105,12 @@ class InterfaceManager:
             else:
                 logger.info("Enabling SPI0...")
                 run_command("raspi-config nonint do_spi 0", timeout=_TIMEOUT)
+                self._invalidate()
         else:
             if self.spi0:
                 logger.info("Disabling SPI0...")
                 run_command("raspi-config nonint do_spi 1", timeout=_TIMEOUT)
+                self._invalidate()
             else:
                 logger.warning("SPI0 is already disabled")
 
@@ -1,20 +1,60 @@
 import logging
 from subprocess import call
 from threading import Thread
-from time import sleep
+from time import monotonic, sleep
 
 from pitop.common.common_ids import DeviceID, Peripheral, PeripheralID
 from pitop.common.current_session_info import get_user_using_first_display
 
-from . import state
+from . import boot_profile, state
+from .i2c_prober import I2CProber, addresses_in_bitset
 from .ptpulse import ptpulse
 from .ptspeaker import ptspeaker
-from .sys_config import I2C, I2S, Hifiberry, System
+from .sys_config import I2S, Hifiberry, System
 from .utils import get_project_root
 
 logger = logging.getLogger(__name__)
 
 
+class _EnableBackoff:
+    """Spaces out repeated attempts to enable a peripheral at one address,
+    whether they fail or the peripheral keeps being disconnected.
+
+    The delay after each attempt doubles, up to a maximum. The count only
+    starts again once an enabled peripheral has stayed connected for
+    ``stable_after`` seconds.
+    """
+
+    def __init__(self, base_delay=3, max_delay=300, stable_after=600):
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._stable_after = stable_after
+        self._attempts = 0
+        self._enabled_time = None
+        self.next_attempt_time = 0
+
+    def ready(self, now):
+        return now >= self.next_attempt_time
+
+    def record_attempt(self, now):
+        delay = min(self._base_delay * 2**self._attempts, self._max_delay)
+        self._attempts += 1
+        self.next_attempt_time = now + delay
+        return delay
+
+    def record_enabled(self, now):
+        self._enabled_time = now
+
+    def record_removed(self, now):
+        if (
+            self._enabled_time is not None
+            and now - self._enabled_time >= self._stable_after
+        ):
+            self._attempts = 0
+            self.next_attempt_time = 0
+        self._enabled_time = None
+
+
 class PeripheralManager:
     """Discovers which peripheral libraries are installed, and uses those to
     detect, initialise, and communicate with the corresponding peripheral."""
@@ -30,12 +70,16 @@ class PeripheralManager:
 
         self._enabled_peripherals = list()
         self._host_device_id = DeviceID.unknown
+        self._i2c_prober = I2CProber()
+        # Bitset of the peripheral addresses seen in the last scan
+        self._detected_addresses = 0
+        # Addresses seen but not enabled, to be retried after their backoff
+        self._pending_addresses = set()
+        self._enable_backoffs = dict()
 
     def initialise(self, callback_client):
         self._callback_client = callback_client
 
-        self.configure_hifiberry()
-
     def initialise_device_id(self, device_id):
         self._host_device_id = device_id
 
@@ -71,6 +115,10 @@ class PeripheralManager:
             return False
 
         self._run_main_thread = True
+        # The first scan is made before returning, so that its time is part
+        # of the boot profile
+        with boot_profile.phase("peripheral_scan"):
+            self.auto_initialise_peripherals()
         self._main_thread.start()
         return True
 
@@ -79,14 +127,16 @@ class PeripheralManager:
         self._run_main_thread = False
         if self._main_thread.is_alive():
             self._main_thread.join()
+        self._i2c_prober.close()
 
     def is_initialised(self):
         return self._callback_client is not None
 
     def _main_thread_loop(self):
         while self._run_main_thread:
-            self.auto_initialise_peripherals()
             sleep(self._loop_delay_seconds)
+            if self._run_main_thread:
+                self.auto_initialise_peripherals()
 
     def add_enabled_peripheral(self, peripheral):
         logger.info("Adding enabled peripheral: " + peripheral.name)
@@ -249,27 +299,18 @@ class PeripheralManager:
         else:
             logger.debug("Peripheral state was already set")
 
-    @staticmethod
-    def get_connected_peripherals():
-        addresses = I2C.get_connected_device_addresses()
-
+    def get_connected_peripherals(self):
         detected_peripherals = list()
 
-        for address in addresses:
-            try:
-                address = int(address, 16)
-            except ValueError:
-                logger.debug(f"Can't convert address {address} to integer, skipping.")
-                continue
+        for address in addresses_in_bitset(self._i2c_prober.probe()):
             current_peripheral = Peripheral(addr=address)
             if current_peripheral.id != PeripheralID.unknown:
                 detected_peripherals.append(current_peripheral)
 
         return detected_peripherals
 
-    @staticmethod
-    def get_connected_peripheral_names():
-        detected_peripherals = PeripheralManager.get_connected_peripherals()
+    def get_connected_peripheral_names(self):
+        detected_peripherals = self.get_connected_peripherals()
 
         detected_peripheral_names = list()
 
@@ -326,27 +367,49 @@ class PeripheralManager:
             logger.debug("Peripheral " + current_peripheral_name + " already enabled")
 
     def auto_initialise_peripherals(self):
-        addresses = I2C.get_connected_device_addresses()
+        detected_addresses = self._i2c_prober.probe()
+        changed_addresses = detected_addresses ^ self._detected_addresses
+        self._detected_addresses = detected_addresses
 
-        for peripheral in self._enabled_peripherals:
-            if format(peripheral.addr, "x") not in addresses:
-                logger.debug(
-                    "Peripheral " + peripheral.name + " was enabled but not detected."
+        if changed_addresses == 0 and len(self._pending_addresses) == 0:
+            return
+
+        for address in addresses_in_bitset(changed_addresses & ~detected_addresses):
+            self._on_address_removed(address)
+
+        for address in addresses_in_bitset(changed_addresses & detected_addresses):
+            if Peripheral(addr=address).id != PeripheralID.unknown:
+                self._pending_addresses.add(address)
+
+        now = monotonic()
+        for address in sorted(self._pending_addresses):
+            backoff = self._enable_backoffs.setdefault(address, _EnableBackoff())
+            if not backoff.ready(now):
+                continue
+
+            peripheral = Peripheral(addr=address)
+            self.attempt_enable_peripheral_by_name(peripheral.name)
+            delay = backoff.record_attempt(now)
+
+            if self.get_peripheral_enabled(peripheral):
+                self._pending_addresses.discard(address)
+                backoff.record_enabled(now)
+            else:
+                logger.info(
+                    f"Peripheral {peripheral.name} was not enabled - retrying in {delay}s"
                 )
-                self.remove_enabled_peripheral(peripheral)
-                self.attempt_disable_peripheral_by_name(peripheral.name)
 
-        for address in addresses:
-            try:
-                address = int(address, 16)
-            except ValueError:
+    def _on_address_removed(self, address):
+        self._pending_addresses.discard(address)
+        if address in self._enable_backoffs:
+            self._enable_backoffs[address].record_removed(monotonic())
+
+        for peripheral in list(self._enabled_peripherals):
+            if peripheral.addr == address:
                 logger.debug(
-                    f"Can't convert address {address} to integer, skipping initialisation."
+                    "Peripheral " + peripheral.name + " was enabled but not detected."
                 )
-                continue
-            current_peripheral = Peripheral(addr=address)
-            if current_peripheral.id != PeripheralID.unknown:
-                self.attempt_enable_peripheral_by_name(current_peripheral.name)
+                self.remove_enabled_peripheral(peripheral)
 
     def configure_hifiberry(self):
         logger.info("Configuring HiFiBerry audio output")
@@ -21,9 +21,14 @@ def write_to_file(pipe_path, text):
 
 
 class PipeManager:
-    def __init__(self):
+    def __init__(self, directory=None):
+        # The files are created in /run, unless another directory is given
+        self._paths = dict()
         for pipe in Pipes:
             path = Path(pipe.value)
+            if directory is not None:
+                path = Path(directory) / path.name
+            self._paths[pipe] = path
 
             if not path.exists():
                 Path(path.parent).mkdir(parents=True, exist_ok=True)
@@ -32,24 +37,24 @@ class PipeManager:
     # TODO: loop over writing to FIFO, ready for clients to read
     def set_device_id(self, device_id):
         try:
-            write_to_file(Pipes.device_type.value, device_id.name)
+            write_to_file(self._paths[Pipes.device_type], device_id.name)
         except IOError:
             logger.warning("Failed to write to device type file")
 
     def set_hub_serial_number(self, serial):
         try:
-            write_to_file(Pipes.hub_serial.value, serial)
+            write_to_file(self._paths[Pipes.hub_serial], serial)
         except IOError:
             logger.warning("Failed to write to device type file")
 
     def set_battery_serial_number(self, serial):
         try:
-            write_to_file(Pipes.battery_serial.value, serial)
+            write_to_file(self._paths[Pipes.battery_serial], serial)
         except IOError:
             logger.warning("Failed to write to device type file")
 
     def set_display_serial_number(self, serial):
         try:
-            write_to_file(Pipes.display_serial.value, serial)
+            write_to_file(self._paths[Pipes.display_serial], serial)
         except IOError:
             logger.warning("Failed to write to device type file")
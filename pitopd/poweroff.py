@@ -1,16 +1,33 @@
-from os.path import isfile
-from platform import uname
-from re import match
-from time import sleep
+from configparser import ConfigParser
+from os.path import exists, isfile
+from time import monotonic, sleep
 
-from pitop.common.common_ids import DeviceID
-from pitop.common.i2c_device import I2CDevice
-from spidev import SpiDev
+# pt-poweroff and pt-reboot run while the system is shutting down, so they
+# only import the modules that the device they are running on needs.
 
-from . import state
+# Written by pi-topd once it has identified the device (see pitopd.state)
+STATE_FILE_PATH = "/var/lib/pi-topd/state.cfg"
+
+# pi-topd's RuntimeDirectory, which systemd removes once pi-topd has stopped
+PITOPD_RUNTIME_DIRECTORY = "/run/pi-topd"
+PITOPD_STOP_TIMEOUT = 5
+
+
+def _wait_for_pitopd_to_stop():
+    deadline = monotonic() + PITOPD_STOP_TIMEOUT
+    while exists(PITOPD_RUNTIME_DIRECTORY):
+        if monotonic() >= deadline:
+            print("Timed out waiting for pi-topd to stop")
+            return
+        sleep(0.05)
 
 
 def _do_poweroff_legacy():
+    from platform import uname
+    from re import match
+
+    from spidev import SpiDev
+
     MASK_SHUTDOWN = 0x01  # 00000001
     MASK_SCREEN_OFF = 0x02  # 00000010
     MASK_LID_CLOSED = 0x04  # 00000100
@@ -80,7 +97,8 @@ def _do_poweroff_legacy():
         return resp[0]
 
     print("pi-top poweroff-legacy (for v1 hubs - Original pi-top/pi-topCEED")
-    sleep(5)  # Let other things finish first
+    # pi-topd also talks to the hub over SPI, so let it finish first
+    _wait_for_pitopd_to_stop()
 
     spi = setup_spi_obj()
 
@@ -103,8 +121,10 @@ def _do_poweroff_legacy():
     send_data(spi, calculate())
 
 
-def _do_poweroff(device_id):
-    i2c_address = 0x11 if device_id == DeviceID.pi_top_4 else 0x10
+def _do_poweroff(device_type):
+    from pitop.common.i2c_device import I2CDevice
+
+    i2c_address = 0x11 if device_type == "pi_top_4" else 0x10
 
     PWR__SHUTDOWN_CTRL = 0xA0
     PWR__SHUTDOWN_CTRL__MODE1 = 0x08
@@ -133,6 +153,8 @@ def _do_poweroff(device_id):
 
 
 def _do_reboot():
+    from pitop.common.i2c_device import I2CDevice
+
     i2c_address = 0x11
     PWR__SHUTDOWN_CTRL = 0xA0
     PWR__SHUTDOWN_CTRL__MODE5 = 0x28
@@ -150,14 +172,20 @@ def _do_reboot():
     hub.write_byte(PWR__SHUTDOWN_CTRL, shutdown_control)
 
 
-def get_device_id():
-    id_str = state.get("device", "type", fallback=str(DeviceID.unknown.name))
-    return DeviceID[id_str]
+def get_device_type():
+    """The name of the DeviceID that pi-topd last identified.
+
+    The state file is read directly, rather than through pitopd.state,
+    which would create the file if it did not exist.
+    """
+    config_parser = ConfigParser()
+    config_parser.read(STATE_FILE_PATH)
+    return config_parser.get("device", "type", fallback="unknown")
 
 
 def reboot():
     try:
-        if get_device_id() == DeviceID.pi_top_4:
+        if get_device_type() == "pi_top_4":
             _do_reboot()
 
     except Exception as e:
@@ -166,11 +194,11 @@ def reboot():
 
 def poweroff():
     try:
-        device_id = get_device_id()
-        if device_id in [DeviceID.pi_top, DeviceID.pi_top_ceed]:
+        device_type = get_device_type()
+        if device_type in ["pi_top", "pi_top_ceed"]:
             _do_poweroff_legacy()
-        elif device_id in [DeviceID.pi_top_3, DeviceID.pi_top_4]:
-            _do_poweroff(device_id)
+        elif device_type in ["pi_top_3", "pi_top_4"]:
+            _do_poweroff(device_type)
 
     except Exception as e:
         print("Error starting shutdown service: " + str(e))
@@ -4,7 +4,8 @@ from threading import Thread
 from time import sleep
 
 from pitop.common.counter import Counter
-from smbus2 import SMBus
+
+from .. import buses
 
 logger = logging.getLogger(__name__)
 
@@ -75,7 +76,7 @@ class BatteryStateHandler:
     def _setup_i2c(self):
         try:
             logger.debug("Setting up i2c connection to battery")
-            self._bus = SMBus(self._bus_no)
+            self._bus = buses.open_smbus(self._bus_no)
 
             logger.debug("Testing comms with battery")
             return self._refresh_state()
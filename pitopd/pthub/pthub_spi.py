@@ -7,6 +7,8 @@ from time import sleep
 from pitop.common.common_ids import DeviceID
 from pitop.common.counter import Counter
 
+from .. import buses
+
 logger = logging.getLogger(__name__)
 
 _spi_handler = None
@@ -212,10 +214,7 @@ class SPIHandler:
 
     def _setup_spi(self):
         if self.spi is None:
-            from spidev import SpiDev
-
-            self.spi = SpiDev()
-            self.spi.open(0, 1)
+            self.spi = buses.open_spi(0, 1)
             self.spi.max_speed_hz = 9600
             self.spi.mode = 0b00
             self.spi.bits_per_word = 8
@@ -2,7 +2,7 @@ import logging
 from threading import Thread
 from time import sleep
 
-from pitop.common.i2c_device import I2CDevice
+from .. import buses
 
 logger = logging.getLogger(__name__)
 
@@ -72,7 +72,7 @@ class HubConnection:
         self._main_thread = Thread(target=self._main_thread_loop)
 
         try:
-            self._i2c_device = I2CDevice("/dev/i2c-1", 0x10)
+            self._i2c_device = buses.open_i2c_device("/dev/i2c-1", 0x10)
             self._i2c_device.connect()
         except Exception as e:
             logger.warning("Unable to read from hub (v2) over i2c: " + str(e))
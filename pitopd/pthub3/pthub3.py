@@ -3,7 +3,7 @@ import logging
 from pitop.common.common_ids import DeviceID
 
 from .pthub3_connection import HubConnection
-from .pthub3_state import State
+from .pthub3_state import OledSpi, State
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +29,10 @@ def register_client(funcs):
     _state.register_client(funcs)
 
 
+def set_edge_event_source(edge_event_source):
+    _hub_connection.set_edge_event_source(edge_event_source)
+
+
 def start():
     logger.debug("Hub connection loop starting...")
     _hub_connection.start()
@@ -87,7 +91,10 @@ def get_oled_pi_control_state():
 
 
 def get_oled_use_spi0():
-    return _hub_connection.read_oled_use_spi0()
+    # Kept up to date by the poll thread, which reads the OLED control register
+    if _state.oled_spi_bus == OledSpi.UNKNOWN:
+        return _hub_connection.read_oled_use_spi0()
+    return _state.oled_is_using_spi0
 
 
 def get_lid_open_state():
@@ -1,10 +1,11 @@
 import logging
-from threading import Thread
-from time import sleep
+from os import getenv
+from threading import Lock, Thread
+from time import monotonic, sleep
 
 from pitop.common import bitwise_ops
-from pitop.common.i2c_device import I2CDevice
 
+from .. import buses
 from .internal.apcad import APCAD
 from .internal.battery import BatteryControl
 from .internal.device_info import DeviceInfo
@@ -20,7 +21,17 @@ from .internal.hardware import (
 )
 from .internal.misc import AudioConfig, AudioRegister, UnixTime
 from .internal.power import PowerControl, ShutdownRegister
+from .pthub3_events import GpioEdgeEventSource
+from .pthub3_scheduler import PollScheduler
+from .pthub3_snapshot import (
+    BATTERY_BLOCK,
+    SHUTDOWN_CONTROL_BLOCK,
+    UI_CONTROL_BLOCK,
+    RegisterSnapshot,
+    SnapshotReader,
+)
 from .pthub3_state import OledSpi
+from .pthub3_thermal import ThermalFeed
 
 logger = logging.getLogger(__name__)
 
@@ -32,39 +43,63 @@ class HubConnection:
         self._run_polling_thread = False
         self._cycle_sleep_time = 0.1
         self._accelerated_cycle_sleep_time = 0.02
-        self._accelerated_cycle_sleep_time_counter = 0
-        self._accelerated_cycle_sleep_time_counter_limit = 150
+        self._accelerated_poll_duration_s = 3
+        self._button_pressed_time = None
         self.button_pressed_recently = False
+        self._max_cycle_sleep_time = 1
         self._main_thread = Thread(target=self._main_thread_loop)
         self._state = None
         self._i2c_device = None
-        self._battery_sleep_counter = 0
-        self._battery_min_read_sleep_s = 2
-        self._display_sleep_counter = 0
-        self._display_min_read_sleep_s = 2
-        self._cpu_temp_sleep_counter = 0
-        self._cpu_temp_min_read_sleep_s = 5
+        self._snapshot_reader = None
+        self._snapshot = RegisterSnapshot()
+        self._poll_lock = Lock()
+        self._edge_event_source = None
+        self._input_thread = Thread(target=self._input_thread_loop)
+        self._event_mode_cycle_sleep_time = 1
+        self._scheduler = PollScheduler()
+        self._power_cable_connected = None
+        self._thermal_feed = ThermalFeed()
 
     def initialise(self, state):
         self._state = state
 
         try:
-            self._i2c_device = I2CDevice("/dev/i2c-1", 0x11)
+            self._i2c_device = buses.open_i2c_device("/dev/i2c-1", 0x11)
             self._i2c_device.set_delays(0.001, 0.001)
             self._i2c_device.connect()
             if not self.check_for_part_name_id():
                 return False
+
+            self._snapshot_reader = SnapshotReader(self._i2c_device)
+            for block in (UI_CONTROL_BLOCK, BATTERY_BLOCK):
+                self._snapshot_reader.verify(block)
         except Exception as e:
             logger.warning("Unable to read from hub (v3) over i2c: " + str(e))
             return False
 
+        interrupt_gpio = getenv("PT_HUB_INTERRUPT_GPIO", "")
+        if interrupt_gpio != "":
+            try:
+                self.set_edge_event_source(GpioEdgeEventSource(int(interrupt_gpio)))
+            except Exception as e:
+                logger.warning(
+                    "Unable to use hub interrupt GPIO - polling for input changes: "
+                    + str(e)
+                )
+
         return True
 
+    def set_edge_event_source(self, edge_event_source):
+        self._edge_event_source = edge_event_source
+
     def start(self):
         if self._main_thread is not None:
             self._run_polling_thread = True
+            self._register_poll_sources()
             self._poll_hub()
             self._main_thread.start()
+            if self._edge_event_source is not None:
+                self._input_thread.start()
         else:
             logger.error(
                 "Unable to start pi-topHUB SPI communication - run initialise() first!"
@@ -72,11 +107,17 @@ class HubConnection:
 
     def stop(self):
         self._run_polling_thread = False
+        if self._edge_event_source is not None:
+            self._edge_event_source.close()
+        if self._input_thread.is_alive():
+            self._input_thread.join()
         self._main_thread.join()
+        self._thermal_feed.close()
         self._i2c_device.disconnect()
 
     def set_speed(self, no_of_polls_per_second=10):
         self._cycle_sleep_time = float(1 / no_of_polls_per_second)
+        self._update_poll_periods()
 
     def read_raspi_board_detect_flag(self):
         logger.debug("Hub: Reading raspi board detect flag")
@@ -275,17 +316,17 @@ class HubConnection:
     def _read_shutdown_button_held(self):
         logger.debug("Hub: Reading shutdown button held")
         self._state.set_power_button_press_state(
-            self._i2c_device.read_bits_from_byte_at_address(
-                bits_to_read=ShutdownRegister.PWR__SHUTDOWN_CTRL__HELD,
-                addr_to_read=PowerControl.PWR__SHUTDOWN_CTRL,
+            self._snapshot.get_bits(
+                ShutdownRegister.PWR__SHUTDOWN_CTRL__HELD,
+                PowerControl.PWR__SHUTDOWN_CTRL,
             )
         )
 
     def _read_shutdown_control(self):
         logger.debug("Polling for shutdown...")
-        shutdown_control = bitwise_ops.get_bits(
+        shutdown_control = self._snapshot.get_bits(
             ShutdownRegister.PWR__SHUTDOWN_CTRL__BUTT,
-            self._i2c_device.read_unsigned_byte(PowerControl.PWR__SHUTDOWN_CTRL),
+            PowerControl.PWR__SHUTDOWN_CTRL,
         )
         if shutdown_control != 0:
             # The power button been held for the time indicated in PWR__BUTT_SHORT_HOLD_TURNOFF
@@ -691,35 +732,72 @@ class HubConnection:
     ########################
     # Internal methods
     ########################
-    def _read_battery_registers_if_min_time_passed(self):
-        # Reset battery sleep counter if time has passed
-        if self._battery_sleep_counter >= self._battery_min_read_sleep_s:
-            self._battery_sleep_counter = 0
-
-        # Read battery state if counter reset
-        if self._battery_sleep_counter == 0:
-            self._read_battery_registers()
+    def _register_poll_sources(self):
+        input_poll_period = self._get_cycle_sleep_time()
+        self._scheduler.register(
+            "shutdown",
+            self._poll_shutdown,
+            input_poll_period,
+            priority=0,
+            blocks=(SHUTDOWN_CONTROL_BLOCK,),
+        )
+        self._scheduler.register(
+            "buttons",
+            self._read_ui_buttons_register,
+            input_poll_period,
+            priority=1,
+            blocks=(UI_CONTROL_BLOCK,),
+        )
+        self._scheduler.register(
+            "oled",
+            self._read_oled_register,
+            self._get_oled_poll_period(),
+            priority=2,
+            blocks=(UI_CONTROL_BLOCK,),
+            max_period=2,
+            stable_after=30,
+        )
+        self._scheduler.register(
+            "battery",
+            self._read_battery_registers,
+            2,
+            priority=3,
+            blocks=(BATTERY_BLOCK, SHUTDOWN_CONTROL_BLOCK),
+            max_period=30,
+            stable_after=120,
+        )
+        self._scheduler.register(
+            "cpu_temp",
+            self._write_cpu_temp_register,
+            2,
+            priority=4,
+            max_period=20,
+            stable_after=60,
+        )
 
-        # Update battery counter with sleep time
-        self._battery_sleep_counter += self._cycle_sleep_time
+    def _update_poll_periods(self):
+        periods = {
+            "shutdown": self._get_cycle_sleep_time(),
+            "buttons": self._get_cycle_sleep_time(),
+            "oled": self._get_oled_poll_period(),
+        }
+        for name, period in periods.items():
+            if self._scheduler.has_source(name):
+                self._scheduler.set_period(name, period)
 
     def _read_battery_registers(self):
         logger.debug("Hub: Reading battery registers")
 
-        # Get values from the hub
-        current_ma = self._i2c_device.read_signed_word(BatteryControl.BAT__CURRENT)
-        voltage_v = self._i2c_device.read_unsigned_word(BatteryControl.BAT__VOLTAGE)
-        relative_state_of_charge = self._i2c_device.read_unsigned_byte(
-            BatteryControl.BAT__RSOC
-        )
-        time_until_empty_mins = self._i2c_device.read_unsigned_word(
-            BatteryControl.BAT__TIME_TO_EMPTY
-        )
-        time_until_full_mins = self._i2c_device.read_unsigned_word(
-            BatteryControl.BAT__TIME_TO_FULL
-        )
+        # Get values from the snapshot
+        current_ma = self._snapshot.get(BatteryControl.BAT__CURRENT)
+        voltage_v = self._snapshot.get(BatteryControl.BAT__VOLTAGE)
+        relative_state_of_charge = self._snapshot.get(BatteryControl.BAT__RSOC)
+        time_until_empty_mins = self._snapshot.get(BatteryControl.BAT__TIME_TO_EMPTY)
+        time_until_full_mins = self._snapshot.get(BatteryControl.BAT__TIME_TO_FULL)
         # Set the charging state base on the current
-        power_cable_connected = self.read_ac_power_connected()
+        power_cable_connected = self._snapshot.get_bits(
+            ShutdownRegister.PWR__SHUTDOWN_CTRL__AC, PowerControl.PWR__SHUTDOWN_CTRL
+        )
 
         # If the times are set to 0xFFFF, that means infinite (e.g. not charging or
         # discharging), so we set these to 0 to make more readable
@@ -748,12 +826,13 @@ class HubConnection:
         capacity = 100 if charging_state == 2 else relative_state_of_charge
         self._state.set_battery_state(charging_state, capacity, remaining_time, wattage)
 
+        # Only a change in these should keep the battery polled at full rate
+        return charging_state, capacity
+
     def _read_oled_register(self):
         logger.debug("Hub: Reading OLED register")
 
-        oled_controlled_state = self._i2c_device.read_unsigned_byte(
-            HardwareControl.CTRL__UI_OLED_CTRL
-        )
+        oled_controlled_state = self._snapshot.get(HardwareControl.CTRL__UI_OLED_CTRL)
 
         logger.debug(f"Hub: OLED register is {bin(oled_controlled_state)}")
         self._state.set_oled_controller(
@@ -771,7 +850,7 @@ class HubConnection:
         hub_spi_bus = OledSpi.BUS1 if spi_bus_bits == 0 else OledSpi.BUS0
 
         if hub_spi_bus == state_spi_bus and state_spi_bus != OledSpi.UNKNOWN:
-            return
+            return oled_controlled_state
 
         if state_spi_bus == OledSpi.UNKNOWN:
             self._state.oled_spi_bus = hub_spi_bus
@@ -784,12 +863,12 @@ class HubConnection:
         self.set_oled_use_spi0(state_spi_bus == OledSpi.BUS0)
         self._state.emit_oled_spi_bus_state_changed()
 
+        return oled_controlled_state
+
     def _read_ui_buttons_register(self):
         logger.debug("Hub: Reading UI button register")
 
-        ui_button_state = self._i2c_device.read_unsigned_byte(
-            HardwareControl.CTRL__UI_BUTTON_CTRL
-        )
+        ui_button_state = self._snapshot.get(HardwareControl.CTRL__UI_BUTTON_CTRL)
 
         self._state.set_buttons_route_to_gpio_state(
             bitwise_ops.get_bits(
@@ -821,82 +900,92 @@ class HubConnection:
             )
         )
 
-    def _get_cpu_temp(self):
-        logger.debug("Getting CPU temperature")
-        cpu_temp_file = "/sys/class/thermal/thermal_zone0/temp"
-        try:
-            file = open(cpu_temp_file, "r")
-        except FileNotFoundError as ferr:
-            logger.warning("CPU temperature file not found")
-            logger.warning(ferr)
-            return None
-        except Exception as ex:
-            logger.warning(
-                "Unhandled exception when trying to open CPU temperature file"
-            )
-            logger.warning(ex)
-            return None
-        else:
-            str_val = file.readline().strip()
-
-        logger.debug("Parsing CPU temperature")
-
-        try:
-            cpu_temp = int(str_val)
-        except ValueError as verr:
-            logger.warning("CPU temp from file not valid integer")
-            logger.warning(verr)
-            return None
-        except Exception as ex:
-            logger.warning("Unhandled exception when parsing CPU temp")
-            logger.warning(ex)
-            return None
-
-        temp_celsius = int(cpu_temp / 1000)
-
-        logger.debug("CPU temperature: " + str(temp_celsius))
-
-        return temp_celsius
+        return ui_button_state
 
     def _write_cpu_temp_register(self):
-        cpu_temp = self._get_cpu_temp()
+        cpu_temp = self._thermal_feed.read()
 
         if cpu_temp is None:
-            logger.warning("CPU temperature is not valid - skipping write to register")
+            # Returning the same value each time lets the scheduler back off
+            logger.debug("CPU temperature is not valid - skipping write to register")
             return
 
-        self.set_rpi_cpu_temp(cpu_temp)
+        if self._thermal_feed.should_write(cpu_temp):
+            self.set_rpi_cpu_temp(cpu_temp)
+            self._thermal_feed.mark_written(cpu_temp)
 
-    def _write_cpu_temp_register_if_min_time_passed(self):
-        # Reset counter if time has passed
-        if self._cpu_temp_sleep_counter >= self._cpu_temp_min_read_sleep_s:
-            self._cpu_temp_sleep_counter = 0
+        return cpu_temp
 
-        # Read CPU state and write to register if counter reset
-        if self._cpu_temp_sleep_counter == 0:
-            self._write_cpu_temp_register()
+    def _poll_shutdown(self):
+        self._read_shutdown_control()
+        self._read_shutdown_button_held()
+
+        power_cable_connected = self._snapshot.get_bits(
+            ShutdownRegister.PWR__SHUTDOWN_CTRL__AC, PowerControl.PWR__SHUTDOWN_CTRL
+        )
+        if (
+            self._power_cable_connected is not None
+            and power_cable_connected != self._power_cable_connected
+        ):
+            # Report the new charging state without waiting for the battery
+            # poll period, which may have backed off
+            self._scheduler.reset("battery")
+        self._power_cable_connected = power_cable_connected
 
-        # Update CPU temp counter with sleep time
-        self._cpu_temp_sleep_counter += self._cycle_sleep_time
+        return self._snapshot.get(PowerControl.PWR__SHUTDOWN_CTRL)
 
     def _poll_hub(self):
+        with self._poll_lock:
+            pending_sources = self._scheduler.due_sources()
+            if len(pending_sources) == 0:
+                return
+
+            try:
+                logger.debug(
+                    "Starting poll hub registers: "
+                    + ", ".join(source.name for source in pending_sources)
+                )
+                blocks = list()
+                for source in pending_sources:
+                    for block in source.blocks:
+                        if block not in blocks:
+                            blocks.append(block)
+                if len(blocks) > 0:
+                    self._snapshot = self._snapshot_reader.read(blocks)
+
+                while len(pending_sources) > 0:
+                    source = pending_sources[0]
+                    value = source.callback()
+                    self._scheduler.complete(source, value)
+                    pending_sources.pop(0)
+                logger.debug("Finished poll hub registers")
+
+            except TypeError as e:
+                raise e
+
+            except Exception as e:
+                logger.error("Error polling hub: " + str(e))
+                for source in pending_sources:
+                    self._scheduler.skip(source)
+
+    def _poll_hub_inputs(self):
         try:
-            logger.debug("Starting poll hub registers")
-            self._read_battery_registers_if_min_time_passed()
-            self._read_shutdown_control()
-            self._read_shutdown_button_held()
-            self._read_oled_register()
-            self._read_ui_buttons_register()
-            self._write_cpu_temp_register_if_min_time_passed()
-            logger.debug("Finished poll hub registers")
+            with self._poll_lock:
+                logger.debug("Hub: Reading input registers after edge event")
+                self._snapshot = self._snapshot_reader.read(
+                    [UI_CONTROL_BLOCK, SHUTDOWN_CONTROL_BLOCK]
+                )
+                self._poll_shutdown()
+                self._read_ui_buttons_register()
 
         except TypeError as e:
             raise e
 
         except Exception as e:
-            logger.error("Error polling hub: " + str(e))
+            logger.error("Error reading hub inputs: " + str(e))
 
     def check_button_pressed_recently(self):
+        now = monotonic()
         button_pressed_now = (
             self._state.up_button_press_state != 0
             or self._state.down_button_press_state != 0
@@ -904,34 +993,61 @@ class HubConnection:
             or self._state.cancel_button_press_state != 0
         )
         if button_pressed_now:
-            self.button_pressed_recently = True
-            self._accelerated_cycle_sleep_time_counter = 0
+            self._button_pressed_time = now
+
+        button_pressed_recently = (
+            self._button_pressed_time is not None
+            and now - self._button_pressed_time < self._accelerated_poll_duration_s
+        )
+        if button_pressed_recently != self.button_pressed_recently:
+            self.button_pressed_recently = button_pressed_recently
+            self._update_poll_periods()
+
+    def _get_cycle_sleep_time(self):
+        if self._edge_event_source is not None:
+            # Input changes are signalled by edge events, so polling is only
+            # needed for slow-moving telemetry
+            return max(self._cycle_sleep_time, self._event_mode_cycle_sleep_time)
 
         if self.button_pressed_recently:
-            self._accelerated_cycle_sleep_time_counter += 1
-        else:
-            self._accelerated_cycle_sleep_time_counter = 0
+            return self._accelerated_cycle_sleep_time
 
-        if (
-            self._accelerated_cycle_sleep_time_counter
-            >= self._accelerated_cycle_sleep_time_counter_limit
-        ):
-            self.button_pressed_recently = False
+        return self._cycle_sleep_time
+
+    def _get_oled_poll_period(self):
+        if self._edge_event_source is not None:
+            # Polled with the telemetry so that the CPU can idle between
+            # input events
+            return self._get_cycle_sleep_time()
+
+        # Not sped up while buttons are being pressed
+        return self._cycle_sleep_time
+
+    def _get_sleep_time_until_next_poll(self):
+        time_until_next_poll = self._scheduler.time_until_next_deadline()
+        if time_until_next_poll is None:
+            return self._max_cycle_sleep_time
+        return min(time_until_next_poll, self._max_cycle_sleep_time)
+
+    def _input_thread_loop(self):
+        while self._run_polling_thread:
+            try:
+                if self._edge_event_source.wait():
+                    self._poll_hub_inputs()
+
+            except Exception as e:
+                logger.warning("Exception while waiting for hub input events")
+                logger.warning(e)
 
     def _main_thread_loop(self):
         while self._run_polling_thread:
             try:
                 self._poll_hub()
 
-                self.check_button_pressed_recently()
-
-                time_to_sleep = (
-                    self._accelerated_cycle_sleep_time
-                    if self.button_pressed_recently
-                    else self._cycle_sleep_time
-                )
+                if self._edge_event_source is None:
+                    self.check_button_pressed_recently()
 
-                sleep(time_to_sleep)
+                sleep(self._get_sleep_time_until_next_poll())
 
             except Exception as e:
                 logger.warning("Exception during hub polling")
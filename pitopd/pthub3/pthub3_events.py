@@ -0,0 +1,113 @@
+import logging
+import os
+import select
+from threading import Event, Lock
+
+logger = logging.getLogger(__name__)
+
+
+# Edge event sources signal when the hub's input registers may have changed.
+# They provide:
+#   wait(timeout=None) - block until an edge is seen (returning True), the
+#                        timeout expires or close() is called (returning False)
+#   close()            - wake any waiting thread and release the source
+
+
+class ManualEdgeEventSource:
+    """Edge source driven in software, e.g. by a test or a simulated hub."""
+
+    def __init__(self):
+        self._edge = Event()
+        self._closed = False
+
+    def trigger(self):
+        self._edge.set()
+
+    def wait(self, timeout=None):
+        triggered = self._edge.wait(timeout)
+        self._edge.clear()
+        return triggered and not self._closed
+
+    def close(self):
+        self._closed = True
+        self._edge.set()
+
+
+class GpioEdgeEventSource:
+    """Edge source backed by a GPIO line connected to the hub's interrupt
+    output, using the sysfs GPIO interface."""
+
+    SYSFS_GPIO_PATH = "/sys/class/gpio"
+
+    def __init__(self, gpio_number, edge="both"):
+        self._gpio_path = f"{self.SYSFS_GPIO_PATH}/gpio{gpio_number}"
+
+        if not os.path.exists(self._gpio_path):
+            with open(f"{self.SYSFS_GPIO_PATH}/export", "w") as f:
+                f.write(str(gpio_number))
+
+        with open(f"{self._gpio_path}/direction", "w") as f:
+            f.write("in")
+
+        with open(f"{self._gpio_path}/edge", "w") as f:
+            f.write(edge)
+
+        self._value_fd = os.open(f"{self._gpio_path}/value", os.O_RDONLY)
+        # Clear any edge that was already pending
+        os.pread(self._value_fd, 2, 0)
+
+        self._wakeup_read_fd, self._wakeup_write_fd = os.pipe()
+
+        self._poller = select.poll()
+        self._poller.register(self._value_fd, select.POLLPRI | select.POLLERR)
+        self._poller.register(self._wakeup_read_fd, select.POLLIN)
+
+        # The file descriptors are only closed once no thread is waiting on
+        # them, so that a wait() in progress never uses a closed (or reused)
+        # descriptor
+        self._lock = Lock()
+        self._waiting = False
+        self._closed = False
+
+        logger.info(f"Using GPIO {gpio_number} for hub input events")
+
+    def wait(self, timeout=None):
+        with self._lock:
+            if self._closed:
+                return False
+            self._waiting = True
+
+        try:
+            timeout_ms = None if timeout is None else int(timeout * 1000)
+            events = self._poller.poll(timeout_ms)
+
+            edge = False
+            for fd, _ in events:
+                if fd == self._wakeup_read_fd:
+                    return False
+                if fd == self._value_fd:
+                    # Reading the value acknowledges the edge
+                    os.pread(self._value_fd, 2, 0)
+                    edge = True
+            return edge
+
+        finally:
+            with self._lock:
+                self._waiting = False
+                if self._closed:
+                    self._close_fds()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._waiting:
+                # The waiting thread closes the file descriptors as it returns
+                os.write(self._wakeup_write_fd, b"\0")
+            else:
+                self._close_fds()
+
+    def _close_fds(self):
+        for fd in (self._value_fd, self._wakeup_read_fd, self._wakeup_write_fd):
+            os.close(fd)
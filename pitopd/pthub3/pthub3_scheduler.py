@@ -0,0 +1,134 @@
+import logging
+from time import monotonic
+
+logger = logging.getLogger(__name__)
+
+_NO_VALUE = object()
+
+
+class PollSource:
+    def __init__(
+        self,
+        name,
+        callback,
+        period,
+        priority=0,
+        blocks=(),
+        max_period=None,
+        stable_after=None,
+        backoff_factor=2,
+    ):
+        self.name = name
+        self.callback = callback
+        self.priority = priority
+        self.blocks = tuple(blocks)
+        self.period = period
+        self.max_period = period if max_period is None else max_period
+        self.stable_after = stable_after
+        self.backoff_factor = backoff_factor
+
+        self.current_period = period
+        self.next_deadline = 0
+        self.last_value = _NO_VALUE
+        self.last_change_time = None
+        self.last_backoff_time = None
+
+    def reset_period(self, now):
+        self.current_period = self.period
+        self.last_change_time = now
+        self.last_backoff_time = None
+
+    def update(self, value, now):
+        if value != self.last_value or self.last_change_time is None:
+            self.last_value = value
+            if self.current_period != self.period:
+                logger.debug(f"Poll source '{self.name}' changed - resetting period")
+            self.reset_period(now)
+
+        elif (
+            self.stable_after is not None
+            and self.current_period < self.max_period
+            and now - self.last_change_time >= self.stable_after
+            and (
+                self.last_backoff_time is None
+                or now - self.last_backoff_time >= self.stable_after
+            )
+        ):
+            self.current_period = min(
+                self.current_period * self.backoff_factor, self.max_period
+            )
+            self.last_backoff_time = now
+            logger.debug(
+                f"Poll source '{self.name}' stable - backing off to {self.current_period}s"
+            )
+
+        # Deadlines advance from the previous deadline rather than from when
+        # the source was serviced, so I2C latency does not accumulate as drift
+        self.next_deadline += self.current_period
+        if self.next_deadline <= now:
+            self.next_deadline = now + self.current_period
+
+
+class PollScheduler:
+    """Services a set of poll sources against monotonic deadlines.
+
+    A source whose value has not changed for ``stable_after`` seconds has
+    its period multiplied by ``backoff_factor`` (up to ``max_period``);
+    the period returns to its base value as soon as the value changes.
+    """
+
+    def __init__(self, clock=monotonic):
+        self._clock = clock
+        self._sources = dict()
+
+    def register(self, name, callback, period, **kwargs):
+        source = PollSource(name, callback, period, **kwargs)
+        self._sources[name] = source
+        return source
+
+    def unregister(self, name):
+        self._sources.pop(name, None)
+
+    def has_source(self, name):
+        return name in self._sources
+
+    def set_period(self, name, period):
+        source = self._sources[name]
+        if source.period == period:
+            return
+
+        now = self._clock()
+        source.period = period
+        source.max_period = max(source.max_period, period)
+        source.reset_period(now)
+        source.next_deadline = min(source.next_deadline, now + period)
+
+    def reset(self, name):
+        """Return a source to its base period and make it due immediately."""
+        source = self._sources.get(name)
+        if source is None:
+            return
+
+        now = self._clock()
+        source.reset_period(now)
+        source.next_deadline = now
+
+    def due_sources(self):
+        now = self._clock()
+        due = [s for s in self._sources.values() if s.next_deadline <= now]
+        return sorted(due, key=lambda s: s.priority)
+
+    def complete(self, source, value):
+        source.update(value, self._clock())
+
+    def skip(self, source):
+        """Reschedule a source that could not be read, without treating
+        the missed reading as a change or as a stable value."""
+        source.next_deadline = self._clock() + source.current_period
+
+    def time_until_next_deadline(self):
+        if len(self._sources) == 0:
+            return None
+
+        next_deadline = min(s.next_deadline for s in self._sources.values())
+        return max(0, next_deadline - self._clock())
@@ -0,0 +1,165 @@
+import logging
+
+from .internal.battery import BatteryControl
+from .internal.hardware import HardwareControl
+from .internal.power import PowerControl
+
+logger = logging.getLogger(__name__)
+
+
+class Register:
+    def __init__(self, address, size=1, signed=False, volatile=False):
+        self.address = address
+        self.size = size
+        self.signed = signed
+        # Volatile registers can legitimately change between two consecutive
+        # reads, so they are not used to verify that block reads are supported
+        self.volatile = volatile
+
+    def decode(self, data):
+        return int.from_bytes(data, "big", signed=self.signed)
+
+
+class RegisterBlock:
+    """A run of consecutive hub registers that can be fetched in a single I2C
+    transaction."""
+
+    def __init__(self, name, registers):
+        self.name = name
+        self.registers = registers
+        self.start = registers[0].address
+        self.length = sum(register.size for register in registers)
+
+        for previous, current in zip(registers, registers[1:]):
+            if current.address != previous.address + 1:
+                raise ValueError(f"Registers in block '{name}' are not contiguous")
+
+    def decode(self, raw_value):
+        data = raw_value.to_bytes(self.length, "big")
+        values = dict()
+        offset = 0
+        for register in self.registers:
+            values[register.address] = register.decode(
+                data[offset : offset + register.size]
+            )
+            offset += register.size
+        return values
+
+
+class RegisterSnapshot:
+    """Register values read from the hub during a single poll cycle."""
+
+    def __init__(self, values=None):
+        self._values = dict() if values is None else dict(values)
+
+    def has(self, register_address):
+        return register_address in self._values
+
+    def get(self, register_address):
+        return self._values[register_address]
+
+    def get_bits(self, bits_to_read, register_address):
+        return self._values[register_address] & bits_to_read
+
+
+class SnapshotReader:
+    """Reads a set of register blocks from the hub into a RegisterSnapshot,
+    using one I2C transaction per block.
+
+    Blocks that fail verification fall back to one transaction per
+    register.
+    """
+
+    def __init__(self, i2c_device):
+        self._i2c_device = i2c_device
+        self._unsupported_blocks = set()
+
+    def verify(self, block):
+        try:
+            burst_values = self._read_block_burst(block)
+        except OSError as e:
+            logger.debug(f"Hub: block read of '{block.name}' failed: {e}")
+            burst_values = None
+        try:
+            single_values = self._read_block_registers(block)
+        except OSError as e:
+            # Without values to compare against, the block read can't be
+            # trusted, but the registers are still polled individually
+            logger.debug(f"Hub: register reads of '{block.name}' failed: {e}")
+            burst_values = None
+
+        supported = burst_values is not None and all(
+            burst_values[register.address] == single_values[register.address]
+            for register in block.registers
+            if not register.volatile
+        )
+
+        if supported:
+            self._unsupported_blocks.discard(block.name)
+        else:
+            logger.warning(
+                f"Hub: block read of '{block.name}' registers not supported - reading registers individually"
+            )
+            self._unsupported_blocks.add(block.name)
+
+        return supported
+
+    def read(self, blocks):
+        values = dict()
+        for block in blocks:
+            values.update(self.read_block(block))
+        return RegisterSnapshot(values)
+
+    def read_block(self, block):
+        if block.name not in self._unsupported_blocks:
+            values = self._read_block_burst(block)
+            if values is not None:
+                return values
+            logger.debug(f"Hub: block read of '{block.name}' failed, retrying")
+
+        return self._read_block_registers(block)
+
+    def _read_block_burst(self, block):
+        raw_value = self._i2c_device.read_n_unsigned_bytes(block.start, block.length)
+        if raw_value is None:
+            return None
+        return block.decode(raw_value)
+
+    def _read_block_registers(self, block):
+        values = dict()
+        for register in block.registers:
+            if register.size == 1:
+                value = self._i2c_device.read_unsigned_byte(register.address)
+            elif register.signed:
+                value = self._i2c_device.read_signed_word(register.address)
+            else:
+                value = self._i2c_device.read_unsigned_word(register.address)
+            values[register.address] = value
+        return values
+
+
+UI_CONTROL_BLOCK = RegisterBlock(
+    "ui_control",
+    [
+        Register(HardwareControl.CTRL__UI_OLED_CTRL),
+        Register(HardwareControl.CTRL__UI_BUTTON_CTRL, volatile=True),
+    ],
+)
+
+SHUTDOWN_CONTROL_BLOCK = RegisterBlock(
+    "shutdown_control",
+    [
+        Register(PowerControl.PWR__SHUTDOWN_CTRL, volatile=True),
+    ],
+)
+
+BATTERY_BLOCK = RegisterBlock(
+    "battery",
+    [
+        Register(BatteryControl.BAT__VOLTAGE, size=2, volatile=True),
+        Register(BatteryControl.BAT__CURRENT, size=2, signed=True, volatile=True),
+        Register(BatteryControl.BAT__RSOC),
+        Register(BatteryControl.BAT__TIME_TO_EMPTY, size=2, volatile=True),
+        Register(BatteryControl.BAT__TIME_TO_FULL, size=2, volatile=True),
+    ],
+)
@@ -0,0 +1,98 @@
+import logging
+import os
+from collections import deque
+from time import monotonic
+
+logger = logging.getLogger(__name__)
+
+
+class ThermalFeed:
+    """Reads the Raspberry Pi CPU temperature for writing back to the hub.
+
+    The sysfs file is kept open and re-read with pread, and should_write()
+    only reports a reading as worth sending to the hub when it has moved
+    by at least ``hysteresis`` degrees since the last write, or when the
+    last write is older than ``refresh_period`` seconds.
+    """
+
+    CPU_TEMP_FILE = "/sys/class/thermal/thermal_zone0/temp"
+
+    def __init__(
+        self,
+        path=CPU_TEMP_FILE,
+        hysteresis=1,
+        refresh_period=60,
+        history_length=30,
+        clock=monotonic,
+    ):
+        self._path = path
+        self._hysteresis = hysteresis
+        self._refresh_period = refresh_period
+        self._clock = clock
+        self._fd = None
+        self._last_written = None
+        self._last_write_time = None
+        self._history = deque(maxlen=history_length)
+        self._read_error = None
+
+    @property
+    def history(self):
+        """(time, temperature) pairs for the most recent readings."""
+        return list(self._history)
+
+    @property
+    def last_written(self):
+        return self._last_written
+
+    def read(self):
+        logger.debug("Getting CPU temperature")
+        try:
+            if self._fd is None:
+                self._fd = os.open(self._path, os.O_RDONLY)
+            str_val = os.pread(self._fd, 16, 0).decode().strip()
+        except Exception as e:
+            self._read_failed(e)
+            self.close()
+            return None
+
+        try:
+            temp_celsius = int(int(str_val) / 1000)
+        except ValueError as e:
+            self._read_failed(e)
+            return None
+
+        if self._read_error is not None:
+            logger.info("CPU temperature can be read again")
+            self._read_error = None
+
+        logger.debug("CPU temperature: " + str(temp_celsius))
+        self._history.append((self._clock(), temp_celsius))
+        return temp_celsius
+
+    def _read_failed(self, error):
+        # The temperature is polled every few seconds, so only the first of a
+        # run of failures is a warning
+        if self._read_error is None:
+            logger.warning(f"Unable to read CPU temperature: {error}")
+        else:
+            logger.debug(f"Unable to read CPU temperature: {error}")
+        self._read_error = error
+
+    def should_write(self, temp_celsius):
+        if self._last_written is None:
+            return True
+
+        if abs(temp_celsius - self._last_written) >= self._hysteresis:
+            return True
+
+        return self._clock() - self._last_write_time >= self._refresh_period
+
+    def mark_written(self, temp_celsius):
+        self._last_written = temp_celsius
+        self._last_write_time = self._clock()
+
+    def close(self):
+        if self._fd is None:
+            return
+        os.close(self._fd)
+        self._fd = None
@@ -0,0 +1,131 @@
+import logging
+from threading import Lock, Timer
+from time import monotonic
+
+logger = logging.getLogger(__name__)
+
+
+class TopicPolicy:
+    """How often messages on a topic may be sent.
+
+    Messages that arrive within ``min_interval`` seconds of the last one
+    sent are held back, and only the latest of them is sent when the
+    interval is up. If ``key`` is given, a message whose key differs from
+    the last one sent is never held back, e.g. a battery update where the
+    charging state has changed.
+    """
+
+    def __init__(self, min_interval, key=None):
+        self.min_interval = min_interval
+        self.key = key
+
+
+class _TopicState:
+    def __init__(self):
+        self.last_sent_time = None
+        self.last_sent_key = None
+        self.pending = None
+        self.timer = None
+        self.sent = 0
+        self.suppressed = 0
+
+
+class PublishThrottle:
+    """Coalesces messages on rate limited topics, keeping the latest value.
+
+    Topics without a policy are passed straight to ``send``, so discrete
+    events are never dropped.
+    """
+
+    def __init__(self, send, policies, clock=monotonic, timer_factory=Timer):
+        self._send = send
+        self._policies = dict(policies)
+        self._clock = clock
+        self._timer_factory = timer_factory
+        self._topics = {topic: _TopicState() for topic in self._policies}
+        self._lock = Lock()
+        self._closed = False
+
+    def submit(self, topic, parameters):
+        policy = self._policies.get(topic)
+        if policy is None:
+            self._send(topic, parameters)
+            return
+
+        with self._lock:
+            if self._closed:
+                return
+
+            state = self._topics[topic]
+            key = policy.key(parameters) if policy.key is not None else None
+            now = self._clock()
+            due = (
+                state.last_sent_time is None
+                or now - state.last_sent_time >= policy.min_interval
+                or key != state.last_sent_key
+            )
+
+            if state.pending is not None:
+                # Replaced by a newer value before it was sent
+                state.suppressed += 1
+                state.pending = None
+
+            if not due:
+                state.pending = parameters
+                if state.timer is None:
+                    self._start_timer(
+                        state, topic, state.last_sent_time + policy.min_interval - now
+                    )
+                return
+
+            self._mark_sent(state, now, key)
+
+        self._send(topic, parameters)
+
+    def stats(self):
+        with self._lock:
+            return {
+                topic: {"sent": state.sent, "suppressed": state.suppressed}
+                for topic, state in self._topics.items()
+            }
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            for state in self._topics.values():
+                if state.timer is not None:
+                    state.timer.cancel()
+                    state.timer = None
+
+    def _send_pending(self, topic):
+        policy = self._policies[topic]
+        with self._lock:
+            state = self._topics[topic]
+            state.timer = None
+            parameters = state.pending
+            if self._closed or parameters is None:
+                return
+
+            now = self._clock()
+            remaining = state.last_sent_time + policy.min_interval - now
+            if remaining > 0:
+                # Something was sent since this timer was started
+                self._start_timer(state, topic, remaining)
+                return
+
+            state.pending = None
+            key = policy.key(parameters) if policy.key is not None else None
+            self._mark_sent(state, now, key)
+
+        self._send(topic, parameters)
+
+    def _start_timer(self, state, topic, delay):
+        state.timer = self._timer_factory(delay, self._send_pending, args=[topic])
+        state.timer.daemon = True
+        state.timer.start()
+
+    @staticmethod
+    def _mark_sent(state, now, key):
+        state.last_sent_time = now
+        state.last_sent_key = key
+        state.sent += 1
@@ -0,0 +1,76 @@
+from .request_handlers import RequestHandler, encode_message
+
+# Outside pitop.common.ptdm.Message's ID ranges, so that they cannot clash
+# with future single requests
+REQ_BATCH = 1000
+RSP_BATCH = 2000
+
+# Each sub-request or sub-response is one parameter of the batch message, so
+# the separator inside them is swapped for one that is not used by Message
+_SUB_MESSAGE_SEPARATOR = ";"
+
+
+def encode_batch_request(requests):
+    """Combine request strings (e.g. Message.to_string() results) into a single
+    batch request."""
+    return encode_message(
+        REQ_BATCH,
+        [request.replace("|", _SUB_MESSAGE_SEPARATOR) for request in requests],
+    )
+
+
+def decode_batch_response(response):
+    """Split a batch response into one response string per sub-request.
+
+    If the batch itself was rejected, its error response is returned on
+    its own.
+    """
+    message_parts = response.split("|")
+    if int(message_parts[0]) != RSP_BATCH:
+        return [response]
+    return [part.replace(_SUB_MESSAGE_SEPARATOR, "|") for part in message_parts[1:]]
+
+
+class BatchRequestHandler(RequestHandler):
+    """Handles REQ_BATCH, which carries several requests in one message.
+
+    Sub-requests are answered in order by ``process_request``, and their
+    responses are returned in a single RSP_BATCH message, so a client can
+    fetch several values with one round trip. A sub-request that fails
+    gets its own error response without affecting the others.
+    """
+
+    MAX_REQUESTS = 32
+
+    def __init__(self, process_request):
+        super().__init__(
+            REQ_BATCH,
+            self._process_batch,
+            response_id=RSP_BATCH,
+            name="REQ_BATCH",
+            # Sub-requests are logged as they are processed
+            log_requests=False,
+        )
+        self._process_request = process_request
+
+    def parse_parameters(self, parameters):
+        if len(parameters) > self.MAX_REQUESTS:
+            raise ValueError(
+                f"Batch has more than the maximum of {self.MAX_REQUESTS} requests"
+            )
+        for parameter in parameters:
+            if parameter.split(_SUB_MESSAGE_SEPARATOR, 1)[0] == str(REQ_BATCH):
+                raise ValueError("Batches cannot be nested")
+        return [
+            parameter.replace(_SUB_MESSAGE_SEPARATOR, "|") for parameter in parameters
+        ]
+
+    def handle(self, parameters):
+        responses = self.callback(*self.parse_parameters(parameters))
+        return self.encode_response(
+            self.response_id,
+            [response.replace("|", _SUB_MESSAGE_SEPARATOR) for response in responses],
+        )
+
+    def _process_batch(self, *requests):
+        return [self._process_request(request) for request in requests]
@@ -0,0 +1,39 @@
+import struct
+
+# Binary encoding of published messages. Each message is two frames: the
+# message ID as a big-endian unsigned short, which subscribers can filter on
+# as a topic prefix, and the message's parameters packed as big-endian signed
+# 32-bit integers.
+
+_TOPIC_FORMAT = ">H"
+_PARAMETER_SIZE = 4
+
+_payload_structs = dict()
+
+
+def _payload_struct(parameter_count):
+    payload_struct = _payload_structs.get(parameter_count)
+    if payload_struct is None:
+        payload_struct = struct.Struct(">" + "i" * parameter_count)
+        _payload_structs[parameter_count] = payload_struct
+    return payload_struct
+
+
+def encode_topic(message_id):
+    return struct.pack(_TOPIC_FORMAT, message_id)
+
+
+def encode(message_id, parameters):
+    """Return the topic and payload frames for a message."""
+    return (
+        encode_topic(message_id),
+        _payload_struct(len(parameters)).pack(*parameters),
+    )
+
+
+def decode(frames):
+    """Return the message ID and parameters from a message's frames."""
+    topic, payload = frames
+    (message_id,) = struct.unpack(_TOPIC_FORMAT, topic)
+    parameters = _payload_struct(len(payload) // _PARAMETER_SIZE).unpack(payload)
+    return message_id, list(parameters)
@@ -0,0 +1,50 @@
+from .. import boot_profile
+from .request_handlers import RequestHandler, encode_message
+
+# Outside pitop.common.ptdm.Message's ID ranges, alongside REQ_BATCH
+REQ_GET_BOOT_PROFILE = 1001
+RSP_GET_BOOT_PROFILE = 2001
+
+_PHASE_SEPARATOR = ";"
+
+
+def decode_boot_profile_response(response):
+    """Split a boot profile response into (name, start, duration) tuples, with
+    times in seconds."""
+    message_parts = response.split("|")
+    if int(message_parts[0]) != RSP_GET_BOOT_PROFILE:
+        raise ValueError(f"Not a boot profile response: {response}")
+
+    phases = list()
+    for part in message_parts[1:]:
+        name, start, duration = part.split(_PHASE_SEPARATOR)
+        phases.append((name, float(start), float(duration)))
+    return phases
+
+
+class BootProfileRequestHandler(RequestHandler):
+    """Handles REQ_GET_BOOT_PROFILE, answering with one parameter per startup
+    phase of the form ``name;start;duration``."""
+
+    def __init__(self, profile=None):
+        super().__init__(
+            REQ_GET_BOOT_PROFILE,
+            self._get_phases,
+            response_id=RSP_GET_BOOT_PROFILE,
+            name="REQ_GET_BOOT_PROFILE",
+            inline=True,
+        )
+        self._profile = boot_profile.get_profile() if profile is None else profile
+
+    def handle(self, parameters):
+        phases = self.callback(*self.parse_parameters(parameters))
+        return encode_message(
+            self.response_id,
+            [
+                _PHASE_SEPARATOR.join((name, f"{start:.3f}", f"{duration:.3f}"))
+                for name, start, duration in phases
+            ],
+        )
+
+    def _get_phases(self):
+        return self._profile.phases()
@@ -0,0 +1,85 @@
+import grp
+import logging
+import os
+from os import getenv
+
+import zmq
+
+logger = logging.getLogger(__name__)
+
+# Every socket is bound on TCP and, where possible, on a Unix domain socket
+# in IPC_DIRECTORY. The request socket can shut the device down, so the Unix
+# domain sockets can only be used by root, unless IPC_GROUP names a group whose
+# members may use them too.
+IPC_DIRECTORY = getenv("PT_IPC_DIRECTORY", "/run/pi-topd")
+IPC_GROUP = getenv("PT_IPC_GROUP", "")
+
+
+class Endpoint:
+    def __init__(self, name, port):
+        self.name = name
+        self.port = port
+
+    @property
+    def tcp_uri(self):
+        return f"tcp://*:{self.port}"
+
+    @property
+    def ipc_path(self):
+        return os.path.join(IPC_DIRECTORY, f"{self.name}.sock")
+
+    @property
+    def ipc_uri(self):
+        return f"ipc://{self.ipc_path}"
+
+    def client_uri(self, host="127.0.0.1"):
+        """The URI a client should connect to: the Unix domain socket if it
+        exists and this process may use it, otherwise TCP."""
+        if os.access(self.ipc_path, os.R_OK | os.W_OK):
+            return self.ipc_uri
+        return f"tcp://{host}:{self.port}"
+
+
+PUBLISH = Endpoint("publish", 3781)
+REQUEST = Endpoint("request", 3782)
+BINARY_PUBLISH = Endpoint("publish-binary", 3783)
+TOPIC_PUBLISH = Endpoint("publish-topics", 3784)
+
+
+def bind(socket, endpoint):
+    """Bind a ZeroMQ socket to an endpoint's TCP port and Unix domain socket.
+
+    Failing to bind the TCP port raises ZMQError as usual; the Unix
+    domain socket is optional, so failing to set it up is only logged.
+    """
+    socket.bind(endpoint.tcp_uri)
+
+    try:
+        os.makedirs(IPC_DIRECTORY, mode=0o755, exist_ok=True)
+        socket.bind(endpoint.ipc_uri)
+    except (OSError, zmq.ZMQError) as e:
+        logger.warning(f"Unable to bind {endpoint.ipc_uri} - using TCP only: {e}")
+        return
+
+    try:
+        _restrict_access(endpoint.ipc_path)
+    except OSError as e:
+        logger.warning(
+            f"Unable to set permissions of {endpoint.ipc_path} - using TCP only: {e}"
+        )
+        socket.unbind(endpoint.ipc_uri)
+
+
+def _restrict_access(path):
+    if IPC_GROUP == "":
+        os.chmod(path, 0o600)
+        return
+
+    try:
+        group_id = grp.getgrnam(IPC_GROUP).gr_gid
+    except KeyError:
+        logger.warning(f"Group '{IPC_GROUP}' not found - {path} is only usable by root")
+        os.chmod(path, 0o600)
+        return
+    os.chown(path, -1, group_id)
+    os.chmod(path, 0o660)
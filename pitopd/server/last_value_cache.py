@@ -0,0 +1,42 @@
+from threading import Lock
+
+from pitop.common.ptdm import Message
+
+# Messages that describe part of the device's current state. Only the latest
+# message for each part is kept, e.g. the lid being closed replaces it being
+# opened.
+_STATE_KEYS = {
+    Message.PUB_BRIGHTNESS_CHANGED: "brightness",
+    Message.PUB_SCREEN_BLANKED: "screen_blanked",
+    Message.PUB_SCREEN_UNBLANKED: "screen_blanked",
+    Message.PUB_LID_OPENED: "lid_open",
+    Message.PUB_LID_CLOSED: "lid_open",
+    Message.PUB_BATTERY_STATE_CHANGED: "battery",
+    Message.PUB_OLED_CONTROL_CHANGED: "oled_control",
+    Message.PUB_OLED_SPI_BUS_CHANGED: "oled_spi_bus",
+    Message.PUB_PITOPD_READY: "ready",
+}
+
+
+class LastValueCache:
+    """Remembers the latest published message for each part of the device's
+    state, so that it can be sent to clients that start after it was
+    published."""
+
+    def __init__(self):
+        self._last_values = dict()
+        self._lock = Lock()
+
+    def update(self, message_id, message_string):
+        state_key = _STATE_KEYS.get(message_id)
+        if state_key is None:
+            return
+
+        with self._lock:
+            # Keep the order in which each part was first published
+            self._last_values[state_key] = message_string
+
+    def messages(self):
+        """The latest message string for each part of the state."""
+        with self._lock:
+            return list(self._last_values.values())
@@ -1,24 +1,70 @@
 import logging
 import traceback
 from os import getenv
-from threading import Lock
+from queue import Full, Queue
+from threading import Lock, Thread
 
 import zmq
 from pitop.common.ptdm import Message
 
+from ..publish_throttle import PublishThrottle, TopicPolicy
+from . import binary_protocol, endpoints, topics
+from .last_value_cache import LastValueCache
+
 logger = logging.getLogger(__name__)
 
 
 # Creates a server for clients to connect to,
 # and publishes state change messages to these clients
+#
+# Messages that report a changing value are rate limited, keeping the latest
+# value; events such as button presses are always sent.
+#
+# Messages are also published on the topic port, prefixed with their topic so
+# that subscribers can filter them (see topics).
+#
+# The latest message for each part of the device's state is kept in a last
+# value cache, so that clients that start later can request it (see
+# state_request).
+#
+# If PT_PUBLISH_BINARY is set, messages are also published on a second port
+# in the binary format in binary_protocol.
+#
+# Messages are queued and sent by a single sender thread that owns the
+# sockets, so publishing never blocks the hub, peripheral or idle monitor
+# threads. If the queue is full, the message is dropped and counted.
 class PublishServer:
+    BRIGHTNESS_PUBLISH_INTERVAL = 0.2
+    QUEUE_LENGTH = 256
+
     def __init__(self):
         self.emit_messages = False
         self._socket_lock = Lock()
         self._shutting_down = False
         self._zmq_context = None
         self._zmq_socket = None
+        self._topic_socket = None
+        self._binary_socket = None
+        self.last_value_cache = LastValueCache()
+        self._queue = Queue(maxsize=self.QUEUE_LENGTH)
+        self._dropped_message_count = 0
+        self._dropped_message_count_lock = Lock()
+        self._sender_thread = Thread(target=self._sender_thread_method, daemon=True)
+        self._enable_binary = getenv("PT_PUBLISH_BINARY", "0") == "1"
         self._enable_battery_logging = getenv("PT_LOG_BATTERY_CHANGE", "0") == "1"
+        self._throttle = PublishThrottle(
+            self._publish,
+            {
+                # Sent straight away if the charging state changes
+                Message.PUB_BATTERY_STATE_CHANGED: TopicPolicy(
+                    float(getenv("PT_BATTERY_PUBLISH_INTERVAL", "10")),
+                    key=lambda parameters: parameters[0],
+                ),
+                Message.PUB_BRIGHTNESS_CHANGED: TopicPolicy(
+                    self.BRIGHTNESS_PUBLISH_INTERVAL
+                ),
+            },
+        )
 
     def start_listening(self):
         logger.debug("Opening publisher socket...")
@@ -28,7 +74,14 @@ class PublishServer:
 
             self._zmq_context = zmq.Context()
             self._zmq_socket = self._zmq_context.socket(zmq.PUB)
-            self._zmq_socket.bind("tcp://*:3781")
+            endpoints.bind(self._zmq_socket, endpoints.PUBLISH)
+            self._topic_socket = self._zmq_context.socket(zmq.PUB)
+            endpoints.bind(self._topic_socket, endpoints.TOPIC_PUBLISH)
+
+            self._sender_thread.start()
+            if self._enable_binary:
+                self._binary_socket = self._zmq_context.socket(zmq.PUB)
+                endpoints.bind(self._binary_socket, endpoints.BINARY_PUBLISH)
             logger.debug("Publish server ready...")
 
             return True
@@ -45,12 +98,32 @@ class PublishServer:
     def stop_listening(self):
         logger.debug("Closing publisher socket...")
 
+        self._throttle.close()
+        stats = self.stats()
+        logger.info(f"Publish queue: {stats['dropped']} messages dropped")
+        for message_id, counts in stats["rate_limited"].items():
+            logger.info(
+                f"{Message.name_for_id(message_id)}: {counts['sent']} sent,"
+                f" {counts['suppressed']} suppressed"
+            )
+
         try:
             self._socket_lock.acquire()
             self._shutting_down = True
 
+            if self._sender_thread.is_alive():
+                # Queued messages are sent before the sender thread stops
+                try:
+                    self._queue.put(None, timeout=1)
+                except Full:
+                    logger.warning("Publish queue is still full - not waiting for it")
+                self._sender_thread.join(timeout=2)
+
             if self._zmq_socket is not None:
                 self._zmq_socket.close()
+                self._topic_socket.close()
+                if self._binary_socket is not None:
+                    self._binary_socket.close()
                 self._zmq_context.destroy()
             logger.debug("Closed publisher socket.")
 
@@ -92,7 +165,6 @@ class PublishServer:
         self._send_message(
             Message.PUB_BATTERY_STATE_CHANGED,
             [connected, new_capacity, new_time, new_wattage],
-            log_message=self._enable_battery_logging,
         )
 
     def publish_screen_blanked(self):
@@ -156,10 +228,22 @@ class PublishServer:
     def publish_pitopd_ready(self):
         self._send_message(Message.PUB_PITOPD_READY)
 
+    def stats(self):
+        """Publish queue depth, messages dropped because the queue was full,
+        and messages sent and suppressed for each rate limited message type."""
+        return {
+            "queue_depth": self._queue.qsize(),
+            "dropped": self._dropped_message_count,
+            "rate_limited": self._throttle.stats(),
+        }
+
     # Internal functions
-    def _send_message(self, message_id, parameters=None, log_message=True):
+    def _send_message(self, message_id, parameters=None):
         if parameters is None:
             parameters = list()
+        self._throttle.submit(message_id, parameters)
+
+    def _publish(self, message_id, parameters):
         message = Message.from_parts(message_id, parameters)
 
         if self._zmq_socket is None or not self.emit_messages:
@@ -172,24 +256,61 @@ class PublishServer:
             logger.info(msg)
             return
 
-        if log_message:
-            logger.info("Publishing message: " + message.message_friendly_string())
+        if self._shutting_down:
+            return
 
         try:
-            self._socket_lock.acquire()
-            if self._shutting_down is True:
-                return
+            self._queue.put_nowait((message_id, parameters, message))
+        except Full:
+            # Messages are published from several threads
+            with self._dropped_message_count_lock:
+                self._dropped_message_count += 1
+            logger.debug(
+                "Publish queue full - dropping message: "
+                + message.message_friendly_string()
+            )
+
+    def _sender_thread_method(self):
+        while True:
+            queued_message = self._queue.get()
+            if queued_message is None:
+                break
+
+            # A message that cannot be sent must not stop the ones after it
+            try:
+                self._send(*queued_message)
+            except Exception as e:
+                logger.error(f"Error publishing message {queued_message[0]}: {e}")
+                logger.info(traceback.format_exc())
+
+    def _send(self, message_id, parameters, message):
+        topic = topics.topic_for_message(message_id)
+        # Button messages are sent on every edge, so only logged when debugging
+        if topic == topics.BUTTONS or (
+            message_id == Message.PUB_BATTERY_STATE_CHANGED
+            and not self._enable_battery_logging
+        ):
+            logger.debug("Publishing message: " + message.message_friendly_string())
+        else:
+            logger.info("Publishing message: " + message.message_friendly_string())
 
-            self._zmq_socket.send_string(message.to_string())
+        try:
+            message_string = message.to_string()
+            # Cached first, so that a client that subscribed before requesting
+            # the state is sent any message newer than the state it is given
+            self.last_value_cache.update(message_id, message_string)
+            self._zmq_socket.send_string(message_string)
+            self._topic_socket.send_multipart([topic.encode(), message_string.encode()])
+            if self._binary_socket is not None:
+                self._binary_socket.send_multipart(
+                    binary_protocol.encode(message_id, parameters), copy=False
+                )
             logger.debug("Published message: " + message.message_friendly_string())
 
         except zmq.error.ZMQError as e:
             logger.error("Communication error in publish server: " + str(e))
             logger.info(traceback.format_exc())
 
-        finally:
-            self._socket_lock.release()
-
     @staticmethod
     def _check_type(var, var_type):
         if isinstance(var, var_type) is False:
@@ -0,0 +1,240 @@
+import logging
+from threading import Thread
+
+from pitop.common.common_ids import DeviceID
+from pitop.common.ptdm import Message
+
+logger = logging.getLogger(__name__)
+
+
+def parse_request(request):
+    """Split a request string into its message ID and parameter strings."""
+    message_parts = request.split("|")
+    try:
+        message_id = int(message_parts[0])
+    except ValueError:
+        raise ValueError(f"Message id '{message_parts[0]}' is not an integer")
+    return message_id, message_parts[1:]
+
+
+def encode_message(message_id, parameters=()):
+    return "|".join([str(message_id)] + [str(parameter) for parameter in parameters])
+
+
+class RequestHandler:
+    """Handles requests with one message ID.
+
+    ``callback`` is called with the request's parameters, converted to
+    ``parameter_types``, and returns the response's parameters, which are
+    converted to ``response_types``. If the response has no parameters,
+    the callback's return value is ignored. ``encode_response`` turns the
+    response ID and parameters into the string that is sent back.
+
+    Inline handlers are run by the thread that receives the request, so
+    they must be quick and not touch hardware. Serialised handlers are run
+    one at a time.
+    """
+
+    def __init__(
+        self,
+        request_id,
+        callback,
+        parameter_types=(),
+        response_types=(),
+        response_id=None,
+        encode_response=encode_message,
+        inline=False,
+        serialised=False,
+        name=None,
+        log_requests=True,
+    ):
+        self.request_id = request_id
+        self.response_id = request_id + 100 if response_id is None else response_id
+        self.callback = callback
+        self.parameter_types = tuple(parameter_types)
+        self.response_types = tuple(response_types)
+        self.encode_response = encode_response
+        self.inline = inline
+        self.serialised = serialised
+        self.log_requests = log_requests
+
+        if name is None:
+            try:
+                name = Message.name_for_id(request_id)
+            except KeyError:
+                name = f"REQ_{request_id}"
+        self.name = name
+
+    def parse_parameters(self, parameters):
+        if len(parameters) != len(self.parameter_types):
+            raise ValueError(
+                "Message did not have the correct number of parameters"
+                f" ({len(self.parameter_types)})"
+            )
+        return [
+            parameter_type(parameter)
+            for parameter_type, parameter in zip(self.parameter_types, parameters)
+        ]
+
+    def handle(self, parameters):
+        result = self.callback(*self.parse_parameters(parameters))
+        if not self.response_types:
+            return self.encode_response(self.response_id)
+        if len(self.response_types) == 1:
+            result = (result,)
+        return self.encode_response(
+            self.response_id,
+            [
+                response_type(value)
+                for response_type, value in zip(self.response_types, result)
+            ],
+        )
+
+
+class RequestHandlerRegistry:
+    def __init__(self):
+        self._handlers = dict()
+
+    def register(self, handler):
+        if handler.request_id in self._handlers:
+            raise ValueError(
+                f"A handler for request {handler.request_id} is already registered"
+            )
+        self._handlers[handler.request_id] = handler
+
+    def unregister(self, request_id):
+        self._handlers.pop(request_id, None)
+
+    def get(self, request_id):
+        return self._handlers.get(request_id)
+
+
+def _int_or_default(value, default=-1):
+    return default if value is None else int(value)
+
+
+def create_default_handlers(callback_client):
+    """Handlers for the requests in pitop.common.ptdm.Message, forwarding to
+    the app's on_request_* callbacks."""
+
+    def get_device_id():
+        device_id = callback_client.on_request_get_device_id()
+        if isinstance(device_id, DeviceID):
+            device_id = device_id.value
+        return device_id
+
+    def set_oled_spi_bus(spi_bus):
+        # Operation takes a little while. We need to return a response ASAP
+        # so we put this into a thread
+        Thread(
+            target=callback_client.on_request_set_oled_spi_bus, args=[spi_bus]
+        ).start()
+
+    return [
+        RequestHandler(Message.REQ_PING, lambda: None, inline=True),
+        RequestHandler(
+            Message.REQ_GET_DEVICE_ID,
+            get_device_id,
+            response_types=[_int_or_default],
+            inline=True,
+        ),
+        RequestHandler(
+            Message.REQ_GET_BRIGHTNESS,
+            callback_client.on_request_get_brightness,
+            response_types=[_int_or_default],
+            inline=True,
+        ),
+        RequestHandler(
+            Message.REQ_SET_BRIGHTNESS,
+            callback_client.on_request_set_brightness,
+            parameter_types=[int],
+            serialised=True,
+        ),
+        RequestHandler(
+            Message.REQ_INCREMENT_BRIGHTNESS,
+            callback_client.on_request_increment_brightness,
+            serialised=True,
+        ),
+        RequestHandler(
+            Message.REQ_DECREMENT_BRIGHTNESS,
+            callback_client.on_request_decrement_brightness,
+            serialised=True,
+        ),
+        RequestHandler(
+            Message.REQ_BLANK_SCREEN,
+            callback_client.on_request_blank_screen,
+            serialised=True,
+        ),
+        RequestHandler(
+            Message.REQ_UNBLANK_SCREEN,
+            callback_client.on_request_unblank_screen,
+            serialised=True,
+        ),
+        RequestHandler(
+            Message.REQ_GET_BATTERY_STATE,
+            callback_client.on_request_battery_state,
+            response_types=[int, int, int, int],
+            inline=True,
+            # Reduce output noise from RPi's polling lxpanel plugin
+            log_requests=False,
+        ),
+        RequestHandler(
+            Message.REQ_GET_PERIPHERAL_ENABLED,
+            callback_client.on_request_get_peripheral_enabled,
+            parameter_types=[int],
+            response_types=[lambda enabled: int(enabled is True)],
+            inline=True,
+        ),
+        RequestHandler(
+            Message.REQ_GET_SCREEN_BLANKING_TIMEOUT,
+            callback_client.on_request_get_screen_blanking_timeout,
+            response_types=[_int_or_default],
+            inline=True,
+        ),
+        RequestHandler(
+            Message.REQ_SET_SCREEN_BLANKING_TIMEOUT,
+            callback_client.on_request_set_screen_blanking_timeout,
+            parameter_types=[int],
+        ),
+        RequestHandler(
+            Message.REQ_GET_LID_OPEN_STATE,
+            callback_client.on_request_get_lid_open_state,
+            response_types=[lambda lid_open: int(lid_open is True)],
+            inline=True,
+        ),
+        RequestHandler(
+            Message.REQ_GET_SCREEN_BACKLIGHT_STATE,
+            callback_client.on_request_get_screen_backlight_state,
+            response_types=[_int_or_default],
+            inline=True,
+        ),
+        RequestHandler(
+            Message.REQ_SET_SCREEN_BACKLIGHT_STATE,
+            callback_client.on_request_set_screen_backlight_state,
+            parameter_types=[int],
+            serialised=True,
+        ),
+        RequestHandler(
+            Message.REQ_GET_OLED_CONTROL,
+            callback_client.on_request_get_oled_control,
+            response_types=[_int_or_default],
+            inline=True,
+        ),
+        RequestHandler(
+            Message.REQ_SET_OLED_CONTROL,
+            callback_client.on_request_set_oled_pi_control,
+            parameter_types=[int],
+            serialised=True,
+        ),
+        RequestHandler(
+            Message.REQ_GET_OLED_SPI_BUS,
+            callback_client.on_request_get_oled_spi_bus,
+            response_types=[_int_or_default],
+        ),
+        RequestHandler(
+            Message.REQ_SET_OLED_SPI_BUS,
+            set_oled_spi_bus,
+            parameter_types=[int],
+            serialised=True,
+        ),
+    ]
@@ -1,35 +1,83 @@
 import logging
 import traceback
-from threading import Thread
-from time import sleep
+from collections import deque
+from threading import Lock, Thread
 
 import zmq
-from pitop.common.common_ids import DeviceID
 from pitop.common.ptdm import Message
 
+from . import endpoints
+from .batch import BatchRequestHandler
+from .request_handlers import (
+    RequestHandlerRegistry,
+    create_default_handlers,
+    encode_message,
+    parse_request,
+)
+
 logger = logging.getLogger(__name__)
 
 
+def _get_message_name(message_id):
+    try:
+        return Message.name_for_id(message_id)
+    except KeyError:
+        return f"RSP_{message_id}"
+
+
+def _friendly_string(name, parameters):
+    return " ".join([name] + list(parameters))
+
+
 # Creates a server for clients to connect to, and then responds to
 # queries from these clients for device-related debug information.
+#
+# Requests are received on a ROUTER socket. Cheap requests are answered
+# inline; everything else is handed to a fixed pool of worker threads, so that
+# one slow request does not hold up the others. Workers tell the server when
+# they are free, and each request goes to a free worker - or waits in a short
+# queue until one is - so a request is never stuck behind a slow one while
+# another worker is idle.
 class RequestServer:
     _thread = Thread()
 
+    WORKER_COUNT = 4
+    # Requests that can wait for a free worker before new ones are refused
+    REQUEST_QUEUE_LENGTH = 16
+    _WORKER_ENDPOINT = "inproc://pitopd-request-workers"
+    _WORKER_READY = b"READY"
+
     def __init__(self):
         self._thread = Thread(target=self._thread_method)
+        self._worker_threads = list()
         self._continue = False
         self._callback_client = None
+        self._handlers = RequestHandlerRegistry()
+        self._hardware_lock = Lock()
         self._zmq_context = zmq.Context()
-        self._zmq_socket = self._zmq_context.socket(zmq.REP)
+        self._zmq_socket = self._zmq_context.socket(zmq.ROUTER)
+        self._worker_socket = self._zmq_context.socket(zmq.ROUTER)
+        # Only used by the server thread
+        self._idle_workers = deque()
+        self._queued_requests = deque()
+        self._requests_in_flight = 0
 
     def initialise(self, callback_client):
         self._callback_client = callback_client
+        for handler in create_default_handlers(callback_client):
+            self._handlers.register(handler)
+        self._handlers.register(BatchRequestHandler(self._process_worker_request))
+
+    def register_handler(self, handler):
+        """Add a handler for a request ID that is not already handled."""
+        self._handlers.register(handler)
 
     def start_listening(self):
         logger.debug("Opening request socket...")
 
         try:
-            self._zmq_socket.bind("tcp://*:3782")
+            endpoints.bind(self._zmq_socket, endpoints.REQUEST)
+            self._worker_socket.bind(self._WORKER_ENDPOINT)
             logger.debug("Request server ready...")
 
         except zmq.error.ZMQError as e:
@@ -38,9 +86,11 @@ class RequestServer:
 
             return False
 
-        sleep(0.5)
-
         self._continue = True
+        for _ in range(self.WORKER_COUNT):
+            worker_thread = Thread(target=self._worker_thread_method)
+            worker_thread.start()
+            self._worker_threads.append(worker_thread)
         self._thread.start()
 
         return True
@@ -51,8 +101,11 @@ class RequestServer:
         self._continue = False
         if self._thread.is_alive():
             self._thread.join()
+        for worker_thread in self._worker_threads:
+            worker_thread.join()
 
         self._zmq_socket.close()
+        self._worker_socket.close()
         self._zmq_context.destroy()
 
         logger.debug("Closed responder socket.")
@@ -60,186 +113,128 @@ class RequestServer:
     def _thread_method(self):
         logger.debug("Listening for requests...")
 
-        while self._continue:
-            poller = zmq.Poller()
-            poller.register(self._zmq_socket, zmq.POLLIN)
-
-            events = poller.poll(500)
+        poller = zmq.Poller()
+        poller.register(self._zmq_socket, zmq.POLLIN)
+        poller.register(self._worker_socket, zmq.POLLIN)
 
-            if len(events) > 0:
-                request = self._zmq_socket.recv_string()
-                logger.debug("Request received: " + request)
+        while self._continue:
+            events = dict(poller.poll(500))
 
-                response = self._process_request(request)
+            if self._worker_socket in events:
+                self._handle_worker_message()
 
-                logger.debug("Sending response: " + response)
-                self._zmq_socket.send_string(response)
+            if self._zmq_socket in events:
+                self._handle_frontend_request()
 
-    def _process_request(self, request):
-        valid_message_format = False
-        try:
-            message = Message.from_string(request)
-            logger.debug("Received request: " + message.message_friendly_string())
-
-            if message.message_id() == Message.REQ_PING:
-                response = Message.from_parts(Message.RSP_PING, list())
-
-            elif message.message_id() == Message.REQ_GET_DEVICE_ID:
-                device_id = self._callback_client.on_request_get_device_id()
-                if device_id is None:
-                    device_id = -1
-                if isinstance(device_id, DeviceID):
-                    device_id = device_id.value
-
-                response = Message.from_parts(Message.RSP_GET_DEVICE_ID, [device_id])
-
-            elif message.message_id() == Message.REQ_GET_BRIGHTNESS:
-                brightness = self._callback_client.on_request_get_brightness()
-                if brightness is None:
-                    brightness = -1
-                response = Message.from_parts(Message.RSP_GET_BRIGHTNESS, [brightness])
-
-            elif message.message_id() == Message.REQ_SET_BRIGHTNESS:
-                self._callback_client.on_request_set_brightness(
-                    int(message.parameters[0])
-                )
-                response = Message.from_parts(Message.RSP_SET_BRIGHTNESS, list())
-
-            elif message.message_id() == Message.REQ_INCREMENT_BRIGHTNESS:
-                self._callback_client.on_request_increment_brightness()
-                response = Message.from_parts(Message.RSP_INCREMENT_BRIGHTNESS, list())
-
-            elif message.message_id() == Message.REQ_DECREMENT_BRIGHTNESS:
-                self._callback_client.on_request_decrement_brightness()
-                response = Message.from_parts(Message.RSP_DECREMENT_BRIGHTNESS, list())
-
-            elif message.message_id() == Message.REQ_BLANK_SCREEN:
-                self._callback_client.on_request_blank_screen()
-                response = Message.from_parts(Message.RSP_BLANK_SCREEN, list())
-
-            elif message.message_id() == Message.REQ_UNBLANK_SCREEN:
-                self._callback_client.on_request_unblank_screen()
-                response = Message.from_parts(Message.RSP_UNBLANK_SCREEN, list())
-
-            elif message.message_id() == Message.REQ_GET_BATTERY_STATE:
-                (
-                    charging_state,
-                    capacity,
-                    time_remaining,
-                    wattage,
-                ) = self._callback_client.on_request_battery_state()
-                response = Message.from_parts(
-                    Message.RSP_GET_BATTERY_STATE,
-                    [charging_state, capacity, time_remaining, wattage],
-                )
+    def _handle_worker_message(self):
+        worker_id, _, *message = self._worker_socket.recv_multipart()
 
-            elif message.message_id() == Message.REQ_GET_PERIPHERAL_ENABLED:
-                enabled_bool = self._callback_client.on_request_get_peripheral_enabled(
-                    int(message.parameters[0])
-                )
-                enabled_int = int(enabled_bool is True)
-                response = Message.from_parts(
-                    Message.RSP_GET_PERIPHERAL_ENABLED, [enabled_int]
-                )
+        if message != [self._WORKER_READY]:
+            # A worker has finished - route its response back to the client
+            self._zmq_socket.send_multipart(message)
+            self._requests_in_flight -= 1
 
-            elif message.message_id() == Message.REQ_GET_SCREEN_BLANKING_TIMEOUT:
-                timeout = self._callback_client.on_request_get_screen_blanking_timeout()
-                if timeout is None:
-                    timeout = -1
-                response = Message.from_parts(
-                    Message.RSP_GET_SCREEN_BLANKING_TIMEOUT, [timeout]
-                )
+        self._idle_workers.append(worker_id)
+        self._dispatch_queued_requests()
 
-            elif message.message_id() == Message.REQ_SET_SCREEN_BLANKING_TIMEOUT:
-                self._callback_client.on_request_set_screen_blanking_timeout(
-                    int(message.parameters[0])
-                )
-                response = Message.from_parts(
-                    Message.RSP_SET_SCREEN_BLANKING_TIMEOUT, list()
-                )
+    def _handle_frontend_request(self):
+        frames = self._zmq_socket.recv_multipart()
+        envelope = frames[:-1]
+        try:
+            request = frames[-1].decode()
+        except UnicodeDecodeError as e:
+            # Rejected here, so workers are only sent requests that decode
+            logger.error("Error decoding request: " + str(e))
+            response = encode_message(Message.RSP_ERR_MALFORMED)
+            self._zmq_socket.send_multipart(envelope + [response.encode()])
+            return
+        logger.debug("Request received: " + request)
+
+        handler = self._get_handler(request)
+        if handler is not None and handler.inline:
+            response = self._process_request(request)
+            logger.debug("Sending response: " + response)
+            self._zmq_socket.send_multipart(envelope + [response.encode()])
+            return
+
+        if self._requests_in_flight >= self.WORKER_COUNT + self.REQUEST_QUEUE_LENGTH:
+            logger.warning("All request workers are busy - rejecting request")
+            response = encode_message(Message.RSP_ERR_SERVER)
+            self._zmq_socket.send_multipart(envelope + [response.encode()])
+            return
+
+        self._requests_in_flight += 1
+        self._queued_requests.append(frames)
+        self._dispatch_queued_requests()
+
+    def _dispatch_queued_requests(self):
+        while self._idle_workers and self._queued_requests:
+            self._worker_socket.send_multipart(
+                [self._idle_workers.popleft(), b""] + self._queued_requests.popleft()
+            )
+
+    def _worker_thread_method(self):
+        socket = self._zmq_context.socket(zmq.REQ)
+        socket.connect(self._WORKER_ENDPOINT)
+        socket.send(self._WORKER_READY)
+
+        poller = zmq.Poller()
+        poller.register(socket, zmq.POLLIN)
 
-            elif message.message_id() == Message.REQ_GET_LID_OPEN_STATE:
-                lid_open_bool = self._callback_client.on_request_get_lid_open_state()
-                lid_open_int = int(lid_open_bool is True)
-                response = Message.from_parts(
-                    Message.RSP_GET_LID_OPEN_STATE, [lid_open_int]
-                )
+        while self._continue:
+            if not poller.poll(500):
+                continue
 
-            elif message.message_id() == Message.REQ_GET_SCREEN_BACKLIGHT_STATE:
-                backlight_state = (
-                    self._callback_client.on_request_get_screen_backlight_state()
-                )
-                if backlight_state is None:
-                    backlight_state = -1
-                response = Message.from_parts(
-                    Message.RSP_GET_SCREEN_BACKLIGHT_STATE, [backlight_state]
-                )
+            *envelope, request = socket.recv_multipart()
+            response = self._process_worker_request(request.decode())
+            logger.debug("Sending response: " + response)
+            socket.send_multipart(envelope + [response.encode()])
 
-            elif message.message_id() == Message.REQ_SET_SCREEN_BACKLIGHT_STATE:
-                self._callback_client.on_request_set_screen_backlight_state(
-                    int(message.parameters[0])
-                )
-                response = Message.from_parts(
-                    Message.RSP_SET_SCREEN_BACKLIGHT_STATE, list()
-                )
+        socket.close()
 
-            elif message.message_id() == Message.REQ_GET_OLED_CONTROL:
-                oled_pi_control_state = (
-                    self._callback_client.on_request_get_oled_control()
-                )
-                if oled_pi_control_state is None:
-                    oled_pi_control_state = -1
-                response = Message.from_parts(
-                    Message.RSP_GET_OLED_CONTROL, [oled_pi_control_state]
-                )
+    def _process_worker_request(self, request):
+        handler = self._get_handler(request)
+        if handler is not None and handler.serialised:
+            with self._hardware_lock:
+                return self._process_request(request)
+        return self._process_request(request)
 
-            elif message.message_id() == Message.REQ_SET_OLED_CONTROL:
-                self._callback_client.on_request_set_oled_pi_control(
-                    int(message.parameters[0])
-                )
-                response = Message.from_parts(Message.RSP_SET_OLED_CONTROL, list())
-
-            elif message.message_id() == Message.REQ_GET_OLED_SPI_BUS:
-                oled_spi_state = self._callback_client.on_request_get_oled_spi_bus()
-                if oled_spi_state is None:
-                    oled_spi_state = -1
-                response = Message.from_parts(
-                    Message.RSP_GET_OLED_SPI_BUS, [oled_spi_state]
-                )
+    def _get_handler(self, request):
+        try:
+            return self._handlers.get(int(request.split("|", 1)[0]))
+        except ValueError:
+            return None
 
-            elif message.message_id() == Message.REQ_SET_OLED_SPI_BUS:
-                # Operation takes a little while. We need to return a response ASAP
-                # so we put this into a thread
-                Thread(
-                    target=self._callback_client.on_request_set_oled_spi_bus,
-                    args=[int(message.parameters[0])],
-                ).start()
-                response = Message.from_parts(Message.RSP_SET_OLED_SPI_BUS)
+    def _process_request(self, request):
+        try:
+            message_id, parameters = parse_request(request)
+            handler = self._handlers.get(message_id)
 
-            else:
+            if handler is None:
                 logger.error("Unsupported request received: " + request)
-                response = Message.from_parts(Message.RSP_ERR_UNSUPPORTED, list())
+                return encode_message(Message.RSP_ERR_UNSUPPORTED)
 
-            valid_message_format = True
+            response = handler.handle(parameters)
 
         except ValueError as e:
             logger.error("Error processing message: " + str(e))
             logger.info(traceback.format_exc())
-            response = Message.from_parts(Message.RSP_ERR_MALFORMED, list())
+            return encode_message(Message.RSP_ERR_MALFORMED)
 
         except Exception as e:
             logger.error("Unknown error processing message: " + str(e))
             logger.info(traceback.format_exc())
-            response = Message.from_parts(Message.RSP_ERR_SERVER, list())
-
-        if valid_message_format:
-            # Reduce output noise from RPi's polling lxpanel plugin
-            if message.message_id() != Message.REQ_GET_BATTERY_STATE:
-                logger.info(
-                    "Recv: "
-                    + message.message_friendly_string()
-                    + " - Send: "
-                    + response.message_friendly_string()
+            return encode_message(Message.RSP_ERR_SERVER)
+
+        if handler.log_requests:
+            _, response_parameters = parse_request(response)
+            logger.info(
+                "Recv: "
+                + _friendly_string(handler.name, parameters)
+                + " - Send: "
+                + _friendly_string(
+                    _get_message_name(handler.response_id), response_parameters
                 )
+            )
 
-        return response.to_string()
+        return response
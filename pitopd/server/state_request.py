@@ -0,0 +1,45 @@
+from .request_handlers import RequestHandler, encode_message
+
+# Outside pitop.common.ptdm.Message's ID ranges, alongside REQ_BATCH
+REQ_GET_STATE = 1002
+RSP_GET_STATE = 2002
+
+# Each message is one parameter of the response, so the separator inside
+# them is swapped for one that is not used by Message
+_SUB_MESSAGE_SEPARATOR = ";"
+
+
+def decode_state_response(response):
+    """Split a state response into the published message strings that it
+    carries."""
+    message_parts = response.split("|")
+    if int(message_parts[0]) != RSP_GET_STATE:
+        raise ValueError(f"Not a state response: {response}")
+    return [part.replace(_SUB_MESSAGE_SEPARATOR, "|") for part in message_parts[1:]]
+
+
+class StateRequestHandler(RequestHandler):
+    """Handles REQ_GET_STATE, answering with the latest published message for
+    each part of the device's state, e.g. the lid, brightness and ready
+    messages.
+
+    A client that subscribes first and then sends this request knows the
+    whole state without waiting for it to change or requesting each
+    value. Only the client that asks is sent the messages.
+    """
+
+    def __init__(self, last_value_cache):
+        super().__init__(
+            REQ_GET_STATE,
+            last_value_cache.messages,
+            response_id=RSP_GET_STATE,
+            name="REQ_GET_STATE",
+            inline=True,
+        )
+
+    def handle(self, parameters):
+        messages = self.callback(*self.parse_parameters(parameters))
+        return encode_message(
+            self.response_id,
+            [message.replace("|", _SUB_MESSAGE_SEPARATOR) for message in messages],
+        )
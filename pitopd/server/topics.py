@@ -0,0 +1,63 @@
+from pitop.common.ptdm import Message
+
+# Topics that published messages are grouped under on the topic port. Each
+# message is sent as a topic frame followed by the usual text message, so
+# subscribers can filter by topic prefix and ZeroMQ drops the messages they
+# did not ask for before they are sent.
+
+BATTERY = "battery/"
+BUTTONS = "buttons/"
+DISPLAY = "display/"
+PERIPHERALS = "peripherals/"
+POWER = "power/"
+
+_MESSAGE_TOPICS = {
+    Message.PUB_BATTERY_STATE_CHANGED: BATTERY,
+    Message.PUB_LOW_BATTERY_WARNING: BATTERY,
+    Message.PUB_CRITICAL_BATTERY_WARNING: BATTERY,
+    Message.PUB_V3_BUTTON_UP_PRESSED: BUTTONS,
+    Message.PUB_V3_BUTTON_UP_RELEASED: BUTTONS,
+    Message.PUB_V3_BUTTON_DOWN_PRESSED: BUTTONS,
+    Message.PUB_V3_BUTTON_DOWN_RELEASED: BUTTONS,
+    Message.PUB_V3_BUTTON_SELECT_PRESSED: BUTTONS,
+    Message.PUB_V3_BUTTON_SELECT_RELEASED: BUTTONS,
+    Message.PUB_V3_BUTTON_CANCEL_PRESSED: BUTTONS,
+    Message.PUB_V3_BUTTON_CANCEL_RELEASED: BUTTONS,
+    Message.PUB_V3_BUTTON_POWER_PRESSED: BUTTONS,
+    Message.PUB_V3_BUTTON_POWER_RELEASED: BUTTONS,
+    Message.PUB_BRIGHTNESS_CHANGED: DISPLAY,
+    Message.PUB_SCREEN_BLANKED: DISPLAY,
+    Message.PUB_SCREEN_UNBLANKED: DISPLAY,
+    Message.PUB_LID_CLOSED: DISPLAY,
+    Message.PUB_LID_OPENED: DISPLAY,
+    Message.PUB_OLED_CONTROL_CHANGED: DISPLAY,
+    Message.PUB_OLED_SPI_BUS_CHANGED: DISPLAY,
+    Message.PUB_PERIPHERAL_CONNECTED: PERIPHERALS,
+    Message.PUB_PERIPHERAL_DISCONNECTED: PERIPHERALS,
+    Message.PUB_UNSUPPORTED_HARDWARE: PERIPHERALS,
+    Message.PUB_KEYBOARD_DOCKED: PERIPHERALS,
+    Message.PUB_KEYBOARD_UNDOCKED: PERIPHERALS,
+    Message.PUB_KEYBOARD_CONNECTED: PERIPHERALS,
+    Message.PUB_FAILED_KEYBOARD_CONNECT: PERIPHERALS,
+    Message.PUB_SHUTDOWN_REQUESTED: POWER,
+    Message.PUB_REBOOT_REQUIRED: POWER,
+    Message.PUB_PITOPD_READY: POWER,
+}
+
+
+def topic_for_message(message_id):
+    return _MESSAGE_TOPICS[message_id]
+
+
+def subscribe(socket, *topics):
+    """Subscribe a ZeroMQ SUB socket connected to the topic port to messages in
+    the given topics, e.g. subscribe(socket, topics.BUTTONS)."""
+    for topic in topics:
+        socket.subscribe(topic)
+
+
+def receive(socket):
+    """Receive a message from a SUB socket connected to the topic port,
+    returning its topic and the text message."""
+    topic, message = socket.recv_multipart()
+    return topic.decode(), message.decode()
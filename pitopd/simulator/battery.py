@@ -0,0 +1,114 @@
+from threading import Lock
+from time import monotonic
+
+# Battery pack voltage (mV) at points along its relative state of charge (%)
+DISCHARGE_CURVE = (
+    (0, 6000),
+    (5, 6600),
+    (10, 6900),
+    (20, 7150),
+    (50, 7450),
+    (80, 7850),
+    (100, 8300),
+)
+
+# Reported by fuel gauges for a time that does not apply, e.g. the time
+# until empty while charging
+NO_TIME = 0xFFFF
+
+
+def _interpolate(curve, x):
+    for (x0, y0), (x1, y1) in zip(curve, curve[1:]):
+        if x <= x1:
+            return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+    return curve[-1][1]
+
+
+class BatteryModel:
+    """A battery that charges and discharges at a constant current, with a
+    voltage that follows a discharge curve.
+
+    time_scale speeds up charging and discharging, e.g. a time_scale of
+    60 discharges the battery in minutes rather than hours.
+    """
+
+    def __init__(
+        self,
+        capacity=80.0,
+        charger_connected=True,
+        capacity_mah=4000,
+        charge_current_ma=1500,
+        discharge_current_ma=1000,
+        time_scale=1,
+        curve=DISCHARGE_CURVE,
+        clock=monotonic,
+    ):
+        self._capacity = float(capacity)
+        self._charger_connected = charger_connected
+        self._capacity_mah = capacity_mah
+        self._charge_current_ma = charge_current_ma
+        self._discharge_current_ma = discharge_current_ma
+        self._time_scale = time_scale
+        self._curve = curve
+        self._clock = clock
+        self._updated_at = clock()
+        self._lock = Lock()
+
+    @property
+    def capacity(self):
+        with self._lock:
+            self._update()
+            return self._capacity
+
+    @property
+    def charger_connected(self):
+        return self._charger_connected
+
+    def set_capacity(self, capacity):
+        with self._lock:
+            self._update()
+            self._capacity = float(min(max(capacity, 0), 100))
+
+    def set_charger_connected(self, connected):
+        with self._lock:
+            self._update()
+            self._charger_connected = connected
+
+    def relative_state_of_charge(self):
+        return int(round(self.capacity))
+
+    def current_ma(self):
+        """Positive while charging, negative while discharging."""
+        capacity = self.capacity
+        if not self._charger_connected:
+            return -self._discharge_current_ma
+        return self._charge_current_ma if capacity < 100 else 0
+
+    def voltage_mv(self):
+        return int(_interpolate(self._curve, self.capacity))
+
+    def time_to_empty_minutes(self):
+        if self._charger_connected:
+            return NO_TIME
+        return self._minutes(self.capacity, self._discharge_current_ma)
+
+    def time_to_full_minutes(self):
+        capacity = self.capacity
+        if not self._charger_connected or capacity >= 100:
+            return NO_TIME
+        return self._minutes(100 - capacity, self._charge_current_ma)
+
+    def _minutes(self, percentage, current_ma):
+        return int(percentage / 100 * self._capacity_mah / current_ma * 60)
+
+    def _update(self):
+        now = self._clock()
+        elapsed_hours = (now - self._updated_at) * self._time_scale / 3600
+        self._updated_at = now
+
+        if self._charger_connected:
+            change = self._charge_current_ma * elapsed_hours
+        else:
+            change = -self._discharge_current_ma * elapsed_hours
+        self._capacity += change / self._capacity_mah * 100
+        self._capacity = min(max(self._capacity, 0.0), 100.0)
@@ -0,0 +1,200 @@
+import errno
+import os
+from threading import Lock
+from time import sleep
+
+I2C_BUS_PATH = "/dev/i2c-1"
+SPI_DEVICE = (0, 1)
+
+# Standard mode I2C, with nine clock cycles per byte including the ACK
+I2C_BUS_SPEED_HZ = 100000
+_I2C_CLOCKS_PER_BYTE = 9
+
+
+def _no_device_error():
+    return OSError(errno.EREMOTEIO, os.strerror(errno.EREMOTEIO))
+
+
+class SimulatedI2CDevice:
+    """Stands in for pitop.common.i2c_device.I2CDevice.
+
+    Each transaction takes as long as the bytes take to send on the bus,
+    plus the same post-read and post-write delays as I2CDevice. The bus
+    is held for the whole transaction, as I2CDevice holds its lock.
+    """
+
+    def __init__(self, device, bus_lock, bus_speed_hz=I2C_BUS_SPEED_HZ):
+        self._device = device
+        self._bus_lock = bus_lock
+        self._byte_time = _I2C_CLOCKS_PER_BYTE / bus_speed_hz
+        self._post_read_delay = 0.020
+        self._post_write_delay = 0.020
+        self._connected = False
+
+    def set_delays(self, read_delay, write_delay):
+        self._post_read_delay = read_delay
+        self._post_write_delay = write_delay
+
+    def connect(self, read_test=True):
+        if self._device is None:
+            raise _no_device_error()
+        self._connected = True
+
+    def disconnect(self):
+        self._connected = False
+
+    def write_n_bytes(self, register_address, byte_list):
+        with self._bus_lock:
+            self._check_connected()
+            sleep(self._byte_time * (len(byte_list) + 1) + self._post_write_delay)
+            self._device.write(register_address, byte_list)
+
+    def write_byte(self, register_address, byte_value):
+        self.write_n_bytes(register_address, [byte_value & 0xFF])
+
+    def write_word(
+        self, register_address, word_value, little_endian=False, signed=False
+    ):
+        word_bytes = word_value.to_bytes(
+            2, "little" if little_endian else "big", signed=signed
+        )
+        self.write_n_bytes(register_address, list(word_bytes))
+
+    def read_n_unsigned_bytes(
+        self, register_address, number_of_bytes, little_endian=False
+    ):
+        return self._read(register_address, number_of_bytes, False, little_endian)
+
+    def read_unsigned_byte(self, register_address):
+        return self.read_n_unsigned_bytes(register_address, 1)
+
+    def read_n_signed_bytes(
+        self, register_address, number_of_bytes, little_endian=False
+    ):
+        return self._read(register_address, number_of_bytes, True, little_endian)
+
+    def read_signed_byte(self, register_address):
+        return self.read_n_signed_bytes(register_address, 1)
+
+    def read_unsigned_word(self, register_address, little_endian=False):
+        return self._read(register_address, 2, False, little_endian)
+
+    def read_signed_word(self, register_address, little_endian=False):
+        return self._read(register_address, 2, True, little_endian)
+
+    def read_bits_from_byte_at_address(self, bits_to_read, addr_to_read):
+        return self.read_bits_from_n_bytes_at_address(bits_to_read, addr_to_read, 1)
+
+    def read_bits_from_n_bytes_at_address(
+        self, bits_to_read, addr_to_read, no_of_bytes_to_read=1
+    ):
+        return bits_to_read & self.read_n_unsigned_bytes(
+            addr_to_read, no_of_bytes_to_read
+        )
+
+    def _read(self, register_address, number_of_bytes, signed, little_endian):
+        with self._bus_lock:
+            self._check_connected()
+            sleep(
+                self._byte_time * (number_of_bytes + 2)
+                + self._post_write_delay
+                + self._post_read_delay
+            )
+            data = self._device.read(register_address, number_of_bytes)
+
+        return int.from_bytes(
+            bytes(data), "little" if little_endian else "big", signed=signed
+        )
+
+    def _check_connected(self):
+        if not self._connected:
+            raise OSError(errno.EBADF, "I2C device is not connected")
+
+
+class SimulatedSMBus:
+    """Stands in for smbus2.SMBus on I2C bus 1."""
+
+    def __init__(self, devices, bus_lock, bus_speed_hz=I2C_BUS_SPEED_HZ):
+        self._devices = devices
+        self._bus_lock = bus_lock
+        self._byte_time = _I2C_CLOCKS_PER_BYTE / bus_speed_hz
+
+    def read_byte(self, i2c_addr):
+        self._transfer(i2c_addr, 2)
+        return 0
+
+    def write_quick(self, i2c_addr):
+        self._transfer(i2c_addr, 1)
+
+    def read_word_data(self, i2c_addr, register):
+        device = self._transfer(i2c_addr, 5)
+        with self._bus_lock:
+            return device.read_word_data(register)
+
+    def close(self):
+        pass
+
+    def _transfer(self, i2c_addr, byte_count):
+        with self._bus_lock:
+            sleep(self._byte_time * byte_count)
+            device = self._devices.get(i2c_addr)
+            if device is None:
+                raise _no_device_error()
+            return device
+
+
+class SimulatedSpiDev:
+    """Stands in for spidev.SpiDev, opened on a simulated hub's SPI device."""
+
+    def __init__(self, device):
+        self._device = device
+        self.max_speed_hz = 500000
+        self.mode = 0
+        self.bits_per_word = 8
+        self.lsbfirst = False
+
+    def xfer2(self, values, speed_hz=0):
+        sleep(len(values) * 8 / (speed_hz or self.max_speed_hz))
+        return [self._device.transfer(value) for value in values]
+
+    def close(self):
+        pass
+
+
+class SimulatedBackend:
+    """Bus backend (see pitopd.buses) that connects to a simulated hub instead
+    of the hardware."""
+
+    def __init__(self, hub):
+        self._i2c_devices = hub.i2c_devices()
+        self._spi_device = hub.spi_device()
+        # Transactions with every device on the bus share the bus
+        self._i2c_bus_lock = Lock()
+
+    def open_i2c_device(self, device_path, device_address):
+        device = None
+        if device_path == I2C_BUS_PATH:
+            device = self._i2c_devices.get(device_address)
+        return SimulatedI2CDevice(device, self._i2c_bus_lock)
+
+    def open_smbus(self, bus_number):
+        if f"/dev/i2c-{bus_number}" != I2C_BUS_PATH:
+            raise self._missing_device_error(f"/dev/i2c-{bus_number}")
+        return SimulatedSMBus(self._i2c_devices, self._i2c_bus_lock)
+
+    def open_spi(self, bus, device):
+        if self._spi_device is None or (bus, device) != SPI_DEVICE:
+            raise self._missing_device_error(f"/dev/spidev{bus}.{device}")
+        return SimulatedSpiDev(self._spi_device)
+
+    def device_exists(self, device_path):
+        if device_path == I2C_BUS_PATH:
+            return True
+        return (
+            self._spi_device is not None
+            and device_path == "/dev/spidev{}.{}".format(*SPI_DEVICE)
+        )
+
+    @staticmethod
+    def _missing_device_error(device_path):
+        return FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), device_path)
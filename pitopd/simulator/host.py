@@ -0,0 +1,58 @@
+import logging
+from time import monotonic
+
+from ..peripheral_manager import PeripheralManager
+from ..power_manager import PowerManager
+
+logger = logging.getLogger(__name__)
+
+
+class SimulatedInterfaceManager:
+    """Keeps the state of the Pi's I2C and SPI interfaces in memory, instead of
+    changing the boot configuration."""
+
+    def __init__(self):
+        self.i2c = True
+        self.spi0 = True
+        self.spi1 = True
+
+    def stop(self):
+        pass
+
+
+class SimulatedPowerManager(PowerManager):
+    """Logs OS shutdowns and reboots instead of carrying them out."""
+
+    def shutdown(self):
+        if self.shutdown_initiated is True:
+            logger.warning("Shutdown already initiated")
+            return
+
+        logger.info("Simulation: not shutting down OS")
+        self.shutdown_initiated = True
+
+    def reboot(self):
+        logger.info("Simulation: not rebooting OS")
+
+
+class SimulatedPeripheralManager(PeripheralManager):
+    """Leaves the host's audio configuration alone, instead of configuring
+    the HiFiBerry and rebooting."""
+
+    def configure_hifiberry(self):
+        logger.info("Simulation: not configuring HiFiBerry audio output")
+
+
+class SimulatedIdleTime:
+    """Reports the time since the simulation started as the X server's idle
+    time, as if no one was using the desktop."""
+
+    def __init__(self, clock=monotonic):
+        self._clock = clock
+        self._started = clock()
+
+    def get_idle_time_ms(self):
+        return int((self._clock() - self._started) * 1000)
+
+    def close(self):
+        pass
@@ -0,0 +1,75 @@
+from threading import RLock
+
+from .registers import RegisterMap
+
+BUTTONS = ("up", "down", "select", "cancel", "power")
+
+
+class SimulatedHub:
+    """Base class for simulated hubs.
+
+    Scenario events are applied by calling the methods below. A hub
+    without the hardware for an event raises NotImplementedError.
+    """
+
+    def __init__(self, battery=None):
+        self.battery = battery
+        self.lock = RLock()
+
+    def i2c_devices(self):
+        """The hub's devices on I2C bus 1, by address."""
+        return dict()
+
+    def spi_device(self):
+        """The hub's device on SPI bus 0, chip select 1, if it has one."""
+        return None
+
+    def press_button(self, button):
+        raise NotImplementedError(f"{type(self).__name__} has no '{button}' button")
+
+    def release_button(self, button):
+        raise NotImplementedError(f"{type(self).__name__} has no '{button}' button")
+
+    def set_lid_open(self, lid_open):
+        raise NotImplementedError(f"{type(self).__name__} has no lid")
+
+    def request_shutdown(self):
+        raise NotImplementedError(f"{type(self).__name__} cannot request a shutdown")
+
+    def set_charger_connected(self, connected):
+        self._get_battery().set_charger_connected(connected)
+
+    def set_battery_capacity(self, capacity):
+        self._get_battery().set_capacity(capacity)
+
+    def _get_battery(self):
+        if self.battery is None:
+            raise NotImplementedError(f"{type(self).__name__} has no battery")
+        return self.battery
+
+
+class RegisterHub(SimulatedHub):
+    """A hub that the Pi talks to by reading and writing its I2C registers."""
+
+    I2C_ADDRESS = None
+
+    def __init__(self, battery=None):
+        super().__init__(battery)
+        self.registers = RegisterMap()
+
+    def i2c_devices(self):
+        return {self.I2C_ADDRESS: self}
+
+    def read(self, address, length):
+        with self.lock:
+            self._update_registers()
+            return self.registers.read(address, length)
+
+    def write(self, address, data):
+        with self.lock:
+            self.registers.write(address, data)
+
+    def _update_registers(self):
+        """Bring registers that the hub updates itself, such as the battery
+        registers, up to date before they are read."""
+        pass
@@ -0,0 +1,89 @@
+from ..pthub.pthub_i2c import BatteryRegisters
+from .battery import NO_TIME
+from .hub import SimulatedHub
+
+BATTERY_I2C_ADDRESS = 0x0B
+
+# Byte sent by the Pi to ask for the hub's state without changing it
+_FETCH_STATE = 0xFF
+
+
+def _parity_of(value):
+    return bin(value).count("1") % 2
+
+
+class BatteryGauge:
+    """The pi-top's battery fuel gauge, read over SMBus."""
+
+    def __init__(self, battery):
+        self._battery = battery
+
+    def read_word_data(self, register):
+        if register == BatteryRegisters.current:
+            value = self._battery.current_ma()
+        elif register == BatteryRegisters.voltage:
+            value = self._battery.voltage_mv()
+        elif register == BatteryRegisters.capacity:
+            value = self._battery.relative_state_of_charge()
+        elif register == BatteryRegisters.charge_time:
+            value = self._battery.time_to_full_minutes()
+            # The gauge reports no time until full once the battery is full
+            value = 0 if value == NO_TIME else value
+        elif register == BatteryRegisters.discharge_time:
+            value = self._battery.time_to_empty_minutes()
+        else:
+            value = 0
+        return value & 0xFFFF
+
+
+class Hub1Simulator(SimulatedHub):
+    """Simulated pi-topHUB v1, as found in an original pi-top (with a battery)
+    or a pi-topCEED (without one).
+
+    The Pi and hub exchange one byte over SPI at a time. Bits 6-3 are
+    the screen brightness, bit 1 is set if the screen is blanked and bit
+    0 is set to request a shutdown. The hub also sets bit 2 if the lid
+    is open and bit 7 for odd parity.
+    """
+
+    def __init__(self, battery=None, has_lid=True):
+        super().__init__(battery)
+        self._has_lid = has_lid
+        self._brightness = 10
+        self._screen_blanked = False
+        self._lid_open = True
+        self._shutdown_requested = False
+
+    def i2c_devices(self):
+        if self.battery is None:
+            return dict()
+        return {BATTERY_I2C_ADDRESS: BatteryGauge(self.battery)}
+
+    def spi_device(self):
+        return self
+
+    def transfer(self, value):
+        with self.lock:
+            if value != _FETCH_STATE:
+                self._brightness = (value >> 3) & 0x0F
+                self._screen_blanked = bool(value & 0x02)
+            return self._state_byte()
+
+    def set_lid_open(self, lid_open):
+        if not self._has_lid:
+            super().set_lid_open(lid_open)
+        with self.lock:
+            self._lid_open = lid_open
+
+    def request_shutdown(self):
+        with self.lock:
+            self._shutdown_requested = True
+
+    def _state_byte(self):
+        state = (
+            (self._brightness << 3)
+            | (int(self._lid_open) << 2)
+            | (int(self._screen_blanked) << 1)
+            | int(self._shutdown_requested)
+        )
+        return (_parity_of(state) << 7) | state
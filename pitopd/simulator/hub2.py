@@ -0,0 +1,88 @@
+from ..pthub2.pthub2_connection import BacklightRegister, HubRegisters, ShutdownRegister
+from .hub import RegisterHub
+
+_WORD_REGISTERS = (
+    HubRegisters.PWR__M1_TIMEOUT_MIN,
+    HubRegisters.PWR__M1_TIMEOUT_MAX,
+    HubRegisters.PWR__M2_TIMEOUT_MIN,
+    HubRegisters.PWR__M2_TIMEOUT_MAX,
+    HubRegisters.PWR__M3_TIMEOUT,
+    HubRegisters.BAT__TEMPERATURE,
+    HubRegisters.BAT__VOLTAGE,
+    HubRegisters.BAT__CURRENT,
+    HubRegisters.BAT__TIME_TO_EMPTY,
+    HubRegisters.BAT__TIME_TO_FULL,
+)
+
+_INITIAL_VALUES = {
+    HubRegisters.BAT__TEMPERATURE: 2980,
+    HubRegisters.DIS__BACKLIGHT: BacklightRegister.DIS__BACKLIGHT__EN
+    | BacklightRegister.DIS__BACKLIGHT__LIDSW
+    | 10,
+}
+
+
+class Hub2Simulator(RegisterHub):
+    """Simulated pi-topHUB v2, as found in a pi-top [3]."""
+
+    I2C_ADDRESS = 0x10
+
+    def __init__(self, battery=None):
+        super().__init__(battery)
+
+        for name, address in vars(HubRegisters).items():
+            if name.isupper():
+                self.registers.define(
+                    address,
+                    _INITIAL_VALUES.get(address, 0),
+                    2 if address in _WORD_REGISTERS else 1,
+                )
+
+    def press_button(self, button):
+        self._set_power_button(button, True)
+
+    def release_button(self, button):
+        self._set_power_button(button, False)
+
+    def set_lid_open(self, lid_open):
+        with self.lock:
+            self.registers.set_bits(
+                HubRegisters.DIS__BACKLIGHT,
+                BacklightRegister.DIS__BACKLIGHT__LIDSW,
+                lid_open,
+            )
+
+    def request_shutdown(self):
+        with self.lock:
+            self.registers.set_bits(
+                HubRegisters.PWR__SHUTDOWN_CTRL,
+                ShutdownRegister.PWR__SHUTDOWN_CTRL__BUTT,
+                True,
+            )
+
+    def _set_power_button(self, button, pressed):
+        if button != "power":
+            super().press_button(button)
+
+        with self.lock:
+            self.registers.set_bits(
+                HubRegisters.PWR__SHUTDOWN_CTRL,
+                ShutdownRegister.PWR__SHUTDOWN_CTRL__HELD,
+                pressed,
+            )
+
+    def _update_registers(self):
+        if self.battery is None:
+            return
+
+        self.registers.set(HubRegisters.BAT__VOLTAGE, self.battery.voltage_mv())
+        self.registers.set(HubRegisters.BAT__CURRENT, self.battery.current_ma())
+        self.registers.set(
+            HubRegisters.BAT__RSOC, self.battery.relative_state_of_charge()
+        )
+        self.registers.set(
+            HubRegisters.BAT__TIME_TO_EMPTY, self.battery.time_to_empty_minutes()
+        )
+        self.registers.set(
+            HubRegisters.BAT__TIME_TO_FULL, self.battery.time_to_full_minutes()
+        )
@@ -0,0 +1,180 @@
+from ..pthub3.internal.apcad import APCAD
+from ..pthub3.internal.battery import BatteryControl
+from ..pthub3.internal.device_info import DeviceInfo
+from ..pthub3.internal.diagnostics import Diagnostics
+from ..pthub3.internal.display import BacklightRegister, Display
+from ..pthub3.internal.hardware import (
+    FanSpeedControl,
+    HardwareControl,
+    OLEDControlRegister,
+    RasPiBoardDetect,
+    UIButtonsRegister,
+)
+from ..pthub3.internal.misc import AudioConfig, UnixTime
+from ..pthub3.internal.power import PowerControl, ShutdownRegister
+from .hub import RegisterHub
+
+_BUTTON_BITS = {
+    "up": UIButtonsRegister.CTRL__UI_BUTTON_CTRL__UP,
+    "down": UIButtonsRegister.CTRL__UI_BUTTON_CTRL__DOWN,
+    "select": UIButtonsRegister.CTRL__UI_BUTTON_CTRL__SELECT,
+    "cancel": UIButtonsRegister.CTRL__UI_BUTTON_CTRL__CANCEL,
+}
+
+# Registers that are two bytes wide; the rest are one byte unless listed in
+# _LONG_REGISTERS
+_WORD_REGISTERS = (
+    Diagnostics.DIAG__LIFETIME_ONOFFCYC,
+    PowerControl.PWR__M1_TIMEOUT_MIN,
+    PowerControl.PWR__M1_TIMEOUT_MAX,
+    PowerControl.PWR__M2_TIMEOUT_MIN,
+    PowerControl.PWR__M2_TIMEOUT_MAX,
+    PowerControl.PWR__M3_TIMEOUT,
+    BatteryControl.BAT__TEMPERATURE,
+    BatteryControl.BAT__VOLTAGE,
+    BatteryControl.BAT__CURRENT,
+    BatteryControl.BAT__TIME_TO_EMPTY,
+    BatteryControl.BAT__TIME_TO_FULL,
+    BatteryControl.BAT__VOLT_CELL1,
+    BatteryControl.BAT__VOLT_CELL2,
+    BatteryControl.BAT__VOLT_CELL3,
+    BatteryControl.BAT__VOLT_CELL4,
+    BatteryControl.BAT__SERIAL_NUM,
+    BatteryControl.BAT__MANUF_DATE,
+    DeviceInfo.ID__PART_NAME,
+    DeviceInfo.ID__PART_NUMBER,
+    DeviceInfo.ID__DISPLAY_PART_NAME,
+    DeviceInfo.ID__DISPLAY_PART_NUMBER,
+    APCAD.APCAD__VOLT_BATT_IN,
+    APCAD.APCAD__VOLT_DC_IN,
+    APCAD.APCAD__VOLT_MPWR_IN,
+    APCAD.APCAD__VOLT_VSYS_PRST,
+    APCAD.APCAD__VOLT_5V_PRST,
+    APCAD.APCAD__VOLT_5V,
+    APCAD.APCAD__VOLT_5V_USB,
+    APCAD.APCAD__VOLT_3V3,
+)
+
+_LONG_REGISTERS = (
+    Diagnostics.DIAG__UPTIME_STDBY,
+    Diagnostics.DIAG__UPTIME_RAILSON,
+    Diagnostics.DIAG__LIFETIME_STDBY,
+    Diagnostics.DIAG__LIFETIME_RAILSON,
+    UnixTime.MISC__REAL_TIME_COUNTER,
+    DeviceInfo.ID__SERIAL_ID,
+    DeviceInfo.ID__DISPLAY_SERIAL_ID,
+)
+
+_INITIAL_VALUES = {
+    HardwareControl.CTRL__BRD_DETECT: RasPiBoardDetect.CTRL__BRD_DETECT__DETECT,
+    HardwareControl.CTRL__FAN_SPEED: FanSpeedControl.CTRL__FAN_SPEED__AUTO,
+    PowerControl.PWR__BUTT_SHORT_HOLD_TURNON: 1,
+    PowerControl.PWR__BUTT_SHORT_HOLD_TURNOFF: 2,
+    PowerControl.PWR__BUTT_LONG_HOLD: 5,
+    BatteryControl.BAT__TEMPERATURE: 2980,
+    BatteryControl.BAT__SERIAL_NUM: 0x1234,
+    Display.DIS__BACKLIGHT: BacklightRegister.DIS__BACKLIGHT__EN
+    | BacklightRegister.DIS__BACKLIGHT__LIDSW
+    | 10,
+    DeviceInfo.ID__MCU_SOFT_VERS_MAJOR: 4,
+    DeviceInfo.ID__SCH_REV_MAJOR: 1,
+    DeviceInfo.ID__PART_NAME: 0x0E10,
+    DeviceInfo.ID__PART_NUMBER: 0x0001,
+    DeviceInfo.ID__SERIAL_ID: 0x00012345,
+    DeviceInfo.ID__DISPLAY_SERIAL_ID: 0x00054321,
+    APCAD.APCAD__VOLT_5V: 5000,
+    APCAD.APCAD__VOLT_3V3: 3300,
+}
+
+
+class Hub3Simulator(RegisterHub):
+    """Simulated pi-topHUB v3, as found in a pi-top [4]."""
+
+    I2C_ADDRESS = 0x11
+
+    def __init__(self, battery=None):
+        super().__init__(battery)
+
+        for group in (
+            HardwareControl,
+            Diagnostics,
+            PowerControl,
+            BatteryControl,
+            AudioConfig,
+            UnixTime,
+            Display,
+            DeviceInfo,
+            APCAD,
+        ):
+            for name, address in vars(group).items():
+                if not name.isupper():
+                    continue
+                if address in _LONG_REGISTERS:
+                    size = 4
+                elif address in _WORD_REGISTERS:
+                    size = 2
+                else:
+                    size = 1
+                self.registers.define(address, _INITIAL_VALUES.get(address, 0), size)
+
+        self.registers.define(
+            HardwareControl.CTRL__UI_OLED_CTRL, on_write=self._on_oled_control_write
+        )
+
+    def press_button(self, button):
+        self._set_button(button, True)
+
+    def release_button(self, button):
+        self._set_button(button, False)
+
+    def request_shutdown(self):
+        with self.lock:
+            self.registers.set_bits(
+                PowerControl.PWR__SHUTDOWN_CTRL,
+                ShutdownRegister.PWR__SHUTDOWN_CTRL__BUTT,
+                True,
+            )
+
+    def _set_button(self, button, pressed):
+        with self.lock:
+            if button == "power":
+                self.registers.set_bits(
+                    PowerControl.PWR__SHUTDOWN_CTRL,
+                    ShutdownRegister.PWR__SHUTDOWN_CTRL__HELD,
+                    pressed,
+                )
+            elif button in _BUTTON_BITS:
+                self.registers.set_bits(
+                    HardwareControl.CTRL__UI_BUTTON_CTRL, _BUTTON_BITS[button], pressed
+                )
+            else:
+                super().press_button(button)
+
+    def _on_oled_control_write(self, value):
+        # The hub clears the reset bit once it has reset the OLED
+        self.registers.set_bits(
+            HardwareControl.CTRL__UI_OLED_CTRL,
+            OLEDControlRegister.CTRL__UI_OLED_CTRL__RST,
+            False,
+        )
+
+    def _update_registers(self):
+        if self.battery is None:
+            return
+
+        self.registers.set_bits(
+            PowerControl.PWR__SHUTDOWN_CTRL,
+            ShutdownRegister.PWR__SHUTDOWN_CTRL__AC,
+            self.battery.charger_connected,
+        )
+        self.registers.set(BatteryControl.BAT__VOLTAGE, self.battery.voltage_mv())
+        self.registers.set(BatteryControl.BAT__CURRENT, self.battery.current_ma())
+        self.registers.set(
+            BatteryControl.BAT__RSOC, self.battery.relative_state_of_charge()
+        )
+        self.registers.set(
+            BatteryControl.BAT__TIME_TO_EMPTY, self.battery.time_to_empty_minutes()
+        )
+        self.registers.set(
+            BatteryControl.BAT__TIME_TO_FULL, self.battery.time_to_full_minutes()
+        )
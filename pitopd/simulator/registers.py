@@ -0,0 +1,56 @@
+class RegisterMap:
+    """In-memory model of a hub's I2C registers.
+
+    As on the hub, each address holds a value of one or more bytes, so
+    reading n bytes from an address returns that register's bytes
+    followed by those of the registers after it. Undefined registers
+    read as a single zero byte.
+    """
+
+    def __init__(self):
+        self._sizes = dict()
+        self._values = dict()
+        self._write_callbacks = dict()
+
+    def define(self, address, value=0, size=1, on_write=None):
+        self._sizes[address] = size
+        self._values[address] = value % (1 << (8 * size))
+        if on_write is not None:
+            self._write_callbacks[address] = on_write
+
+    def get(self, address):
+        return self._values.get(address, 0)
+
+    def set(self, address, value):
+        """Set a register's value; negative values are stored in two's
+        complement."""
+        size = self._sizes.setdefault(address, 1)
+        self._values[address] = value % (1 << (8 * size))
+
+    def set_bits(self, address, bits, high):
+        value = self.get(address)
+        self.set(address, value | bits if high else value & ~bits)
+
+    def read(self, address, length):
+        data = list()
+        while len(data) < length:
+            size = self._sizes.get(address, 1)
+            data.extend(self.get(address).to_bytes(size, "big"))
+            address += 1
+        return data[:length]
+
+    def write(self, address, data):
+        """Write bytes to a register and the registers after it, as sent by the
+        Pi."""
+        data = list(data)
+        while len(data) > 0:
+            size = self._sizes.get(address, 1)
+            value_bytes, data = data[:size], data[size:]
+            # A short write only sets the most significant bytes
+            value_bytes += self.get(address).to_bytes(size, "big")[len(value_bytes) :]
+            self.set(address, int.from_bytes(bytes(value_bytes), "big"))
+
+            on_write = self._write_callbacks.get(address)
+            if on_write is not None:
+                on_write(self.get(address))
+            address += 1
@@ -0,0 +1,127 @@
+import logging
+import shlex
+from threading import Event, Thread
+from time import monotonic
+
+from .hub import BUTTONS
+
+logger = logging.getLogger(__name__)
+
+# A scenario is a text file of timed hub events, one per line:
+#
+#   <seconds> <event> [arguments]
+#
+# where seconds is measured from the start of the simulation. The events are:
+#
+#   press <button> [seconds]     press a button, releasing it after 0.1s or
+#                                the given number of seconds
+#   lid open|closed
+#   charger connected|disconnected
+#   battery <percent>            set the battery's state of charge
+#   shutdown                     request a shutdown, as the hub does when the
+#                                power button is held
+#
+# Blank lines and lines starting with '#' are ignored.
+
+DEFAULT_PRESS_DURATION = 0.1
+
+_CHOICES = {
+    "lid": {"open": True, "closed": False},
+    "charger": {"connected": True, "disconnected": False},
+}
+
+
+class ScenarioEvent:
+    def __init__(self, time, action, *arguments):
+        self.time = time
+        self.action = action
+        self.arguments = arguments
+
+    def apply(self, hub):
+        getattr(hub, self.action)(*self.arguments)
+
+
+def _parse_line(line):
+    fields = shlex.split(line)
+    time = float(fields[0])
+    event, arguments = fields[1], fields[2:]
+
+    if event == "press" and len(arguments) in (1, 2):
+        button = arguments[0]
+        if button not in BUTTONS:
+            raise ValueError(f"unknown button '{button}'")
+        duration = (
+            float(arguments[1]) if len(arguments) == 2 else DEFAULT_PRESS_DURATION
+        )
+        return [
+            ScenarioEvent(time, "press_button", button),
+            ScenarioEvent(time + duration, "release_button", button),
+        ]
+
+    if event in _CHOICES and len(arguments) == 1:
+        choices = _CHOICES[event]
+        if arguments[0] not in choices:
+            raise ValueError(f"expected {' or '.join(choices)} after '{event}'")
+        action = "set_lid_open" if event == "lid" else "set_charger_connected"
+        return [ScenarioEvent(time, action, choices[arguments[0]])]
+
+    if event == "battery" and len(arguments) == 1:
+        return [ScenarioEvent(time, "set_battery_capacity", float(arguments[0]))]
+
+    if event == "shutdown" and len(arguments) == 0:
+        return [ScenarioEvent(time, "request_shutdown")]
+
+    raise ValueError(f"unknown event '{line.strip()}'")
+
+
+def parse_scenario(lines):
+    """Return the events in a scenario, in the order they happen."""
+    events = list()
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if line == "" or line.startswith("#"):
+            continue
+        try:
+            events.extend(_parse_line(line))
+        except (IndexError, ValueError) as e:
+            raise ValueError(f"Line {line_number} of scenario: {e}") from e
+
+    events.sort(key=lambda event: event.time)
+    return events
+
+
+def load_scenario(path):
+    with open(path) as f:
+        return parse_scenario(f)
+
+
+class ScenarioRunner:
+    """Applies a scenario's events to a simulated hub as their time comes."""
+
+    def __init__(self, hub, events, clock=monotonic):
+        self._hub = hub
+        self._events = events
+        self._clock = clock
+        self._stop_event = Event()
+        self._thread = Thread(target=self._thread_method, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _thread_method(self):
+        start_time = self._clock()
+
+        for event in self._events:
+            if self._stop_event.wait(max(0, start_time + event.time - self._clock())):
+                return
+
+            logger.info(f"Simulation: {event.action}{event.arguments}")
+            try:
+                event.apply(self._hub)
+            except NotImplementedError as e:
+                logger.warning(f"Simulation: skipping event - {e}")
@@ -0,0 +1,73 @@
+import logging
+import os
+import tempfile
+from os import getenv
+
+from .. import buses, state
+from .battery import BatteryModel
+from .devices import SimulatedBackend
+from .host import (
+    SimulatedIdleTime,
+    SimulatedInterfaceManager,
+    SimulatedPeripheralManager,
+    SimulatedPowerManager,
+)
+from .hub1 import Hub1Simulator
+from .hub2 import Hub2Simulator
+from .hub3 import Hub3Simulator
+from .scenario import ScenarioRunner, load_scenario
+
+logger = logging.getLogger(__name__)
+
+
+def _create_battery():
+    return BatteryModel(time_scale=float(getenv("PT_SIMULATOR_TIME_SCALE", "1")))
+
+
+DEVICES = {
+    "pi_top_4": lambda: Hub3Simulator(battery=_create_battery()),
+    "pi_top_3": lambda: Hub2Simulator(battery=_create_battery()),
+    "pi_top": lambda: Hub1Simulator(battery=_create_battery()),
+    "pi_top_ceed": lambda: Hub1Simulator(has_lid=False),
+}
+
+
+class Simulation:
+    """Runs pi-topd against a simulated device.
+
+    The hub is replaced by an in-memory simulator. Changes that would
+    be made to the host, such as enabling interfaces, configuring audio
+    or shutting down, are kept in memory or in a temporary directory
+    instead, and the desktop's idle time is simulated too.
+    """
+
+    def __init__(self, device, scenario_path=None, directory=None):
+        self.device = device
+        self.hub = DEVICES[device]()
+        self.directory = (
+            tempfile.mkdtemp(prefix="pitopd-simulation-")
+            if directory is None
+            else directory
+        )
+        self.interface_manager = SimulatedInterfaceManager()
+        self.power_manager = SimulatedPowerManager()
+        self.peripheral_manager = SimulatedPeripheralManager()
+        self.idle_time = SimulatedIdleTime()
+
+        events = list() if scenario_path is None else load_scenario(scenario_path)
+        self._scenario_runner = ScenarioRunner(self.hub, events)
+
+    def install(self):
+        """Use the simulated hub and the simulation's state file.
+
+        Must be called before the app is created.
+        """
+        logger.info(f"Simulating a {self.device} - files are in {self.directory}")
+        buses.set_backend(SimulatedBackend(self.hub))
+        state.configure(os.path.join(self.directory, "state.cfg"))
+
+    def start(self):
+        self._scenario_runner.start()
+
+    def stop(self):
+        self._scenario_runner.stop()
@@ -0,0 +1,133 @@
+import logging
+from threading import Condition, Event, Thread
+from time import monotonic
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class StartupStep:
+    def __init__(self, name, function, requires=(), after=()):
+        self.name = name
+        self.function = function
+        self.requires = tuple(requires)
+        self.after = tuple(after)
+        self.status = PENDING
+        self.duration = None
+
+
+class StartupGraph:
+    """Runs startup steps, each as soon as the steps that it requires have
+    succeeded.
+
+    Steps that do not depend on each other run at the same time, each in
+    its own thread. A step fails if it raises an exception or returns
+    False, and the steps that require it are then skipped. Steps that only
+    run ``after`` it still run. Each step's time is recorded in
+    ``profile``, a BootProfile, if one is given.
+    """
+
+    def __init__(self, name, profile=None):
+        self.name = name
+        self._profile = profile
+        self._steps = dict()
+        self._condition = Condition()
+        self._cancelled = Event()
+
+    def add_step(self, name, function, requires=(), after=()):
+        # Requiring steps to be added after those they depend on keeps the
+        # graph free of cycles
+        for required in tuple(requires) + tuple(after):
+            if required not in self._steps:
+                raise ValueError(f"Unknown startup step '{required}'")
+        self._steps[name] = StartupStep(name, function, requires, after)
+
+    def run(self):
+        """Run the steps, returning once every step has finished or been
+        skipped.
+
+        Returns True if all of the steps succeeded.
+        """
+        started = monotonic()
+        with self._condition:
+            while True:
+                for step in self._steps.values():
+                    if step.status == PENDING:
+                        self._start_step_if_ready(step)
+
+                if not any(
+                    step.status in (PENDING, RUNNING) for step in self._steps.values()
+                ):
+                    break
+                self._condition.wait()
+
+            succeeded = all(step.status == SUCCEEDED for step in self._steps.values())
+
+        logger.debug(
+            f"{self.name.capitalize()} took {monotonic() - started:.3f}s: "
+            + ", ".join(
+                f"{step.name} {step.status}"
+                + ("" if step.duration is None else f" in {step.duration:.3f}s")
+                for step in self._steps.values()
+            )
+        )
+        return succeeded
+
+    def cancel(self):
+        """Skip the steps that have not started yet.
+
+        run() still waits for the steps that are running. This does not
+        block, so it can be called from a signal handler.
+        """
+        self._cancelled.set()
+
+    def statuses(self):
+        """Status of each step, by name."""
+        with self._condition:
+            return {step.name: step.status for step in self._steps.values()}
+
+    def durations(self):
+        """Seconds taken by each step that has finished, by name."""
+        with self._condition:
+            return {
+                step.name: step.duration
+                for step in self._steps.values()
+                if step.duration is not None
+            }
+
+    def _start_step_if_ready(self, step):
+        required_statuses = [self._steps[name].status for name in step.requires]
+
+        if self._cancelled.is_set() or any(
+            status in (FAILED, SKIPPED) for status in required_statuses
+        ):
+            logger.debug(f"Skipping startup step '{step.name}'")
+            step.status = SKIPPED
+        elif all(status == SUCCEEDED for status in required_statuses) and all(
+            self._steps[name].status not in (PENDING, RUNNING) for name in step.after
+        ):
+            step.status = RUNNING
+            Thread(target=self._run_step, args=(step,)).start()
+
+    def _run_step(self, step):
+        logger.debug(f"Starting startup step '{step.name}'")
+        started = monotonic()
+        try:
+            succeeded = step.function() is not False
+        except Exception as e:
+            logger.error(f"Startup step '{step.name}' failed: {e}")
+            succeeded = False
+
+        finished = monotonic()
+        if self._profile is not None:
+            self._profile.record(step.name, started, finished)
+
+        with self._condition:
+            step.duration = finished - started
+            step.status = SUCCEEDED if succeeded else FAILED
+            self._condition.notify_all()
@@ -1,43 +1,153 @@
-from configparser import ConfigParser
+import atexit
+import logging
+import os
+from configparser import ConfigParser, NoOptionError, NoSectionError
 from pathlib import Path
-from threading import Lock
+from threading import Lock, Timer
+
+logger = logging.getLogger(__name__)
 
 STATE_FILE_PATH = "/var/lib/pi-topd/state.cfg"
-config_parser = ConfigParser()
 
-path = Path(STATE_FILE_PATH)
-lock = Lock()
 
-if not path.exists():
-    Path(path.parent).mkdir(parents=True, exist_ok=True)
-    path.touch()
+class StateStore:
+    """In-memory copy of the state file with write-behind persistence.
 
-config_parser.read(STATE_FILE_PATH)
+    Reads never take a lock: every change replaces the section dictionary
+    rather than modifying it. Changes are written out at most once per
+    ``flush_delay`` seconds, and the file is always replaced atomically.
+    """
 
+    def __init__(self, path=STATE_FILE_PATH, flush_delay=2):
+        self._path = Path(path)
+        self._flush_delay = flush_delay
+        self._sections = dict()
+        self._dirty = False
+        self._lock = Lock()
+        self._flush_lock = Lock()
+        self._flush_timer = None
 
-def get(section: str, key: str, fallback=None):
-    with lock:
-        val = fallback
-        try:
-            val = config_parser.get(section, key)
-        except Exception:
+        if not self._path.exists():
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._path.touch()
+
+        config_parser = ConfigParser()
+        config_parser.read(self._path)
+        self._sections = {
+            section: dict(config_parser.items(section))
+            for section in config_parser.sections()
+        }
+
+    @property
+    def path(self):
+        return self._path
+
+    def get(self, section: str, key: str, fallback=None):
+        # Raises like ConfigParser.get when there is no fallback
+        values = self._sections.get(section)
+        if values is None:
+            if fallback is None:
+                raise NoSectionError(section)
+            return fallback
+
+        key = key.lower()
+        if key not in values:
             if fallback is None:
-                raise
+                raise NoOptionError(key, section)
+            return fallback
+        return values[key]
+
+    def set(self, section: str, key: str, value):
+        if not isinstance(value, str):
+            raise TypeError("option values must be strings")
+
+        key = key.lower()
+        with self._lock:
+            values = self._sections.get(section, {})
+            if values.get(key) == value:
+                return
+
+            updated_values = dict(values)
+            updated_values[key] = value
+            sections = dict(self._sections)
+            sections[section] = updated_values
+            self._sections = sections
+
+            self._dirty = True
+            if self._flush_timer is None:
+                self._flush_timer = Timer(self._flush_delay, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                if not self._dirty:
+                    return
+                sections = self._sections
+                self._dirty = False
+
+            try:
+                self._write(sections)
+            except Exception as e:
+                logger.error(f"Unable to save state to {self._path}: {e}")
+                with self._lock:
+                    self._dirty = True
+
+    def _write(self, sections):
+        config_parser = ConfigParser()
+        config_parser.read_dict(sections)
+
+        temp_path = self._path.with_name(self._path.name + ".tmp")
+        with open(temp_path, "w") as f:
+            config_parser.write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self._path)
+
+        dir_fd = os.open(self._path.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
         finally:
-            return val
+            os.close(dir_fd)
+
+
+_store = None
+_store_path = STATE_FILE_PATH
+_store_lock = Lock()
+
+
+def configure(path: str):
+    """Use a different state file. Must be called before the state is
+    first used."""
+    global _store_path
+    with _store_lock:
+        if _store is not None:
+            raise RuntimeError("State has already been loaded")
+        _store_path = path
+
+
+def _get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = StateStore(_store_path)
+                atexit.register(_store.flush)
+    return _store
+
+
+def get(section: str, key: str, fallback=None):
+    return _get_store().get(section, key, fallback)
 
 
 def set(section: str, key: str, value):
-    with lock:
-        try:
-            if not config_parser.has_section(section):
-                config_parser.add_section(section)
-            config_parser.set(section, key, value)
-        except Exception:
-            raise
-        __save()
+    _get_store().set(section, key, value)
 
 
-def __save():
-    with open(STATE_FILE_PATH, "w") as f:
-        config_parser.write(f)
+def flush():
+    if _store is not None:
+        _store.flush()
@@ -1,7 +1,7 @@
-from pkg_resources import get_distribution
+from importlib.metadata import PackageNotFoundError, version
 
 __version__ = "N/A"
 try:
-    __version__ = get_distribution("pitopd").version
-except Exception:
+    __version__ = version("pitopd")
+except PackageNotFoundError:
     pass
@@ -0,0 +1,93 @@
+import pytest
+
+pytest.importorskip("zmq")
+pytest.importorskip("pitop.common")
+
+from pitop.common.ptdm import Message  # noqa: E402
+
+from pitopd.server.batch import (  # noqa: E402
+    BatchRequestHandler,
+    decode_batch_response,
+    encode_batch_request,
+)
+from pitopd.server.request_handlers import RequestHandler  # noqa: E402
+from pitopd.server.request_server import RequestServer  # noqa: E402
+
+REQ_ECHO = 1500
+REQ_GET_VALUE = 1501
+REQ_FAIL = 1502
+
+
+@pytest.fixture
+def process_request():
+    server = RequestServer()
+    server.register_handler(RequestHandler(Message.REQ_PING, lambda: None))
+    server.register_handler(
+        RequestHandler(
+            REQ_ECHO, lambda value: value, parameter_types=[int], response_types=[int]
+        )
+    )
+    server.register_handler(
+        RequestHandler(REQ_GET_VALUE, lambda: (1, 2), response_types=[int, int])
+    )
+    server.register_handler(RequestHandler(REQ_FAIL, lambda: 1 / 0))
+    server.register_handler(BatchRequestHandler(server._process_worker_request))
+    yield server._process_request
+    server.stop_listening()
+
+
+def _process_batch(process_request, requests):
+    return decode_batch_response(process_request(encode_batch_request(requests)))
+
+
+def test_batch_answers_each_kind_of_request(process_request):
+    assert _process_batch(
+        process_request,
+        [
+            str(Message.REQ_PING),
+            f"{REQ_ECHO}|5",
+            str(REQ_GET_VALUE),
+            str(REQ_FAIL),
+            "1599",
+        ],
+    ) == [
+        str(Message.RSP_PING),
+        f"{REQ_ECHO + 100}|5",
+        f"{REQ_GET_VALUE + 100}|1|2",
+        str(Message.RSP_ERR_SERVER),
+        str(Message.RSP_ERR_UNSUPPORTED),
+    ]
+
+
+def test_malformed_sub_requests_only_fail_themselves(process_request):
+    assert _process_batch(
+        process_request,
+        ["ping", f"{REQ_ECHO}|five", f"{REQ_ECHO}", f"{REQ_ECHO}|6"],
+    ) == [
+        str(Message.RSP_ERR_MALFORMED),
+        str(Message.RSP_ERR_MALFORMED),
+        str(Message.RSP_ERR_MALFORMED),
+        f"{REQ_ECHO + 100}|6",
+    ]
+
+
+def test_batches_cannot_be_nested(process_request):
+    nested_batch = encode_batch_request([str(Message.REQ_PING)])
+
+    assert _process_batch(process_request, [str(Message.REQ_PING), nested_batch]) == [
+        str(Message.RSP_ERR_MALFORMED)
+    ]
+
+
+def test_batches_have_a_maximum_size(process_request):
+    requests = [str(Message.REQ_PING)] * (BatchRequestHandler.MAX_REQUESTS + 1)
+
+    assert _process_batch(process_request, requests) == [str(Message.RSP_ERR_MALFORMED)]
+
+
+def test_responses_are_in_the_order_of_the_requests(process_request):
+    values = [7, 3, 9, 1, 3, 0]
+
+    assert _process_batch(
+        process_request, [f"{REQ_ECHO}|{value}" for value in values]
+    ) == [f"{REQ_ECHO + 100}|{value}" for value in values]
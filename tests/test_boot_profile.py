@@ -0,0 +1,53 @@
+import pytest
+
+from pitopd.boot_profile import BootProfile
+
+
+@pytest.fixture
+def profile(clock):
+    clock.now = 100.0
+    return BootProfile(clock=clock)
+
+
+def test_phases_are_timed_from_the_start_of_the_profile(profile, clock):
+    clock.now = 100.5
+    profile.record("imports")
+    with profile.phase("hub_probe_v3"):
+        clock.now = 100.75
+    profile.mark("ready")
+
+    assert profile.phases() == [
+        ("imports", 0, 0.5),
+        ("hub_probe_v3", 0.5, 0.25),
+        ("ready", 0.75, 0),
+    ]
+
+
+def test_only_the_first_occurrence_of_a_phase_is_recorded(profile, clock):
+    with profile.phase("peripheral_scan"):
+        clock.now += 1
+    with profile.phase("peripheral_scan"):
+        clock.now += 2
+
+    assert profile.phases() == [("peripheral_scan", 0, 1)]
+
+
+def test_phases_are_listed_in_the_order_they_started(profile):
+
+    profile.record("hub", 101, 103)
+    profile.record("hub_probe_v2", 101.5, 101.75)
+    profile.record("publish_server", 100.5, 101)
+
+    assert [name for name, _, _ in profile.phases()] == [
+        "publish_server",
+        "hub",
+        "hub_probe_v2",
+    ]
+    assert profile.to_dict() == {
+        "started": 100,
+        "phases": [
+            {"name": "publish_server", "start": 0.5, "duration": 0.5},
+            {"name": "hub", "start": 1, "duration": 2},
+            {"name": "hub_probe_v2", "start": 1.5, "duration": 0.25},
+        ],
+    }
@@ -0,0 +1,45 @@
+import grp
+import os
+import stat
+
+import pytest
+
+zmq = pytest.importorskip("zmq")
+
+from pitopd.server import endpoints  # noqa: E402
+
+
+@pytest.fixture
+def bind(tmp_path, monkeypatch, free_port):
+    monkeypatch.setattr(endpoints, "IPC_DIRECTORY", str(tmp_path))
+    context = zmq.Context()
+
+    def bind():
+        endpoint = endpoints.Endpoint("request", free_port())
+        zmq_socket = context.socket(zmq.REP)
+        zmq_socket.setsockopt(zmq.LINGER, 0)
+        endpoints.bind(zmq_socket, endpoint)
+        return endpoint
+
+    yield bind
+    context.destroy()
+
+
+def _mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_unix_domain_sockets_are_only_usable_by_root_by_default(bind):
+    endpoint = bind()
+
+    assert _mode(endpoint.ipc_path) == 0o600
+
+
+def test_unix_domain_sockets_can_be_shared_with_a_group(bind, monkeypatch):
+    group = grp.getgrgid(os.getgid())
+    monkeypatch.setattr(endpoints, "IPC_GROUP", group.gr_name)
+
+    endpoint = bind()
+
+    assert _mode(endpoint.ipc_path) == 0o660
+    assert os.stat(endpoint.ipc_path).st_gid == group.gr_gid
@@ -0,0 +1,38 @@
+import os
+
+from pitopd.file_watch import FileWatcher
+
+
+def test_detects_write_and_replace(tmp_path):
+    config_file = tmp_path / "config.txt"
+    config_file.write_text("dtparam=i2c_arm=on\n")
+    watcher = FileWatcher(str(config_file))
+
+    assert watcher.changed() is False
+
+    config_file.write_text("dtparam=spi=on\n")
+    assert watcher.changed() is True
+    assert watcher.changed() is False
+
+    replacement = tmp_path / "config.txt.new"
+    replacement.write_text("dtparam=i2c_arm=on\n")
+    assert watcher.changed() is False
+    os.replace(replacement, config_file)
+    assert watcher.changed() is True
+
+    watcher.close()
+
+
+def test_falls_back_to_stat(tmp_path, monkeypatch):
+    config_file = tmp_path / "config.txt"
+    config_file.write_text("dtparam=i2c_arm=on\n")
+
+    def inotify_unavailable(self):
+        raise OSError("inotify unavailable")
+
+    monkeypatch.setattr(FileWatcher, "_add_inotify_watch", inotify_unavailable)
+    watcher = FileWatcher(str(config_file))
+
+    assert watcher.changed() is False
+    config_file.write_text("dtparam=spi=on\ndtparam=i2c_arm=on\n")
+    assert watcher.changed() is True
@@ -0,0 +1,76 @@
+import pytest
+
+hub_manager = pytest.importorskip("pitopd.hub_manager")
+
+
+class FakeV1Hub:
+    __name__ = "pitopd.pthub.pthub"
+
+    def __init__(self):
+        self.brightness = 10
+        self.on_brightness_changed = None
+
+    def initialise(self):
+        return True
+
+    def register_client(self, on_brightness_changed, *callbacks):
+        self.on_brightness_changed = on_brightness_changed
+
+    def get_brightness(self):
+        return self.brightness
+
+
+class FakeI2CHub:
+    __name__ = "pitopd.pthub2.pthub2"
+
+    def __init__(self, found):
+        self.found = found
+        self.initialised = False
+        self.on_brightness_changed = None
+
+    def initialise(self):
+        self.initialised = True
+        return self.found
+
+    def register_client(self, on_brightness_changed, *callbacks):
+        self.on_brightness_changed = on_brightness_changed
+
+
+class FakeCallbackClient:
+    def on_spi0_state_requested(self):
+        return True
+
+    def __getattr__(self, name):
+        return lambda *args: None
+
+
+def test_brightness_changed_silently_by_v1_hub_is_not_stale(monkeypatch):
+    hub = FakeV1Hub()
+    monkeypatch.setattr(hub_manager, "pthub", hub)
+    monkeypatch.setattr(hub_manager, "pthub3", FakeI2CHub(found=False))
+    monkeypatch.setattr(hub_manager, "pthub2", FakeI2CHub(found=False))
+
+    manager = hub_manager.HubManager()
+    manager.initialise(FakeCallbackClient())
+    assert manager.connect_to_hub() is True
+
+    hub.on_brightness_changed(10)
+    assert manager.get_brightness() == 10
+
+    # The v1 hub polls a new brightness without calling back
+    hub.brightness = 4
+    assert manager.get_brightness() == 4
+
+
+def test_v2_hub_is_not_probed_if_a_v3_hub_is_found(monkeypatch):
+    v3_hub = FakeI2CHub(found=True)
+    v2_hub = FakeI2CHub(found=True)
+    monkeypatch.setattr(hub_manager, "pthub3", v3_hub)
+    monkeypatch.setattr(hub_manager, "pthub2", v2_hub)
+
+    manager = hub_manager.HubManager()
+    manager.initialise(FakeCallbackClient())
+    assert manager.connect_to_hub() is True
+
+    assert manager._active_hub_module is v3_hub
+    assert not v2_hub.initialised
@@ -0,0 +1,125 @@
+import pytest
+
+i2c_prober = pytest.importorskip("pitopd.i2c_prober")
+
+from pitopd import buses  # noqa: E402
+
+
+class FakeSMBus:
+    def __init__(self, responding):
+        self.responding = responding
+        self.calls = list()
+        self.closed = False
+
+    def _transaction(self, name, address):
+        self.calls.append((name, address))
+        if address not in self.responding:
+            raise OSError(121, "Remote I/O error")
+
+    def read_byte(self, address):
+        self._transaction("read_byte", address)
+        return 0
+
+    def write_quick(self, address):
+        self._transaction("write_quick", address)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeBackend:
+    def __init__(self, responding=()):
+        self.responding = set(responding)
+        self.device_present = True
+        self.open_error = None
+        self.buses = list()
+
+    def open_smbus(self, bus_number):
+        if self.open_error is not None:
+            raise self.open_error
+        self.buses.append(FakeSMBus(self.responding))
+        return self.buses[-1]
+
+    def device_exists(self, device_path):
+        return self.device_present
+
+
+class FakeI2C:
+    def __init__(self):
+        self.states = list()
+
+    def set_state(self, enabled):
+        self.states.append(enabled)
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = FakeBackend()
+    monkeypatch.setattr(buses, "_backend", backend)
+    return backend
+
+
+@pytest.fixture
+def i2c(monkeypatch):
+    i2c = FakeI2C()
+    monkeypatch.setattr(i2c_prober, "I2C", i2c)
+    return i2c
+
+
+def test_probe_returns_responding_addresses_as_a_bitset(backend, i2c):
+    backend.responding = {0x2A, 0x71}
+    prober = i2c_prober.I2CProber(addresses=(0x24, 0x2A, 0x43, 0x71))
+
+    assert prober.probe() == (1 << 0x2A) | (1 << 0x71)
+    assert i2c_prober.addresses_in_bitset(prober.probe()) == [0x2A, 0x71]
+    # The bus is kept open between scans
+    assert len(backend.buses) == 1
+
+    prober.close()
+    assert backend.buses[0].closed
+
+
+def test_eeprom_ranges_are_never_write_probed(backend, i2c):
+    addresses = (0x2F, 0x30, 0x37, 0x38, 0x4F, 0x50, 0x5F, 0x60)
+    prober = i2c_prober.I2CProber(addresses=addresses)
+
+    prober.probe()
+
+    assert backend.buses[0].calls == [
+        ("write_quick", 0x2F),
+        ("read_byte", 0x30),
+        ("read_byte", 0x37),
+        ("write_quick", 0x38),
+        ("write_quick", 0x4F),
+        ("read_byte", 0x50),
+        ("read_byte", 0x5F),
+        ("write_quick", 0x60),
+    ]
+
+
+def test_bus_is_reopened_after_an_error(backend, i2c):
+    backend.responding = {0x2A}
+    backend.open_error = OSError(16, "Device or resource busy")
+    prober = i2c_prober.I2CProber(addresses=(0x2A,))
+
+    assert prober.probe() == 0
+
+    backend.open_error = None
+    assert prober.probe() == 1 << 0x2A
+
+
+def test_i2c_is_enabled_if_the_bus_is_missing(backend, i2c):
+    backend.device_present = False
+    prober = i2c_prober.I2CProber(addresses=(0x2A,))
+
+    assert prober.probe() == 0
+    assert i2c.states == [True]
+    assert backend.buses == []
+
+    # Once the bus has been seen, I2C is not enabled again
+    backend.device_present = True
+    backend.responding = {0x2A}
+    assert prober.probe() == 1 << 0x2A
+    backend.device_present = False
+    assert prober.probe() == 1 << 0x2A
+    assert i2c.states == [True]
@@ -0,0 +1,66 @@
+import socket
+import struct
+from threading import Thread
+
+from pitopd.idle_time import X11IdleTime
+
+ROOT_WINDOW = 0x1A2
+SCREEN_SAVER_OPCODE = 144
+IDLE_TIME_MS = 12345
+
+
+def _recv(connection, length):
+    data = b""
+    while len(data) < length:
+        data += connection.recv(length - len(data))
+    return data
+
+
+def fake_x_server(listener):
+    connection, _ = listener.accept()
+
+    _recv(connection, 12)
+    vendor = b"fake"
+    setup = struct.pack(
+        "<IIIIHHBBBBBBBBxxxx", 0, 0, 0, 0, len(vendor), 0, 1, 1, 0, 0, 32, 32, 8, 255
+    )
+    setup += vendor + struct.pack("<BBBxxxxx", 24, 32, 32)
+    setup += struct.pack("<I", ROOT_WINDOW) + bytes(36)
+    connection.sendall(struct.pack("<BxHHH", 1, 11, 0, len(setup) // 4) + setup)
+
+    opcode, _, length = struct.unpack("<BBH", _recv(connection, 4))
+    assert opcode == 98
+    name = _recv(connection, length * 4 - 4)
+    assert name[4:20] == b"MIT-SCREEN-SAVER"
+    connection.sendall(
+        struct.pack("<BxHIBBBB20x", 1, 1, 0, 1, SCREEN_SAVER_OPCODE, 0, 0)
+    )
+
+    for sequence in range(2, 4):
+        opcode, minor, _, drawable = struct.unpack("<BBHI", _recv(connection, 8))
+        assert (opcode, minor, drawable) == (SCREEN_SAVER_OPCODE, 1, ROOT_WINDOW)
+        # An unrelated event arriving before the reply should be skipped
+        connection.sendall(bytes([12]) + bytes(31))
+        connection.sendall(
+            struct.pack("<BBHIIII12x", 1, 0, sequence, 0, 0, 0, IDLE_TIME_MS + sequence)
+        )
+
+    connection.close()
+
+
+def test_queries_idle_time_over_persistent_connection(tmp_path):
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(str(tmp_path / "X5"))
+    listener.listen(1)
+    server = Thread(target=fake_x_server, args=(listener,))
+    server.start()
+
+    idle_time = X11IdleTime(display=":5")
+    idle_time.X11_UNIX_SOCKET_PATH = str(tmp_path / "X{}")
+
+    assert idle_time.get_idle_time_ms() == IDLE_TIME_MS + 2
+    assert idle_time.get_idle_time_ms() == IDLE_TIME_MS + 3
+
+    idle_time.close()
+    server.join()
+    listener.close()
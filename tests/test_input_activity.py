@@ -0,0 +1,50 @@
+import os
+import struct
+from time import monotonic
+
+from pitopd.input_activity import EV_KEY, INPUT_EVENT_FORMAT, InputActivityMonitor
+
+EV_MSC = 0x04
+
+
+def create_monitor(tmp_path, monkeypatch):
+    os.mkfifo(tmp_path / "event0")
+    monkeypatch.setattr(
+        InputActivityMonitor, "EVENT_DEVICE_GLOB", str(tmp_path / "event*")
+    )
+    return InputActivityMonitor(device_filter=lambda path: True)
+
+
+def test_input_event_is_activity(tmp_path, monkeypatch):
+    monitor = create_monitor(tmp_path, monkeypatch)
+    start = monitor.last_activity()
+
+    with open(tmp_path / "event0", "wb", buffering=0) as device:
+        device.write(struct.pack(INPUT_EVENT_FORMAT, 0, 0, EV_KEY, 30, 1))
+        assert monitor.wait_for_activity(timeout=1) is True
+
+    assert start < monitor.last_activity() <= monotonic()
+    monitor.close()
+
+
+def test_other_events_are_not_activity(tmp_path, monkeypatch):
+    monitor = create_monitor(tmp_path, monkeypatch)
+    start = monitor.last_activity()
+
+    with open(tmp_path / "event0", "wb", buffering=0) as device:
+        device.write(struct.pack(INPUT_EVENT_FORMAT, 0, 0, EV_MSC, 4, 1))
+        assert monitor.wait_for_activity(timeout=1) is False
+
+    assert monitor.last_activity() == start
+    monitor.close()
+
+
+def test_wakeup_interrupts_wait(tmp_path, monkeypatch):
+    monitor = create_monitor(tmp_path, monkeypatch)
+
+    monitor.wakeup()
+    assert monitor.wait_for_activity() is False
+
+    monitor.wakeup()
+    monitor.wait()
+    monitor.close()
@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip("pitop.common")
+
+from pitopd.interface_manager import InterfaceManager  # noqa: E402
+
+
+def _interfaces(tmp_path, config):
+    config_file = tmp_path / "config.txt"
+    config_file.write_text(config)
+
+    interface_manager = InterfaceManager()
+    interface_manager.BOOT_CONFIG_FILE = str(config_file)
+    return interface_manager.i2c, interface_manager.spi0
+
+
+@pytest.mark.parametrize(
+    "config, i2c, spi0",
+    [
+        ("", False, False),
+        ("dtparam=i2c_arm=on\ndtparam=spi=on\n", True, True),
+        ("dtparam=i2c_arm=on,spi=on\n", True, True),
+        ("dtparam=audio=on,i2c_arm,spi=off\n", True, False),
+        ("device_tree_param=spi=1\n", False, True),
+        ("#dtparam=i2c_arm=on\n#dtparam=spi=on\n", False, False),
+        ("dtparam=audio=on\n#dtparam=spi=on,i2c_arm=on\n", False, False),
+        ("dtparam=audio=on,\ni2c_arm=on\n", False, False),
+        ("dtparam=audio=on\ndtparam=spi=off\ndtparam=i2c=yes\n", True, False),
+    ],
+)
+def test_interfaces_are_read_one_line_at_a_time(tmp_path, config, i2c, spi0):
+    assert _interfaces(tmp_path, config) == (i2c, spi0)
+
+
+def test_stop_closes_the_boot_config_watcher(tmp_path):
+    manager = InterfaceManager()
+    manager.BOOT_CONFIG_FILE = str(tmp_path / "config.txt")
+    manager.i2c
+    watcher = manager._boot_config_watcher
+    assert watcher._inotify_fd is not None
+
+    manager.stop()
+
+    assert watcher._inotify_fd is None
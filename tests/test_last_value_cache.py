@@ -0,0 +1,81 @@
+from time import sleep
+
+import pytest
+
+zmq = pytest.importorskip("zmq")
+pytest.importorskip("pitop.common")
+
+from pitop.common.ptdm import Message  # noqa: E402
+
+from pitopd.server import endpoints  # noqa: E402
+from pitopd.server.last_value_cache import LastValueCache  # noqa: E402
+from pitopd.server.publish_server import PublishServer  # noqa: E402
+from pitopd.server.state_request import (  # noqa: E402
+    REQ_GET_STATE,
+    StateRequestHandler,
+    decode_state_response,
+)
+
+
+@pytest.fixture
+def publish_server(tmp_path, monkeypatch, free_port):
+    monkeypatch.setattr(endpoints, "IPC_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(
+        endpoints, "PUBLISH", endpoints.Endpoint("publish", free_port())
+    )
+    monkeypatch.setattr(
+        endpoints,
+        "TOPIC_PUBLISH",
+        endpoints.Endpoint("publish-topics", free_port()),
+    )
+
+    server = PublishServer()
+    assert server.start_listening()
+    server.emit_messages = True
+
+    yield server
+    server.stop_listening()
+
+
+def test_published_state_can_be_requested(publish_server):
+    publish_server.publish_lid_opened()
+    publish_server.publish_up_button_press_state_changed(True)
+    publish_server.publish_pitopd_ready()
+    # Give the sender thread time to send the messages
+    sleep(0.2)
+
+    handler = StateRequestHandler(publish_server.last_value_cache)
+    assert decode_state_response(handler.handle([])) == [
+        str(Message.PUB_LID_OPENED),
+        str(Message.PUB_PITOPD_READY),
+    ]
+
+
+def test_state_request_answers_with_the_latest_state_messages():
+    cache = LastValueCache()
+    handler = StateRequestHandler(cache)
+    for message_id, parameters in (
+        (Message.PUB_LID_OPENED, []),
+        (Message.PUB_BRIGHTNESS_CHANGED, [7]),
+        (Message.PUB_V3_BUTTON_UP_PRESSED, []),
+        (Message.PUB_LID_CLOSED, []),
+        (Message.PUB_BATTERY_STATE_CHANGED, [1, 80, 120, 5]),
+        (Message.PUB_PITOPD_READY, []),
+        (Message.PUB_BRIGHTNESS_CHANGED, [8]),
+    ):
+        message = Message.from_parts(message_id, parameters)
+        cache.update(message_id, message.to_string())
+
+    assert handler.request_id == REQ_GET_STATE
+    assert decode_state_response(handler.handle([])) == [
+        str(Message.PUB_LID_CLOSED),
+        f"{Message.PUB_BRIGHTNESS_CHANGED}|8",
+        f"{Message.PUB_BATTERY_STATE_CHANGED}|1|80|120|5",
+        str(Message.PUB_PITOPD_READY),
+    ]
+
+
+def test_state_request_is_answered_before_anything_is_published():
+    handler = StateRequestHandler(LastValueCache())
+
+    assert decode_state_response(handler.handle([])) == []
@@ -0,0 +1,163 @@
+import pytest
+
+peripheral_manager = pytest.importorskip("pitopd.peripheral_manager")
+
+from pitop.common.common_ids import Peripheral  # noqa: E402
+
+PROTO_PLUS = Peripheral(name="pi-topPROTO+")
+SPEAKER_LEFT = Peripheral(name="pi-topSPEAKER-v1-Left")
+
+
+class FakeProber:
+    def __init__(self):
+        self.detected = 0
+
+    def probe(self):
+        return self.detected
+
+    def close(self):
+        pass
+
+
+class FakeCallbackClient:
+    def __init__(self):
+        self.events = list()
+
+    def on_peripheral_connected(self, peripheral_id):
+        self.events.append(("connected", peripheral_id))
+
+    def on_peripheral_disconnected(self, peripheral_id):
+        self.events.append(("disconnected", peripheral_id))
+
+
+@pytest.fixture
+def clock(clock, monkeypatch):
+    monkeypatch.setattr(peripheral_manager, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def prober():
+    return FakeProber()
+
+
+@pytest.fixture
+def client():
+    return FakeCallbackClient()
+
+
+@pytest.fixture
+def manager(clock, prober, client):
+    manager = peripheral_manager.PeripheralManager()
+    manager._i2c_prober = prober
+    manager.initialise(client)
+    return manager
+
+
+def test_peripherals_are_attached_and_detached_as_they_appear_and_disappear(
+    manager, prober, client
+):
+    prober.detected = 1 << PROTO_PLUS.addr
+    manager.auto_initialise_peripherals()
+    assert manager.get_peripheral_enabled(PROTO_PLUS)
+
+    # Nothing is done while the scan does not change
+    manager.auto_initialise_peripherals()
+    assert client.events == [("connected", PROTO_PLUS.id.value)]
+
+    prober.detected = 0
+    manager.auto_initialise_peripherals()
+    assert not manager.get_peripheral_enabled(PROTO_PLUS)
+    assert client.events == [
+        ("connected", PROTO_PLUS.id.value),
+        ("disconnected", PROTO_PLUS.id.value),
+    ]
+
+
+def test_all_peripherals_removed_in_one_scan_are_detached(manager, prober, client):
+    # Entries next to each other at the same address must not be skipped as
+    # the list is changed
+    manager._enabled_peripherals = [
+        SPEAKER_LEFT,
+        PROTO_PLUS,
+        Peripheral(name=PROTO_PLUS.name),
+    ]
+    prober.detected = (1 << SPEAKER_LEFT.addr) | (1 << PROTO_PLUS.addr)
+    manager._detected_addresses = prober.detected
+
+    prober.detected = 0
+    manager.auto_initialise_peripherals()
+
+    assert manager._enabled_peripherals == []
+    assert client.events == [
+        ("disconnected", PROTO_PLUS.id.value),
+        ("disconnected", PROTO_PLUS.id.value),
+        ("disconnected", SPEAKER_LEFT.id.value),
+    ]
+
+
+def test_peripherals_that_fail_to_enable_are_retried_with_backoff(
+    manager, prober, clock, monkeypatch
+):
+    attempts = list()
+    monkeypatch.setattr(
+        manager,
+        "attempt_enable_peripheral_by_name",
+        lambda name: attempts.append(clock.now),
+    )
+
+    prober.detected = 1 << PROTO_PLUS.addr
+    for now in range(20):
+        clock.now = now
+        manager.auto_initialise_peripherals()
+
+    # Retried after 3s, then 6s, then 12s
+    assert attempts == [0, 3, 9]
+
+
+def _count_enables(manager, prober, clock, monkeypatch, connected_for, removed_for):
+    enables = list()
+
+    def enable(name):
+        enables.append(clock.now)
+        manager.add_enabled_peripheral(Peripheral(name=name))
+
+    monkeypatch.setattr(manager, "attempt_enable_peripheral_by_name", enable)
+
+    for now in range(0, 3600, 5):
+        clock.now = now
+        connected = now % (connected_for + removed_for) < connected_for
+        prober.detected = (1 << PROTO_PLUS.addr) if connected else 0
+        manager.auto_initialise_peripherals()
+    return enables
+
+
+def test_peripherals_that_keep_being_disconnected_are_enabled_less_often(
+    manager, prober, clock, monkeypatch
+):
+    # Connected for 90s, then disconnected for 10s, for an hour
+    enables = _count_enables(manager, prober, clock, monkeypatch, 90, 10)
+
+    # It is connected 36 times, and once the backoff has reached its maximum
+    # it is enabled at most every 5 minutes
+    assert len(enables) < 36 // 2
+    assert all(
+        later - earlier >= 300 for earlier, later in zip(enables[-4:], enables[-3:])
+    )
+
+
+def test_peripherals_that_stay_connected_are_enabled_each_time_they_are_plugged_in(
+    manager, prober, clock, monkeypatch
+):
+    # Connected for 15 minutes, then disconnected for a minute
+    enables = _count_enables(manager, prober, clock, monkeypatch, 900, 60)
+
+    assert enables == [0, 960, 1920, 2880]
+
+
+def test_connected_peripherals_are_probed_with_the_same_bus(manager, prober):
+    probes = list()
+    prober.probe = lambda: probes.append(None) or 1 << PROTO_PLUS.addr
+
+    assert manager.get_connected_peripheral_names() == [PROTO_PLUS.name]
+    assert len(probes) == 1
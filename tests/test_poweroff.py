@@ -0,0 +1,53 @@
+import subprocess
+import sys
+from threading import Timer
+from time import monotonic
+
+from pitopd import poweroff
+
+
+def test_device_type_is_read_from_the_state_file(tmp_path, monkeypatch):
+    state_file = tmp_path / "state.cfg"
+    monkeypatch.setattr(poweroff, "STATE_FILE_PATH", str(state_file))
+
+    assert poweroff.get_device_type() == "unknown"
+    assert not state_file.exists()
+
+    state_file.write_text("[device]\ntype = pi_top_3\n\n")
+    assert poweroff.get_device_type() == "pi_top_3"
+
+
+def test_waits_until_pitopd_has_stopped(tmp_path, monkeypatch):
+    runtime_directory = tmp_path / "pi-topd"
+    runtime_directory.mkdir()
+    monkeypatch.setattr(poweroff, "PITOPD_RUNTIME_DIRECTORY", str(runtime_directory))
+
+    Timer(0.2, runtime_directory.rmdir).start()
+    started = monotonic()
+    poweroff._wait_for_pitopd_to_stop()
+
+    assert not runtime_directory.exists()
+    assert monotonic() - started < 2
+
+
+def test_stops_waiting_for_pitopd_after_a_timeout(tmp_path, monkeypatch):
+    monkeypatch.setattr(poweroff, "PITOPD_RUNTIME_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(poweroff, "PITOPD_STOP_TIMEOUT", 0.1)
+
+    started = monotonic()
+    poweroff._wait_for_pitopd_to_stop()
+
+    assert 0.1 <= monotonic() - started < 2
+
+
+def test_import_does_not_load_hardware_libraries():
+    code = (
+        "import sys, pitopd.poweroff;"
+        " print(' '.join(m for m in ('spidev', 'pitop.common', 'pitopd.state')"
+        " if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.strip() == ""
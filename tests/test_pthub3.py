@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip("pitop.common")
+
+from pitopd.pthub3 import pthub3  # noqa: E402
+from pitopd.pthub3.pthub3_state import State  # noqa: E402
+
+
+class FakeHubConnection:
+    def __init__(self):
+        self.reads = 0
+
+    def read_oled_use_spi0(self):
+        self.reads += 1
+        return 1
+
+
+def test_oled_spi_bus_is_only_read_from_the_hub_until_it_has_been_polled(
+    monkeypatch,
+):
+    state = State()
+    hub_connection = FakeHubConnection()
+    monkeypatch.setattr(pthub3, "_state", state, raising=False)
+    monkeypatch.setattr(pthub3, "_hub_connection", hub_connection, raising=False)
+
+    assert pthub3.get_oled_use_spi0()
+    assert hub_connection.reads == 1
+
+    # The poll thread has read the OLED control register
+    state.oled_is_using_spi0 = False
+    assert not pthub3.get_oled_use_spi0()
+    assert hub_connection.reads == 1
@@ -0,0 +1,22 @@
+import pytest
+
+pytest.importorskip("pitop.common")
+
+from pitopd.pthub3.pthub3_connection import HubConnection  # noqa: E402
+from pitopd.pthub3.pthub3_events import ManualEdgeEventSource  # noqa: E402
+from pitopd.pthub3.pthub3_scheduler import PollScheduler  # noqa: E402
+
+
+def test_nothing_is_polled_faster_than_telemetry_in_edge_event_mode(clock):
+    connection = HubConnection()
+    connection._scheduler = PollScheduler(clock=clock)
+    connection.set_edge_event_source(ManualEdgeEventSource())
+    connection._register_poll_sources()
+
+    for source in connection._scheduler.due_sources():
+        connection._scheduler.complete(source, None)
+
+    assert (
+        connection._scheduler.time_until_next_deadline()
+        >= connection._event_mode_cycle_sleep_time
+    )
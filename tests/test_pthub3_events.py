@@ -0,0 +1,51 @@
+import os
+from threading import Thread
+from time import sleep
+
+import pytest
+
+from pitopd.pthub3.pthub3_events import GpioEdgeEventSource
+
+
+@pytest.fixture
+def gpio_source(tmp_path, monkeypatch):
+    gpio_path = tmp_path / "gpio5"
+    gpio_path.mkdir()
+    for name in ("direction", "edge", "value"):
+        (gpio_path / name).write_text("0\n")
+    monkeypatch.setattr(GpioEdgeEventSource, "SYSFS_GPIO_PATH", str(tmp_path))
+
+    return GpioEdgeEventSource(5)
+
+
+def _fds(source):
+    return (source._value_fd, source._wakeup_read_fd, source._wakeup_write_fd)
+
+
+def _is_open(fd):
+    try:
+        os.fstat(fd)
+    except OSError:
+        return False
+    return True
+
+
+def test_close_wakes_a_waiting_thread_before_closing_its_files(gpio_source):
+    results = list()
+    thread = Thread(target=lambda: results.append(gpio_source.wait()))
+    thread.start()
+    while not gpio_source._waiting:
+        sleep(0.01)
+
+    gpio_source.close()
+    thread.join(timeout=5)
+
+    assert results == [False]
+    assert not any(_is_open(fd) for fd in _fds(gpio_source))
+
+
+def test_close_without_a_waiting_thread_closes_its_files(gpio_source):
+    gpio_source.close()
+
+    assert not any(_is_open(fd) for fd in _fds(gpio_source))
+    assert gpio_source.wait(timeout=0) is False
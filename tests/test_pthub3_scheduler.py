@@ -0,0 +1,59 @@
+from pitopd.pthub3.pthub3_scheduler import PollScheduler
+
+
+def service_due_sources(scheduler, values):
+    serviced = list()
+    for source in scheduler.due_sources():
+        serviced.append(source.name)
+        scheduler.complete(source, values.get(source.name))
+    return serviced
+
+
+def test_sources_are_due_in_priority_order(clock):
+    scheduler = PollScheduler(clock=clock)
+    scheduler.register("battery", None, 2, priority=3)
+    scheduler.register("shutdown", None, 0.1, priority=0)
+
+    assert service_due_sources(scheduler, {}) == ["shutdown", "battery"]
+
+
+def test_deadlines_do_not_drift_with_late_servicing(clock):
+    scheduler = PollScheduler(clock=clock)
+    source = scheduler.register("cpu_temp", None, 5)
+
+    service_due_sources(scheduler, {})
+    clock.now = 5.3
+    service_due_sources(scheduler, {})
+
+    assert source.next_deadline == 10
+
+
+def test_stable_source_backs_off_and_resets_on_change(clock):
+    scheduler = PollScheduler(clock=clock)
+    source = scheduler.register(
+        "battery", None, 2, max_period=8, stable_after=10, backoff_factor=2
+    )
+
+    values = {"battery": 50}
+    for _ in range(30):
+        service_due_sources(scheduler, values)
+        clock.now += 1
+    assert source.current_period == 8
+
+    clock.now = source.next_deadline
+    values["battery"] = 49
+    service_due_sources(scheduler, values)
+    assert source.current_period == 2
+    assert scheduler.time_until_next_deadline() == 2
+
+
+def test_reset_makes_source_due_immediately(clock):
+    scheduler = PollScheduler(clock=clock)
+    scheduler.register("battery", None, 30)
+
+    service_due_sources(scheduler, {})
+    clock.now = 1
+    assert service_due_sources(scheduler, {}) == []
+
+    scheduler.reset("battery")
+    assert service_due_sources(scheduler, {}) == ["battery"]
@@ -0,0 +1,122 @@
+from pitopd.pthub3.internal.battery import BatteryControl
+from pitopd.pthub3.internal.hardware import HardwareControl
+from pitopd.pthub3.internal.power import PowerControl
+from pitopd.pthub3.pthub3_snapshot import (
+    BATTERY_BLOCK,
+    SHUTDOWN_CONTROL_BLOCK,
+    UI_CONTROL_BLOCK,
+    SnapshotReader,
+)
+
+REGISTER_BYTES = {
+    HardwareControl.CTRL__UI_OLED_CTRL: [0x05],
+    HardwareControl.CTRL__UI_BUTTON_CTRL: [0x09],
+    PowerControl.PWR__SHUTDOWN_CTRL: [0x42],
+    BatteryControl.BAT__VOLTAGE: [0x2E, 0xE0],
+    BatteryControl.BAT__CURRENT: [0xFE, 0x0C],
+    BatteryControl.BAT__RSOC: [0x4B],
+    BatteryControl.BAT__TIME_TO_EMPTY: [0x00, 0x78],
+    BatteryControl.BAT__TIME_TO_FULL: [0xFF, 0xFF],
+}
+
+
+class FakeI2CDevice:
+    def __init__(self, burst_supported=True, burst_raises=False, failing_reads=0):
+        self.burst_supported = burst_supported
+        self.burst_raises = burst_raises
+        self.failing_reads = failing_reads
+        self.transactions = 0
+
+    def _register_stream(self, register_address, number_of_bytes):
+        data = list()
+        address = register_address
+        while len(data) < number_of_bytes:
+            data.extend(REGISTER_BYTES.get(address, [0x00]))
+            if not self.burst_supported:
+                break
+            address += 1
+        return data[:number_of_bytes]
+
+    def read_n_unsigned_bytes(self, register_address, number_of_bytes):
+        self.transactions += 1
+        if self.burst_raises and number_of_bytes > 2:
+            raise OSError(121, "Remote I/O error")
+        data = self._register_stream(register_address, number_of_bytes)
+        if len(data) != number_of_bytes:
+            return None
+        return int.from_bytes(bytes(data), "big")
+
+    def read_unsigned_byte(self, register_address):
+        if self.failing_reads > 0:
+            self.failing_reads -= 1
+            raise OSError(121, "Remote I/O error")
+        return self.read_n_unsigned_bytes(register_address, 1)
+
+    def read_unsigned_word(self, register_address):
+        return self.read_n_unsigned_bytes(register_address, 2)
+
+    def read_signed_word(self, register_address):
+        value = self.read_n_unsigned_bytes(register_address, 2)
+        return value - 0x10000 if value & 0x8000 else value
+
+
+def test_snapshot_decodes_all_poll_registers():
+    device = FakeI2CDevice()
+    reader = SnapshotReader(device)
+
+    snapshot = reader.read([UI_CONTROL_BLOCK, SHUTDOWN_CONTROL_BLOCK, BATTERY_BLOCK])
+
+    assert snapshot.get(HardwareControl.CTRL__UI_OLED_CTRL) == 0x05
+    assert snapshot.get(HardwareControl.CTRL__UI_BUTTON_CTRL) == 0x09
+    assert snapshot.get_bits(0x40, PowerControl.PWR__SHUTDOWN_CTRL) == 0x40
+    assert snapshot.get(BatteryControl.BAT__VOLTAGE) == 12000
+    assert snapshot.get(BatteryControl.BAT__CURRENT) == -500
+    assert snapshot.get(BatteryControl.BAT__RSOC) == 75
+    assert snapshot.get(BatteryControl.BAT__TIME_TO_EMPTY) == 120
+    assert snapshot.get(BatteryControl.BAT__TIME_TO_FULL) == 0xFFFF
+
+
+def test_snapshot_uses_one_transaction_per_block():
+    device = FakeI2CDevice()
+    reader = SnapshotReader(device)
+
+    reader.read([UI_CONTROL_BLOCK, SHUTDOWN_CONTROL_BLOCK, BATTERY_BLOCK])
+
+    assert device.transactions == 3
+
+
+def test_snapshot_falls_back_to_register_reads_if_block_verification_fails():
+    device = FakeI2CDevice(burst_supported=False)
+    reader = SnapshotReader(device)
+
+    assert reader.verify(UI_CONTROL_BLOCK) is False
+
+    device.transactions = 0
+    snapshot = reader.read([UI_CONTROL_BLOCK])
+
+    assert device.transactions == len(UI_CONTROL_BLOCK.registers)
+    assert snapshot.get(HardwareControl.CTRL__UI_OLED_CTRL) == 0x05
+    assert snapshot.get(HardwareControl.CTRL__UI_BUTTON_CTRL) == 0x09
+
+
+def test_snapshot_falls_back_to_register_reads_if_block_verification_raises():
+    device = FakeI2CDevice(burst_raises=True)
+    reader = SnapshotReader(device)
+
+    assert reader.verify(BATTERY_BLOCK) is False
+
+    snapshot = reader.read([BATTERY_BLOCK])
+    assert snapshot.get(BatteryControl.BAT__VOLTAGE) == 12000
+    assert snapshot.get(BatteryControl.BAT__RSOC) == 75
+
+
+def test_snapshot_falls_back_to_register_reads_if_verification_reads_raise():
+    device = FakeI2CDevice(failing_reads=1)
+    reader = SnapshotReader(device)
+
+    assert reader.verify(UI_CONTROL_BLOCK) is False
+
+    device.transactions = 0
+    snapshot = reader.read([UI_CONTROL_BLOCK])
+    assert device.transactions == len(UI_CONTROL_BLOCK.registers)
+    assert snapshot.get(HardwareControl.CTRL__UI_OLED_CTRL) == 0x05
@@ -0,0 +1,76 @@
+import logging
+
+from pitopd.pthub3.pthub3_scheduler import PollScheduler
+from pitopd.pthub3.pthub3_thermal import ThermalFeed
+
+
+def test_reads_are_rereads_of_the_same_file(tmp_path):
+    temp_file = tmp_path / "temp"
+    temp_file.write_text("45321\n")
+    feed = ThermalFeed(path=str(temp_file))
+
+    assert feed.read() == 45
+    temp_file.write_text("51000\n")
+    assert feed.read() == 51
+    assert [temp for _, temp in feed.history] == [45, 51]
+
+    feed.close()
+
+
+def test_missing_file_is_not_a_valid_reading(tmp_path):
+    feed = ThermalFeed(path=str(tmp_path / "missing"))
+
+    assert feed.read() is None
+
+
+def test_missing_file_is_only_warned_about_once(tmp_path, caplog):
+    temp_file = tmp_path / "temp"
+    feed = ThermalFeed(path=str(temp_file))
+
+    with caplog.at_level(logging.WARNING):
+        for _ in range(5):
+            assert feed.read() is None
+    assert len(caplog.records) == 1
+
+    temp_file.write_text("45321\n")
+    assert feed.read() == 45
+
+    caplog.clear()
+    temp_file.unlink()
+    feed.close()
+    with caplog.at_level(logging.WARNING):
+        assert feed.read() is None
+    assert len(caplog.records) == 1
+
+
+def test_polling_a_missing_file_backs_off(tmp_path, clock):
+    feed = ThermalFeed(path=str(tmp_path / "missing"))
+    scheduler = PollScheduler(clock=clock)
+    source = scheduler.register(
+        "cpu_temp", feed.read, 2, max_period=20, stable_after=60
+    )
+
+    reads = 0
+    for now in range(600):
+        clock.now = now
+        for due_source in scheduler.due_sources():
+            scheduler.complete(due_source, due_source.callback())
+            reads += 1
+
+    assert source.current_period == 20
+    # Every 2s for the whole 10 minutes would be 300 reads
+    assert reads < 100
+
+
+def test_only_writes_when_outside_hysteresis_band_or_stale(clock):
+    feed = ThermalFeed(hysteresis=2, refresh_period=60, clock=clock)
+
+    assert feed.should_write(50)
+    feed.mark_written(50)
+
+    assert not feed.should_write(51)
+    assert feed.should_write(52)
+    assert feed.should_write(48)
+
+    clock.now = 60
+    assert feed.should_write(50)
@@ -0,0 +1,53 @@
+from threading import Thread
+
+import pytest
+
+pytest.importorskip("zmq")
+pytest.importorskip("pitop.common")
+
+from pitop.common.ptdm import Message  # noqa: E402
+
+from pitopd.server.publish_server import PublishServer  # noqa: E402
+
+
+def _ready_server():
+    server = PublishServer()
+    # Queue messages as if the sockets were open, without a sender thread
+    server._zmq_socket = object()
+    server.emit_messages = True
+    return server
+
+
+def test_sender_thread_keeps_going_after_an_error():
+    server = _ready_server()
+    sent = list()
+
+    def send(message_id, parameters, message):
+        if message_id == Message.PUB_LID_OPENED:
+            raise RuntimeError("Socket closed")
+        sent.append(message_id)
+
+    server._send = send
+    server.publish_lid_opened()
+    server.publish_lid_closed()
+    server._queue.put(None)
+    server._sender_thread_method()
+
+    assert sent == [Message.PUB_LID_CLOSED]
+
+
+def test_messages_dropped_by_several_threads_are_all_counted():
+    server = _ready_server()
+    messages_per_thread = 2000
+
+    def publish():
+        for _ in range(messages_per_thread):
+            server.publish_lid_opened()
+
+    threads = [Thread(target=publish) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert server.stats()["dropped"] == 4 * messages_per_thread - server.QUEUE_LENGTH
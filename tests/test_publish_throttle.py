@@ -0,0 +1,91 @@
+from pitopd.publish_throttle import PublishThrottle, TopicPolicy
+
+BATTERY = "battery"
+BUTTON = "button"
+
+
+class FakeTimer:
+    started = list()
+
+    def __init__(self, delay, function, args):
+        self.delay = delay
+        self.function = function
+        self.args = args
+        self.cancelled = False
+
+    def start(self):
+        FakeTimer.started.append(self)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def fire(self):
+        if not self.cancelled:
+            self.function(*self.args)
+
+
+def create_throttle(clock, sent):
+    FakeTimer.started = list()
+    return PublishThrottle(
+        lambda topic, parameters: sent.append((topic, parameters)),
+        {BATTERY: TopicPolicy(10, key=lambda parameters: parameters[0])},
+        clock=clock,
+        timer_factory=FakeTimer,
+    )
+
+
+def test_keeps_latest_value_within_interval(clock):
+    sent = list()
+    throttle = create_throttle(clock, sent)
+
+    throttle.submit(BATTERY, [1, 50, 60, 21])
+    clock.now = 2
+    throttle.submit(BATTERY, [1, 50, 60, 22])
+    clock.now = 4
+    throttle.submit(BATTERY, [1, 51, 58, 21])
+    assert sent == [(BATTERY, [1, 50, 60, 21])]
+
+    timer = FakeTimer.started[-1]
+    assert timer.delay == 8
+    clock.now = 10
+    timer.fire()
+    assert sent[-1] == (BATTERY, [1, 51, 58, 21])
+    assert throttle.stats() == {BATTERY: {"sent": 2, "suppressed": 1}}
+
+
+def test_key_change_is_sent_immediately(clock):
+    sent = list()
+    throttle = create_throttle(clock, sent)
+
+    throttle.submit(BATTERY, [1, 96, 5, 10])
+    clock.now = 1
+    throttle.submit(BATTERY, [1, 97, 4, 10])
+    clock.now = 2
+    throttle.submit(BATTERY, [2, 100, 0, 0])
+    assert sent == [(BATTERY, [1, 96, 5, 10]), (BATTERY, [2, 100, 0, 0])]
+
+    # The held back update is older than the one sent, so is dropped
+    clock.now = 12
+    FakeTimer.started[-1].fire()
+    assert len(sent) == 2
+    assert throttle.stats()[BATTERY]["suppressed"] == 1
+
+
+def test_topics_without_policy_are_lossless(clock):
+    sent = list()
+    throttle = create_throttle(clock, sent)
+
+    for _ in range(50):
+        throttle.submit(BUTTON, [])
+    assert len(sent) == 50
+
+
+def test_close_cancels_pending_messages(clock):
+    sent = list()
+    throttle = create_throttle(clock, sent)
+
+    throttle.submit(BATTERY, [0, 40, 100, 30])
+    throttle.submit(BATTERY, [0, 39, 99, 30])
+    throttle.close()
+    FakeTimer.started[-1].fire()
+    assert len(sent) == 1
@@ -0,0 +1,102 @@
+from threading import Event
+from time import monotonic
+
+import pytest
+
+zmq = pytest.importorskip("zmq")
+pytest.importorskip("pitop.common")
+
+from pitop.common.ptdm import Message  # noqa: E402
+
+from pitopd.server import endpoints  # noqa: E402
+from pitopd.server.request_handlers import RequestHandler  # noqa: E402
+from pitopd.server.request_server import RequestServer  # noqa: E402
+
+SLOW_REQUEST = 1500
+FAST_REQUEST = 1501
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch, free_port):
+    monkeypatch.setattr(endpoints, "IPC_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(
+        endpoints, "REQUEST", endpoints.Endpoint("request", free_port())
+    )
+
+    server = RequestServer()
+    yield server
+    server.stop_listening()
+
+
+@pytest.fixture
+def connect():
+    context = zmq.Context()
+
+    def connect(socket_type=zmq.REQ):
+        client = context.socket(socket_type)
+        client.setsockopt(zmq.LINGER, 0)
+        client.setsockopt(zmq.RCVTIMEO, 5000)
+        client.connect(endpoints.REQUEST.client_uri())
+        return client
+
+    yield connect
+    context.destroy()
+
+
+def test_fast_requests_are_not_held_up_by_a_slow_serialised_request(server, connect):
+    release = Event()
+    server.register_handler(
+        RequestHandler(SLOW_REQUEST, lambda: release.wait(5), serialised=True)
+    )
+    server.register_handler(RequestHandler(FAST_REQUEST, lambda: None))
+    assert server.start_listening()
+
+    slow_client = connect()
+    slow_client.send_string(str(SLOW_REQUEST))
+
+    # Enough requests that some would be handed to the busy worker if they
+    # were shared out regardless of whether the workers were free
+    fast_client = connect()
+    for _ in range(RequestServer.WORKER_COUNT * 2):
+        started = monotonic()
+        fast_client.send_string(str(FAST_REQUEST))
+        assert fast_client.recv_string() == str(FAST_REQUEST + 100)
+        assert monotonic() - started < 1
+
+    release.set()
+    assert slow_client.recv_string() == str(SLOW_REQUEST + 100)
+
+
+def test_requests_are_rejected_once_the_queue_is_full(server, connect):
+    release = Event()
+    server.register_handler(RequestHandler(SLOW_REQUEST, lambda: release.wait(5)))
+    assert server.start_listening()
+
+    accepted = RequestServer.WORKER_COUNT + RequestServer.REQUEST_QUEUE_LENGTH
+    rejected = 5
+    client = connect(zmq.DEALER)
+    for _ in range(accepted + rejected):
+        client.send_multipart([b"", str(SLOW_REQUEST).encode()])
+
+    # The rejections are answered straight away, while the other requests
+    # are still waiting for the handler
+    for _ in range(rejected):
+        assert client.recv_multipart()[-1] == str(Message.RSP_ERR_SERVER).encode()
+    assert not client.poll(200)
+
+    release.set()
+    for _ in range(accepted):
+        assert client.recv_multipart()[-1] == str(SLOW_REQUEST + 100).encode()
+
+
+def test_requests_that_are_not_utf8_are_answered_as_malformed(server, connect):
+    server.register_handler(RequestHandler(FAST_REQUEST, lambda: None))
+    assert server.start_listening()
+
+    client = connect()
+    client.send(b"\xff\xfe")
+    assert client.recv_string() == str(Message.RSP_ERR_MALFORMED)
+
+    # The server is still answering requests afterwards
+    client.send_string(str(FAST_REQUEST))
+    assert client.recv_string() == str(FAST_REQUEST + 100)
@@ -0,0 +1,125 @@
+import pytest
+
+from pitopd.pthub3.internal.battery import BatteryControl
+from pitopd.pthub3.internal.hardware import HardwareControl, UIButtonsRegister
+from pitopd.pthub3.internal.power import PowerControl, ShutdownRegister
+from pitopd.pthub3.pthub3_snapshot import BATTERY_BLOCK
+from pitopd.simulator.battery import NO_TIME, BatteryModel
+from pitopd.simulator.hub3 import Hub3Simulator
+from pitopd.simulator.registers import RegisterMap
+from pitopd.simulator.scenario import parse_scenario
+
+
+def test_register_map_reads_across_registers_of_different_sizes():
+    registers = RegisterMap()
+    registers.define(0x10, 0x1234, size=2)
+    registers.define(0x11, 0x56)
+    registers.define(0x12, -2, size=2)
+
+    assert registers.read(0x10, 5) == [0x12, 0x34, 0x56, 0xFF, 0xFE]
+    assert registers.read(0x11, 1) == [0x56]
+
+    registers.write(0x10, [0xAB, 0xCD, 0xEF])
+    assert registers.get(0x10) == 0xABCD
+    assert registers.get(0x11) == 0xEF
+
+
+def test_battery_discharges_and_charges_over_time(clock):
+    battery = BatteryModel(
+        capacity=50,
+        charger_connected=False,
+        capacity_mah=1000,
+        discharge_current_ma=1000,
+        charge_current_ma=500,
+        clock=clock,
+    )
+    assert battery.current_ma() == -1000
+    assert battery.time_to_empty_minutes() == 30
+    assert battery.time_to_full_minutes() == NO_TIME
+
+    clock.now = 15 * 60
+    assert battery.relative_state_of_charge() == 25
+
+    battery.set_charger_connected(True)
+    clock.now += 60 * 60
+    assert battery.relative_state_of_charge() == 75
+    assert battery.time_to_full_minutes() == 30
+
+    clock.now += 60 * 60
+    assert battery.capacity == 100
+    assert battery.current_ma() == 0
+
+
+def test_hub3_simulator_reports_battery_and_buttons_in_its_registers(clock):
+    hub = Hub3Simulator(
+        battery=BatteryModel(capacity=60, charger_connected=False, clock=clock)
+    )
+
+    hub.press_button("select")
+    hub.press_button("power")
+    buttons = hub.read(HardwareControl.CTRL__UI_BUTTON_CTRL, 1)[0]
+    shutdown_control = hub.read(PowerControl.PWR__SHUTDOWN_CTRL, 1)[0]
+    assert buttons == UIButtonsRegister.CTRL__UI_BUTTON_CTRL__SELECT
+    assert shutdown_control == ShutdownRegister.PWR__SHUTDOWN_CTRL__HELD
+
+    hub.release_button("select")
+    assert hub.read(HardwareControl.CTRL__UI_BUTTON_CTRL, 1) == [0]
+
+    raw_value = int.from_bytes(
+        bytes(hub.read(BATTERY_BLOCK.start, BATTERY_BLOCK.length)), "big"
+    )
+    values = BATTERY_BLOCK.decode(raw_value)
+    assert values[BatteryControl.BAT__RSOC] == 60
+    assert values[BatteryControl.BAT__CURRENT] == -1000
+
+    hub.set_charger_connected(True)
+    shutdown_control = hub.read(PowerControl.PWR__SHUTDOWN_CTRL, 1)[0]
+    assert shutdown_control & ShutdownRegister.PWR__SHUTDOWN_CTRL__AC
+
+    with pytest.raises(NotImplementedError):
+        hub.set_lid_open(False)
+
+
+def test_parse_scenario():
+    events = parse_scenario(
+        [
+            "# Comment",
+            "",
+            "5 lid closed",
+            "1 press select 0.5",
+            "2 charger disconnected",
+            "3 battery 4.5",
+            "4 shutdown",
+        ]
+    )
+
+    assert [(event.time, event.action, event.arguments) for event in events] == [
+        (1, "press_button", ("select",)),
+        (1.5, "release_button", ("select",)),
+        (2, "set_charger_connected", (False,)),
+        (3, "set_battery_capacity", (4.5,)),
+        (4, "request_shutdown", ()),
+        (5, "set_lid_open", (False,)),
+    ]
+
+
+def test_parse_scenario_rejects_invalid_lines():
+    for line in ("1 press jump", "1 lid ajar", "soon shutdown", "1 explode", "1"):
+        with pytest.raises(ValueError, match="Line 1"):
+            parse_scenario([line])
+
+
+def test_simulated_host_leaves_audio_alone_and_simulates_idle_time(monkeypatch, clock):
+    host = pytest.importorskip("pitopd.simulator.host")
+    from pitopd import peripheral_manager
+
+    def fail(*args, **kwargs):
+        raise AssertionError("The host's audio configuration was used")
+
+    monkeypatch.setattr(peripheral_manager, "call", fail)
+    monkeypatch.setattr(peripheral_manager.I2S, "get_current_state", fail)
+    host.SimulatedPeripheralManager().configure_hifiberry()
+
+    idle_time = host.SimulatedIdleTime(clock=clock)
+    clock.now = 2.5
+    assert idle_time.get_idle_time_ms() == 2500
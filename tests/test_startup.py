@@ -0,0 +1,118 @@
+from threading import Barrier, Event, Thread
+
+import pytest
+
+from pitopd.boot_profile import BootProfile
+from pitopd.startup import FAILED, SKIPPED, SUCCEEDED, StartupGraph
+
+
+def test_independent_steps_run_at_the_same_time():
+    # Each step waits for the other to start, so this only finishes if
+    # they run concurrently
+    barrier = Barrier(2, timeout=5)
+    graph = StartupGraph("startup")
+    graph.add_step("publish_server", barrier.wait)
+    graph.add_step("hub", barrier.wait)
+
+    assert graph.run() is True
+    assert sorted(graph.durations()) == ["hub", "publish_server"]
+
+
+def test_steps_run_after_the_steps_they_require():
+    order = list()
+    graph = StartupGraph("startup")
+    graph.add_step("hub", lambda: order.append("hub"))
+    graph.add_step("device", lambda: order.append("device"), requires=["hub"])
+    graph.add_step(
+        "miniscreen", lambda: order.append("miniscreen"), requires=["device"]
+    )
+
+    assert graph.run() is True
+    assert order == ["hub", "device", "miniscreen"]
+
+
+def test_steps_that_require_a_failed_step_are_skipped():
+    def fail():
+        raise OSError("No hub")
+
+    graph = StartupGraph("startup")
+    graph.add_step("publish_server", lambda: None)
+    graph.add_step("hub", fail)
+    graph.add_step("device", lambda: None, requires=["hub"])
+    graph.add_step("miniscreen", lambda: None, requires=["device"])
+    graph.add_step("request_server", lambda: False, requires=["publish_server"])
+
+    assert graph.run() is False
+    assert graph.statuses() == {
+        "publish_server": SUCCEEDED,
+        "hub": FAILED,
+        "device": SKIPPED,
+        "miniscreen": SKIPPED,
+        "request_server": FAILED,
+    }
+
+
+def test_steps_run_after_a_failed_step_that_they_do_not_require():
+    order = list()
+
+    def configure_hifiberry():
+        order.append("hifiberry")
+        raise OSError("No HiFiBerry")
+
+    graph = StartupGraph("deferred startup")
+    graph.add_step("hifiberry", configure_hifiberry)
+    graph.add_step(
+        "peripherals", lambda: order.append("peripherals"), after=["hifiberry"]
+    )
+
+    assert graph.run() is False
+    assert order == ["hifiberry", "peripherals"]
+    assert graph.statuses() == {"hifiberry": FAILED, "peripherals": SUCCEEDED}
+
+
+def test_cancel_skips_the_steps_that_have_not_started():
+    started = Event()
+    finish = Event()
+    finished = list()
+    results = list()
+
+    def connect_to_hub():
+        started.set()
+        finish.wait(5)
+        finished.append("hub")
+
+    graph = StartupGraph("startup")
+    graph.add_step("hub", connect_to_hub)
+    graph.add_step("device", lambda: finished.append("device"), requires=["hub"])
+
+    runner = Thread(target=lambda: results.append(graph.run()))
+    runner.start()
+    assert started.wait(5)
+
+    graph.cancel()
+    # run() waits for the step that is running
+    runner.join(0.1)
+    assert runner.is_alive()
+
+    finish.set()
+    runner.join(5)
+    assert results == [False]
+    assert finished == ["hub"]
+    assert graph.statuses()["device"] == SKIPPED
+
+
+def test_steps_must_be_added_after_the_steps_they_require():
+    graph = StartupGraph("startup")
+    with pytest.raises(ValueError, match="hub"):
+        graph.add_step("device", lambda: None, requires=["hub"])
+
+
+def test_step_times_are_recorded_in_the_profile():
+    profile = BootProfile()
+    graph = StartupGraph("startup", profile)
+    graph.add_step("hub", lambda: None)
+    graph.add_step("device", lambda: False, requires=["hub"])
+    graph.add_step("miniscreen", lambda: None, requires=["device"])
+
+    graph.run()
+    assert [name for name, _, _ in profile.phases()] == ["hub", "device"]
@@ -0,0 +1,60 @@
+from configparser import NoOptionError, NoSectionError
+
+import pytest
+
+from pitopd.state import StateStore
+
+
+def test_loads_existing_state(tmp_path):
+    state_file = tmp_path / "state.cfg"
+    state_file.write_text("[display]\ntimeout = 120\n\n")
+    store = StateStore(state_file)
+
+    assert store.get("display", "timeout") == "120"
+    assert store.get("display", "missing", fallback="300") == "300"
+
+
+def test_missing_values_raise_without_a_fallback(tmp_path):
+    state_file = tmp_path / "state.cfg"
+    state_file.write_text("[display]\ntimeout = 120\n\n")
+    store = StateStore(state_file)
+
+    with pytest.raises(NoOptionError):
+        store.get("display", "missing")
+    with pytest.raises(NoSectionError):
+        store.get("missing", "timeout")
+
+
+def test_only_string_values_can_be_set(tmp_path):
+    store = StateStore(tmp_path / "state.cfg", flush_delay=60)
+
+    with pytest.raises(TypeError):
+        store.set("display", "timeout", 120)
+    assert store.get("display", "timeout", fallback="300") == "300"
+
+
+def test_set_is_written_behind_and_flushed_atomically(tmp_path):
+    state_file = tmp_path / "pi-topd" / "state.cfg"
+    store = StateStore(state_file, flush_delay=60)
+    assert state_file.exists()
+
+    store.set("device", "type", "pi_top_4")
+    store.set("sound", "i2s_configured", "true")
+    assert store.get("device", "type") == "pi_top_4"
+    assert state_file.read_text() == ""
+
+    store.flush()
+    reloaded = StateStore(state_file)
+    assert reloaded.get("device", "type") == "pi_top_4"
+    assert reloaded.get("sound", "i2s_configured") == "true"
+    assert list(state_file.parent.iterdir()) == [state_file]
+
+
+def test_unchanged_value_does_not_schedule_write(tmp_path):
+    state_file = tmp_path / "state.cfg"
+    state_file.write_text("[display]\ntimeout = 120\n\n")
+    store = StateStore(state_file, flush_delay=60)
+
+    store.set("display", "timeout", "120")
+
+    assert store._flush_timer is None